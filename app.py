@@ -1,14 +1,50 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g, has_request_context, send_file, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import click
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSession
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, get_jwt, get_jwt_request_location
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+from bisect import bisect_right
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from functools import wraps
+from itertools import accumulate
+import atexit
+import base64
+import hashlib
+import csv
+import io
+import json
+import logging
 import os
+import random
+import re
+import shutil
+import threading
+import time
+import traceback
+import uuid
 from dotenv import load_dotenv
 import pymysql
 
+# Opsiyonel hızlı JSON kodlayıcı; kurulu değilse stdlib json kullanılır
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Opsiyonel madde analizi (numpy gerekir); kurulu değilse analiz endpoint'i 501 döner
+try:
+    import item_analysis
+except ImportError:
+    item_analysis = None
+
 # PyMySQL'i MySQLdb gibi kullan
 pymysql.install_as_MySQLdb()
 
@@ -19,13 +55,118 @@ app = Flask(__name__)
 # Varsayılan: SQLite (geliştirme için)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///exam_system.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+def engine_options(prefix, url):
+    # Bağlantı havuzu ayarları: <prefix>_POOL_SIZE, _MAX_OVERFLOW, _POOL_PRE_PING, _POOL_RECYCLE
+    # SQLite (geliştirme) açıkça verilmedikçe kendi varsayılan havuzunu kullanır
+    defaults = {} if url.startswith('sqlite') else {'pool_size': 10, 'max_overflow': 20, 'pool_recycle': 1800}
+    options = {'pool_pre_ping': os.getenv(f'{prefix}_POOL_PRE_PING', '1') == '1'}
+    for option in ('pool_size', 'max_overflow', 'pool_recycle'):
+        value = os.getenv(f'{prefix}_{option.upper()}', defaults.get(option))
+        if value is not None:
+            options[option] = int(value)
+    return options
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options('DB', app.config['SQLALCHEMY_DATABASE_URI'])
+# Raporlama endpoint'leri için opsiyonel okuma replikası (@read_replica); yoksa her şey primary'ye gider
+if os.getenv('REPLICA_DATABASE_URL'):
+    app.config['SQLALCHEMY_BINDS'] = {'replica': dict(
+        engine_options('REPLICA', os.getenv('REPLICA_DATABASE_URL')), url=os.getenv('REPLICA_DATABASE_URL'))}
+# Replika hata verdiğinde bu süre boyunca primary kullanılır
+app.config['REPLICA_RETRY_SECONDS'] = int(os.getenv('REPLICA_RETRY_SECONDS', 30))
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 app.config['JWT_COOKIE_CSRF_PROTECT'] = False  # CSRF korumasını kapat (development için)
+# require_role için kullanıcı durumu önbelleği
+app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 60))  # saniye
+app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', 10000))
+# start_test için test başına soru havuzu önbelleği
+app.config['QUESTION_POOL_CACHE_TTL'] = int(os.getenv('QUESTION_POOL_CACHE_TTL', 600))
+app.config['QUESTION_POOL_CACHE_SIZE'] = int(os.getenv('QUESTION_POOL_CACHE_SIZE', 1000))
+# Sınav başlamadan önce hazırlanan start_test yanıtları (kayıtlı öğrenciler + serileştirilmiş sorular)
+app.config['EXAM_WARMUP_LEAD'] = int(os.getenv('EXAM_WARMUP_LEAD', 300))  # start_time'dan kaç saniye önce
+app.config['EXAM_WARMUP_INTERVAL'] = int(os.getenv('EXAM_WARMUP_INTERVAL', 30))  # saniye, 0 = arka plan ısıtma kapalı
+app.config['EXAM_PAYLOAD_CACHE_SIZE'] = int(os.getenv('EXAM_PAYLOAD_CACHE_SIZE', 200))
+app.config['EXAM_PAYLOAD_CACHE_TTL'] = int(os.getenv('EXAM_PAYLOAD_CACHE_TTL', 900))
+# Madde analizi: cevaplar bu büyüklükte parçalarla okunur; sonuç yeni teslim gelene kadar önbellekte kalır
+app.config['ITEM_ANALYSIS_CHUNK_SIZE'] = int(os.getenv('ITEM_ANALYSIS_CHUNK_SIZE', 50000))
+app.config['ITEM_ANALYSIS_CACHE_SIZE'] = int(os.getenv('ITEM_ANALYSIS_CACHE_SIZE', 200))
+app.config['ITEM_ANALYSIS_CACHE_TTL'] = int(os.getenv('ITEM_ANALYSIS_CACHE_TTL', 3600))
+# Sonuç ekranlarındaki puan histogramının aralık genişliği (yüzde puan)
+app.config['SCORE_HISTOGRAM_WIDTH'] = int(os.getenv('SCORE_HISTOGRAM_WIDTH', 10))
+# Otomatik kayıt: cevaplar bellekte biriktirilir, süre veya bekleyen cevap sayısı eşiğinde toplu yazılır
+app.config['AUTOSAVE_FLUSH_INTERVAL'] = float(os.getenv('AUTOSAVE_FLUSH_INTERVAL', 5))  # saniye
+app.config['AUTOSAVE_FLUSH_SIZE'] = int(os.getenv('AUTOSAVE_FLUSH_SIZE', 1000))  # bekleyen cevap
+# Canlı sınav izleme (SSE): abone başına bekleyen olay sınırı ve boşta bağlantı için heartbeat aralığı
+app.config['EXAM_STREAM_QUEUE_SIZE'] = int(os.getenv('EXAM_STREAM_QUEUE_SIZE', 100))
+app.config['EXAM_STREAM_HEARTBEAT'] = float(os.getenv('EXAM_STREAM_HEARTBEAT', 15))  # saniye
+app.config['EXAM_STREAM_TOKEN_TTL'] = int(os.getenv('EXAM_STREAM_TOKEN_TTL', 60))  # saniye, URL'deki akış token'ının ömrü
+# Arka plan işleri: eşzamanlı iş sayısı, kuyruk yoklama aralığı (0 = bu process iş çalıştırmaz,
+# `flask run-jobs` ile ayrı worker), ilk yeniden deneme beklemesi ve biten işlerin saklanma süresi
+app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))
+app.config['JOB_POLL_INTERVAL'] = float(os.getenv('JOB_POLL_INTERVAL', 1))  # saniye
+app.config['JOB_RETRY_DELAY'] = float(os.getenv('JOB_RETRY_DELAY', 10))  # saniye, her denemede iki katı
+app.config['JOB_STALE_SECONDS'] = int(os.getenv('JOB_STALE_SECONDS', 120))  # heartbeat gelmezse iş yarıda kalmış sayılır
+app.config['JOB_RETENTION_DAYS'] = int(os.getenv('JOB_RETENTION_DAYS', 7))
+app.config['JOB_FILES_DIR'] = os.getenv('JOB_FILES_DIR', os.path.join(app.instance_path, 'jobs'))  # yüklemeler ve dışa aktarma dosyaları
+# Toplu silmelerde tek seferde silinecek sınav girişimi sayısı
+app.config['PURGE_CHUNK_SIZE'] = int(os.getenv('PURGE_CHUNK_SIZE', 500))
+# Toplu içe aktarmalarda tek INSERT ile yazılacak satır sayısı
+app.config['IMPORT_BATCH_SIZE'] = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+MAX_IMPORT_ERRORS = 100
+# Liste endpoint'lerinde keyset sayfalama (limit/cursor verilmezse tüm liste döner)
+app.config['DEFAULT_PAGE_SIZE'] = int(os.getenv('DEFAULT_PAGE_SIZE', 50))
+app.config['MAX_PAGE_SIZE'] = int(os.getenv('MAX_PAGE_SIZE', 500))
+# Dışa aktarmalarda veritabanından parça parça okunan satır sayısı
+app.config['EXPORT_CHUNK_SIZE'] = int(os.getenv('EXPORT_CHUNK_SIZE', 500))
+# Şifre hash'leme (CPU yoğun) için işlem havuzu boyutu
+app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+# Giriş (login) şifre doğrulaması: ayrı, sınırlı işlem havuzu. 0 = istek thread'inde doğrula
+app.config['LOGIN_VERIFY_WORKERS'] = int(os.getenv('LOGIN_VERIFY_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+app.config['LOGIN_QUEUE_DEPTH'] = int(os.getenv('LOGIN_QUEUE_DEPTH', 64))  # Bekleyen + çalışan doğrulama üst sınırı
+app.config['LOGIN_VERIFY_TIMEOUT'] = float(os.getenv('LOGIN_VERIFY_TIMEOUT', 10))  # saniye
 
-db = SQLAlchemy(app)
+class RoutingSession(FlaskSession):
+    # @read_replica ile işaretli isteklerde okuma sorguları replikaya gider;
+    # flush ve INSERT/UPDATE/DELETE her zaman primary'de kalır
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and has_request_context() and g.get('use_replica') and not self._flushing
+                and not getattr(clause, 'is_dml', False)):
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 jwt = JWTManager(app)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+CORS(app, resources={r"/api/*": {"origins": "*", "expose_headers": ["X-Next-Cursor", "X-Total-Count"]}})
+
+class OrjsonProvider(DefaultJSONProvider):
+    # jsonify / request.get_json orjson ile çalışır. Çıktı DefaultJSONProvider ile aynıdır:
+    # anahtarlar sıralı, datetime ve diğer tipler default() ile (HTTP tarihi vb.) çevrilir
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        options = self.options | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            options |= orjson.OPT_INDENT_2
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=options), mimetype=self.mimetype)
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+# SQL ölçümleri: X-SQL-* yanıt başlıkları ve N+1 eşiği (aynı sorgu şekli kaç kez tekrarlanırsa)
+app.config['SQL_DEBUG_HEADERS'] = os.getenv('SQL_DEBUG_HEADERS', '0') == '1'
+app.config['N_PLUS_ONE_THRESHOLD'] = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))
 
 # JWT error handlers
 @jwt.expired_token_loader
@@ -40,6 +181,185 @@ def invalid_token_callback(error):
 def unauthorized_callback(error):
     return jsonify({'error': f'Unauthorized: {error}'}), 401
 
+# Process içi önbellek: süre (TTL) dolan ya da en eski kullanılan (LRU) kayıt atılır
+_MISSING = object()
+
+class TTLCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self):
+        return len(self._data)
+
+# Replika yönlendirmesi: hata durumunda istek primary'de tekrarlanır ve replika bir süre devre dışı kalır
+replica_state = {'routed': 0, 'fallbacks': 0, 'down_until': 0.0}
+
+def replica_available():
+    return 'replica' in app.config.get('SQLALCHEMY_BINDS', {}) and time.time() >= replica_state['down_until']
+
+def read_replica(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not replica_available():
+            return f(*args, **kwargs)
+        
+        g.use_replica = True
+        replica_state['routed'] += 1
+        try:
+            return f(*args, **kwargs)
+        except OperationalError as e:
+            print(f"ERROR - Replika hatasi, primary kullaniliyor: {str(e)[:200]}")
+            db.session.rollback()
+            replica_state['fallbacks'] += 1
+            replica_state['down_until'] = time.time() + app.config['REPLICA_RETRY_SECONDS']
+            g.use_replica = False
+            return f(*args, **kwargs)
+        finally:
+            g.use_replica = False
+    decorated_function.read_replica = True
+    return decorated_function
+
+# Per-request SQL instrumentation: sorgu sayısı, süre ve tekrar eden sorgu şekilleri
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SQL_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+MAX_REPEATED_SHAPES = 5
+_IN_LIST_RE = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+
+sql_metrics = {}
+sql_metrics_lock = threading.Lock()
+
+def statement_shape(statement):
+    # IN (?, ?, ?) listeleri uzunluktan bağımsız aynı şekle indirgenir
+    return ' '.join(_IN_LIST_RE.sub('(?)', statement).split())
+
+@app.before_request
+def reset_sql_counters():
+    # g, dışarıda açık bir app context varsa (CLI, testler) istekler arasında paylaşılır
+    g.sql_statement_count = 0
+    g.sql_shapes = Counter()
+    g.sql_time = 0.0
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_statement_count = g.get('sql_statement_count', 0) + 1
+        shapes = g.setdefault('sql_shapes', Counter())
+        shapes[statement_shape(statement)] += 1
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and conn.info.get('query_start_time'):
+        g.sql_time = g.get('sql_time', 0.0) + time.perf_counter() - conn.info['query_start_time'].pop()
+
+def _histogram_label(value, buckets):
+    for bucket in buckets:
+        if value <= bucket:
+            return f'<={bucket}'
+    return f'>{buckets[-1]}'
+
+def _new_route_metrics():
+    return {
+        'requests': 0,
+        'queries_total': 0,
+        'db_time_ms_total': 0.0,
+        'max_queries': 0,
+        'max_db_time_ms': 0.0,
+        'n_plus_one_requests': 0,
+        'query_count_histogram': {_histogram_label(b, SQL_COUNT_BUCKETS): 0 for b in SQL_COUNT_BUCKETS + (SQL_COUNT_BUCKETS[-1] + 1,)},
+        'db_time_ms_histogram': {_histogram_label(b, SQL_TIME_BUCKETS_MS): 0 for b in SQL_TIME_BUCKETS_MS + (SQL_TIME_BUCKETS_MS[-1] + 1,)},
+        'repeated_statements': {}
+    }
+
+@app.after_request
+def record_sql_metrics(response):
+    if request.url_rule is None:
+        return response
+    
+    count = g.get('sql_statement_count', 0)
+    db_time_ms = g.get('sql_time', 0.0) * 1000
+    threshold = app.config['N_PLUS_ONE_THRESHOLD']
+    repeated = {shape: n for shape, n in g.get('sql_shapes', {}).items() if n >= threshold}
+    route = f'{request.method} {request.url_rule.rule}'
+    
+    with sql_metrics_lock:
+        metrics = sql_metrics.setdefault(route, _new_route_metrics())
+        metrics['requests'] += 1
+        metrics['queries_total'] += count
+        metrics['db_time_ms_total'] += db_time_ms
+        metrics['max_queries'] = max(metrics['max_queries'], count)
+        metrics['max_db_time_ms'] = max(metrics['max_db_time_ms'], db_time_ms)
+        metrics['query_count_histogram'][_histogram_label(count, SQL_COUNT_BUCKETS)] += 1
+        metrics['db_time_ms_histogram'][_histogram_label(db_time_ms, SQL_TIME_BUCKETS_MS)] += 1
+        if repeated:
+            metrics['n_plus_one_requests'] += 1
+            shapes = metrics['repeated_statements']
+            for shape, n in repeated.items():
+                shapes[shape] = max(shapes.get(shape, 0), n)
+            # En çok tekrar edenler tutulur
+            for shape in sorted(shapes, key=shapes.get)[:-MAX_REPEATED_SHAPES]:
+                del shapes[shape]
+    
+    if repeated:
+        worst_shape, worst_count = max(repeated.items(), key=lambda item: item[1])
+        print(f"WARNING - Olasi N+1: {route} ayni sorguyu {worst_count} kez calistirdi: {worst_shape[:160]}")
+    
+    if app.config['SQL_DEBUG_HEADERS']:
+        response.headers['X-SQL-Queries'] = str(count)
+        response.headers['X-SQL-Time-ms'] = f'{db_time_ms:.2f}'
+        if repeated:
+            response.headers['X-SQL-Repeated'] = str(max(repeated.values()))
+    return response
+
+def sql_metrics_snapshot():
+    with sql_metrics_lock:
+        snapshot = {}
+        for route, metrics in sql_metrics.items():
+            requests = metrics['requests']
+            snapshot[route] = dict(
+                metrics,
+                query_count_histogram=dict(metrics['query_count_histogram']),
+                db_time_ms_histogram=dict(metrics['db_time_ms_histogram']),
+                repeated_statements=dict(metrics['repeated_statements']),
+                avg_queries=round(metrics['queries_total'] / requests, 2) if requests else 0,
+                avg_db_time_ms=round(metrics['db_time_ms_total'] / requests, 3) if requests else 0,
+                db_time_ms_total=round(metrics['db_time_ms_total'], 3),
+                max_db_time_ms=round(metrics['max_db_time_ms'], 3)
+            )
+        return snapshot
+
 # Models
 class User(db.Model):
     __tablename__ = 'users'
@@ -55,6 +375,8 @@ class User(db.Model):
     instructor_courses = db.relationship('Course', backref='instructor', lazy=True, foreign_keys='Course.instructor_id')
     enrollments = db.relationship('Enrollment', backref='student', lazy=True)
     exam_attempts = db.relationship('ExamAttempt', backref='student', lazy=True)
+    
+    __table_args__ = (db.Index('ix_users_role', 'role'),)
 
 class Course(db.Model):
     __tablename__ = 'courses'
@@ -67,6 +389,8 @@ class Course(db.Model):
     # Relationships
     enrollments = db.relationship('Enrollment', backref='course', lazy=True, cascade='all, delete-orphan')
     tests = db.relationship('Test', backref='course', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (db.Index('ix_courses_instructor_id', 'instructor_id'),)
 
 class Enrollment(db.Model):
     __tablename__ = 'enrollments'
@@ -75,7 +399,11 @@ class Enrollment(db.Model):
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
     enrolled_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('student_id', 'course_id', name='unique_enrollment'),)
+    # unique_enrollment öğrenci sorgularını karşılar; ders sorguları için ters sıralı indeks
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'course_id', name='unique_enrollment'),
+        db.Index('ix_enrollments_course_student', 'course_id', 'student_id'),
+    )
 
 class Test(db.Model):
     __tablename__ = 'tests'
@@ -92,6 +420,8 @@ class Test(db.Model):
     # Relationships
     questions = db.relationship('Question', backref='test', lazy=True, cascade='all, delete-orphan')
     exam_attempts = db.relationship('ExamAttempt', backref='test', lazy=True)
+    
+    __table_args__ = (db.Index('ix_tests_course_name', 'course_id', 'name'),)
 
 class Question(db.Model):
     __tablename__ = 'questions'
@@ -105,6 +435,8 @@ class Question(db.Model):
     correct_answer = db.Column(db.String(1), nullable=False)  # A, B, C, or D
     points = db.Column(db.Float, default=1.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_questions_test_id', 'test_id'),)
 
 class ExamAttempt(db.Model):
     __tablename__ = 'exam_attempts'
@@ -117,7 +449,11 @@ class ExamAttempt(db.Model):
     max_score = db.Column(db.Float, nullable=True)
     answers = db.relationship('Answer', backref='exam_attempt', lazy=True, cascade='all, delete-orphan')
     
-    __table_args__ = (db.UniqueConstraint('student_id', 'test_id', name='unique_attempt'),)
+    # unique_attempt öğrenci sorgularını karşılar; test sonuçları ve özetler test_id ile filtreler
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'test_id', name='unique_attempt'),
+        db.Index('ix_exam_attempts_test_submitted', 'test_id', 'submitted_at'),
+    )
 
 class Answer(db.Model):
     __tablename__ = 'answers'
@@ -128,19 +464,2303 @@ class Answer(db.Model):
     is_correct = db.Column(db.Boolean, nullable=True)
     points_earned = db.Column(db.Float, default=0.0)
     
-    __table_args__ = (db.UniqueConstraint('exam_attempt_id', 'question_id', name='unique_answer'),)
+    # unique_answer exam_attempt_id sorgularını karşılar; soru silme question_id ile filtreler
+    __table_args__ = (
+        db.UniqueConstraint('exam_attempt_id', 'question_id', name='unique_answer'),
+        db.Index('ix_answers_question_id', 'question_id'),
+    )
+
+# Materialized gradebook: her (öğrenci, ders) için ağırlıklı final notu ve özetleri
+class CourseGrade(db.Model):
+    __tablename__ = 'course_grades'
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False, index=True)
+    weighted_score = db.Column(db.Float, nullable=False, default=0.0)  # sum(percentage * weight / 100)
+    total_weight = db.Column(db.Float, nullable=False, default=0.0)
+    final_grade = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('student_id', 'course_id', name='unique_course_grade'),)
+
+class CourseStat(db.Model):
+    __tablename__ = 'course_stats'
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), primary_key=True)
+    student_count = db.Column(db.Integer, nullable=False, default=0)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)  # Notu hesaplanabilen öğrenci sayısı
+    grade_sum = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class StudentStat(db.Model):
+    __tablename__ = 'student_stats'
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)
+    grade_sum = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Grade engine: bir dersin öğrenci × test not matrisini tek sorguda hesaplar
+def iter_course_grades(course_id, student_ids=None, chunk_size=None):
+    # enrollments ⋈ users ⋈ tests ⟕ exam_attempts, öğrenci sırasına göre
+    # chunk_size verilirse satırlar sunucu tarafı cursor ile parça parça okunur
+    query = db.session.query(
+        Enrollment.student_id, User.full_name, Test.id, Test.name, Test.weight,
+        ExamAttempt.score, ExamAttempt.max_score
+    ).join(
+        User, User.id == Enrollment.student_id
+    ).outerjoin(
+        Test, Test.course_id == Enrollment.course_id
+    ).outerjoin(
+        ExamAttempt, db.and_(ExamAttempt.test_id == Test.id, ExamAttempt.student_id == Enrollment.student_id)
+    ).filter(
+        Enrollment.course_id == course_id
+    ).order_by(Enrollment.id, Test.id)
+
+    if student_ids is not None:
+        query = query.filter(Enrollment.student_id.in_(student_ids))
+    if chunk_size:
+        query = query.yield_per(chunk_size)
+
+    current = None
+    for student_id, full_name, test_id, test_name, weight, score, max_score in query:
+        if current is None or current['student_id'] != student_id:
+            if current is not None:
+                yield _finish_grade_row(current)
+            current = {
+                'student_id': student_id,
+                'student_name': full_name,
+                'grades': {},
+                'weighted_score': 0,
+                'total_weight': 0
+            }
+
+        if test_id is None or score is None:
+            continue
+
+        percentage = (score / max_score * 100) if max_score else 0
+        current['grades'][test_name] = {
+            'score': score,
+            'max_score': max_score,
+            'percentage': percentage,
+            'weight': weight
+        }
+        current['weighted_score'] += percentage * (weight / 100)
+        current['total_weight'] += weight
+
+    if current is not None:
+        yield _finish_grade_row(current)
+
+def _finish_grade_row(row):
+    total_weight = row['total_weight']
+    row['final_grade'] = (row['weighted_score'] / total_weight * 100) if total_weight > 0 else None
+    return row
+
+def compute_course_grades(course_id, student_ids=None):
+    return list(iter_course_grades(course_id, student_ids))
+
+# Test bazında çalışan puan toplamları (sadece gönderilmiş sınavlar)
+class TestStat(db.Model):
+    __tablename__ = 'test_stats'
+    test_id = db.Column(db.Integer, db.ForeignKey('tests.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0.0)  # Standart sapma için
+    min_score = db.Column(db.Float, nullable=True)
+    max_score = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Test başına puan dağılımı: yüzde puanın en yakın tam sayısına göre sabit kovalar (0..100). Yalnızca dolu
+# kovalar satır olarak tutulur; teslimde ilgili kova atomik olarak artırılır
+class TestScoreBucket(db.Model):
+    __tablename__ = 'test_score_buckets'
+    test_id = db.Column(db.Integer, db.ForeignKey('tests.id'), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+
+SCORE_BUCKETS = 101
+
+def score_bucket(score, max_score):
+    # En yakın tam sayıya yuvarlanır (tam kısım alınsaydı medyan/çeyrekler sistematik olarak aşağı kayardı);
+    # kayan nokta hatası (ör. 56.49999999) sonucu değiştirmesin diye önce 6 basamağa yuvarlanır
+    if not max_score:
+        return 0
+    return min(max(round(round((score or 0) / max_score * 100, 6)), 0), SCORE_BUCKETS - 1)
+
+# Test score aggregates
+def record_test_score(test_id, score, max_score):
+    # Tek atomik UPDATE; eşzamanlı gönderimler birbirinin toplamını ezmez
+    updated = db.session.execute(
+        db.update(TestStat).where(TestStat.test_id == test_id).values(
+            attempt_count=TestStat.attempt_count + 1,
+            score_sum=TestStat.score_sum + score,
+            score_sq_sum=TestStat.score_sq_sum + score * score,
+            min_score=db.case(
+                (db.or_(TestStat.min_score.is_(None), TestStat.min_score > score), score),
+                else_=TestStat.min_score
+            ),
+            max_score=db.case(
+                (db.or_(TestStat.max_score.is_(None), TestStat.max_score < score), score),
+                else_=TestStat.max_score
+            ),
+            updated_at=datetime.utcnow()
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    
+    # Özet satırı olmayan eski testler ham veriden oluşturulur (puan kovaları dahil)
+    if not updated:
+        db.session.flush()
+        rebuild_test_stats([test_id])
+        return
+    
+    bucket = score_bucket(score, max_score)
+    bucket_filter = db.and_(TestScoreBucket.test_id == test_id, TestScoreBucket.bucket == bucket)
+    increment = db.update(TestScoreBucket).where(bucket_filter).values(attempt_count=TestScoreBucket.attempt_count + 1)
+    if db.session.execute(increment).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(TestScoreBucket), [{'test_id': test_id, 'bucket': bucket, 'attempt_count': 1}])
+    except IntegrityError:
+        # Eşzamanlı teslim kovayı önce oluşturdu
+        db.session.execute(increment)
+
+def remove_test_scores(scores):
+    # record_test_score'un tersi: silinen girişimlerin (test, puan, en yüksek puan) değerleri özetlerden
+    # ve kovalardan düşülür. min/max yalnızca silinen puan sınır değerse kalan girişimlerden okunur
+    totals = {}
+    buckets = Counter()
+    for test_id, score, max_score in scores:
+        count, score_sum, score_sq_sum, low, high = totals.get(test_id, (0, 0.0, 0.0, score, score))
+        totals[test_id] = (count + 1, score_sum + score, score_sq_sum + score * score, min(low, score), max(high, score))
+        buckets[(test_id, score_bucket(score, max_score))] += 1
+    if not totals:
+        return
+    
+    # Satır kilidi eşzamanlı teslimlerin atomik UPDATE'lerini bu düzeltmeden sonraya bırakır
+    stats = {stat.test_id: stat for stat in TestStat.query.filter(
+        TestStat.test_id.in_(list(totals))).with_for_update().populate_existing()}
+    for test_id, (count, score_sum, score_sq_sum, low, high) in totals.items():
+        stat = stats.get(test_id)
+        if stat is None:
+            continue
+        stat.attempt_count -= count
+        if stat.attempt_count <= 0:
+            stat.attempt_count, stat.score_sum, stat.score_sq_sum = 0, 0.0, 0.0
+            stat.min_score = stat.max_score = None
+            continue
+        stat.score_sum -= score_sum
+        stat.score_sq_sum -= score_sq_sum
+        if (stat.min_score is not None and low <= stat.min_score) or (stat.max_score is not None and high >= stat.max_score):
+            stat.min_score, stat.max_score = db.session.query(
+                db.func.min(ExamAttempt.score), db.func.max(ExamAttempt.score)
+            ).filter(
+                ExamAttempt.test_id == test_id,
+                ExamAttempt.submitted_at.isnot(None),
+                ExamAttempt.score.isnot(None)
+            ).one()
+    
+    for (test_id, bucket), count in buckets.items():
+        if test_id in stats:
+            db.session.execute(db.update(TestScoreBucket).where(
+                TestScoreBucket.test_id == test_id, TestScoreBucket.bucket == bucket
+            ).values(attempt_count=TestScoreBucket.attempt_count - count))
+    db.session.execute(db.delete(TestScoreBucket).where(
+        TestScoreBucket.test_id.in_(list(stats)), TestScoreBucket.attempt_count <= 0))
+    
+    # Özet satırı olmayan eski testler kalan veriden oluşturulur
+    missing = [test_id for test_id in totals if test_id not in stats]
+    if missing:
+        db.session.flush()
+        rebuild_test_stats(missing)
+
+def rebuild_test_stats(test_ids=None):
+    # Ham exam_attempts kayıtlarından tek GROUP BY sorgusuyla yeniden hesaplar
+    query = db.session.query(
+        ExamAttempt.test_id,
+        db.func.count(ExamAttempt.id),
+        db.func.sum(ExamAttempt.score),
+        db.func.sum(ExamAttempt.score * ExamAttempt.score),
+        db.func.min(ExamAttempt.score),
+        db.func.max(ExamAttempt.score)
+    ).filter(
+        ExamAttempt.submitted_at.isnot(None),
+        ExamAttempt.score.isnot(None)
+    ).group_by(ExamAttempt.test_id)
+    stats_query = TestStat.query
+    
+    rebuild_all = test_ids is None
+    if rebuild_all:
+        test_ids = [test_id for (test_id,) in db.session.query(Test.id).all()]
+    else:
+        test_ids = list(test_ids)
+        query = query.filter(ExamAttempt.test_id.in_(test_ids))
+        stats_query = stats_query.filter(TestStat.test_id.in_(test_ids))
+    
+    totals = {row[0]: row[1:] for row in query.all()}
+    stats = {stat.test_id: stat for stat in stats_query.all()}
+    
+    for test_id in test_ids:
+        stat = stats.get(test_id)
+        if not stat:
+            stat = TestStat(test_id=test_id)
+            db.session.add(stat)
+        count, score_sum, score_sq_sum, min_score, max_score = totals.get(test_id, (0, 0, 0, None, None))
+        stat.attempt_count = count
+        stat.score_sum = score_sum or 0.0
+        stat.score_sq_sum = score_sq_sum or 0.0
+        stat.min_score = min_score
+        stat.max_score = max_score
+    
+    rebuild_score_buckets(None if rebuild_all else test_ids)
+
+def rebuild_score_buckets(test_ids=None):
+    # Farklı (puan, en yüksek puan) çiftleri gruplanır; kova Python'da score_bucket ile hesaplanır
+    query = db.session.query(
+        ExamAttempt.test_id, ExamAttempt.score, ExamAttempt.max_score, db.func.count(ExamAttempt.id)
+    ).filter(
+        ExamAttempt.submitted_at.isnot(None),
+        ExamAttempt.score.isnot(None)
+    ).group_by(ExamAttempt.test_id, ExamAttempt.score, ExamAttempt.max_score)
+    delete_query = TestScoreBucket.query
+    if test_ids is not None:
+        query = query.filter(ExamAttempt.test_id.in_(test_ids))
+        delete_query = delete_query.filter(TestScoreBucket.test_id.in_(test_ids))
+    
+    counts = Counter()
+    for test_id, score, max_score, count in query:
+        counts[(test_id, score_bucket(score, max_score))] += count
+    delete_query.delete(synchronize_session=False)
+    if counts:
+        db.session.execute(db.insert(TestScoreBucket), [
+            {'test_id': test_id, 'bucket': bucket, 'attempt_count': count} for (test_id, bucket), count in counts.items()])
+
+def test_score_summary(test_id):
+    stat = db.session.get(TestStat, test_id)
+    if not stat or not stat.attempt_count:
+        return {'count': 0, 'average': 0, 'std_dev': 0, 'lowest': None, 'highest': None}
+    
+    average = stat.score_sum / stat.attempt_count
+    variance = max(stat.score_sq_sum / stat.attempt_count - average * average, 0)
+    return {
+        'count': stat.attempt_count,
+        'average': average,
+        'std_dev': variance ** 0.5,
+        'lowest': stat.min_score,
+        'highest': stat.max_score
+    }
+
+class ScoreDistribution:
+    # Kova sayılarından önek toplamları: yüzdelik sıra O(1), çeyrekler O(log kova), histogram sabit
+    def __init__(self, rows):
+        self.counts = [0] * SCORE_BUCKETS
+        for bucket, count in rows:
+            self.counts[bucket] = count
+        self.cumulative = list(accumulate(self.counts))
+        self.total = self.cumulative[-1]
+    
+    def percentile_rank(self, score, max_score):
+        # Daha düşük puanlılar + eşit puanlıların yarısı (yüzde); puanın kendisi dağılıma dahildir
+        if not self.total:
+            return None
+        bucket = score_bucket(score, max_score)
+        below = self.cumulative[bucket] - self.counts[bucket]
+        return round((below + self.counts[bucket] / 2) / self.total * 100, 2)
+    
+    def value_at(self, rank):
+        # Sıralı dağılımda rank'inci (0'dan) yüzde puanın kovası
+        return bisect_right(self.cumulative, rank)
+    
+    def quantile(self, q):
+        # Komşu sıralar arasında doğrusal enterpolasyon (numpy 'linear' ile aynı)
+        if not self.total:
+            return None
+        position = q * (self.total - 1)
+        lower = int(position)
+        low = self.value_at(lower)
+        high = self.value_at(min(lower + 1, self.total - 1))
+        return round(low + (high - low) * (position - lower), 2)
+    
+    def histogram(self, width):
+        # [from, to) aralıkları; 100 son aralığa dahil edilir
+        bins = [{'from': start, 'to': min(start + width, 100), 'count': 0} for start in range(0, 100, width)]
+        for bucket, count in enumerate(self.counts):
+            if count:
+                bins[min(bucket // width, len(bins) - 1)]['count'] += count
+        return bins
+    
+    def summary(self):
+        return {
+            'count': self.total,
+            'median': self.quantile(0.5),
+            'q1': self.quantile(0.25),
+            'q3': self.quantile(0.75),
+            'histogram': self.histogram(app.config['SCORE_HISTOGRAM_WIDTH'])
+        }
+
+def score_distribution(test_id):
+    # En fazla SCORE_BUCKETS satır okunur; girişim sayısından bağımsız
+    return ScoreDistribution(db.session.query(TestScoreBucket.bucket, TestScoreBucket.attempt_count).filter(
+        TestScoreBucket.test_id == test_id).all())
+
+# Madde analizi önbelleği: test id -> (teslim özeti, sonuç). Özet (testin veri sürümü, girişim sayısı,
+# puan toplamı) her teslimde ve soru ekleme/silmede değiştiğinden o zamana kadar cevaplar yeniden taranmaz.
+# Sürüm veritabanında tutulduğu için başka bir worker'daki soru değişikliği de önbelleği eskitir
+item_analysis_cache = TTLCache(app.config['ITEM_ANALYSIS_CACHE_SIZE'], app.config['ITEM_ANALYSIS_CACHE_TTL'])
+item_analysis_stats = {'runs': 0, 'cache_hits': 0, 'answers_scanned': 0, 'last_run_ms': 0.0}
+
+def submission_marker(test_id):
+    row = db.session.query(TestStat.attempt_count, TestStat.score_sum).filter(TestStat.test_id == test_id).first()
+    return (data_versions('test', [test_id])[test_id],) + (tuple(row) if row else (None, None))
+
+def test_item_analysis(test_id):
+    marker = submission_marker(test_id)
+    cached = item_analysis_cache.get(test_id)
+    if cached is not _MISSING and cached[0] == marker:
+        item_analysis_stats['cache_hits'] += 1
+        return cached[1]
+    
+    started = time.perf_counter()
+    questions = db.session.query(
+        Question.id, Question.question_text, Question.correct_answer, Question.points
+    ).filter(Question.test_id == test_id).order_by(Question.id).all()
+    attempts = db.session.query(ExamAttempt.id, ExamAttempt.score, ExamAttempt.max_score).filter(
+        ExamAttempt.test_id == test_id, ExamAttempt.submitted_at.isnot(None)).all()
+    analysis = item_analysis.ItemAnalysis(
+        [question.id for question in questions], [attempt.id for attempt in attempts],
+        [attempt.score for attempt in attempts], [attempt.max_score for attempt in attempts])
+    
+    # Cevaplar tamsayı sütunları olarak parça parça okunur (ORM nesnesi yok); yalnızca teslim edilmiş
+    # girişimler, seçenek 0-3 = A-D, 4 = boş
+    statement = db.select(
+        Answer.exam_attempt_id, Answer.question_id,
+        db.case({'A': 0, 'B': 1, 'C': 2, 'D': 3}, value=Answer.selected_answer, else_=4),
+        db.case((Answer.is_correct == db.true(), 1), else_=0)
+    ).join(ExamAttempt, ExamAttempt.id == Answer.exam_attempt_id).where(
+        ExamAttempt.test_id == test_id, ExamAttempt.submitted_at.isnot(None)
+    ).execution_options(yield_per=app.config['ITEM_ANALYSIS_CHUNK_SIZE'])
+    scanned = 0
+    for rows in db.session.execute(statement).partitions():
+        analysis.add_chunk(rows)
+        scanned += len(rows)
+    
+    result = {
+        'test_id': test_id,
+        'submitted_count': len(attempts),
+        'answer_count': scanned,
+        'group_fraction': item_analysis.GROUP_FRACTION,
+        'computed_at': datetime.utcnow().isoformat(),
+        'questions': [dict(
+            stats, question_text=question.question_text, correct_answer=question.correct_answer, points=question.points
+        ) for question, stats in zip(questions, analysis.results())]
+    }
+    item_analysis_cache.set(test_id, (marker, result))
+    item_analysis_stats['runs'] += 1
+    item_analysis_stats['answers_scanned'] += scanned
+    item_analysis_stats['last_run_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+# Gradebook helpers
+def refresh_course_stat(course_id):
+    student_count = Enrollment.query.filter_by(course_id=course_id).count()
+    graded_count, grade_sum = db.session.query(
+        db.func.count(CourseGrade.id), db.func.sum(CourseGrade.final_grade)
+    ).filter(CourseGrade.course_id == course_id).one()
+
+    stat = db.session.get(CourseStat, course_id)
+    if not stat:
+        stat = CourseStat(course_id=course_id)
+        db.session.add(stat)
+    stat.student_count = student_count
+    stat.graded_count = graded_count
+    stat.grade_sum = grade_sum or 0.0
+
+def change_course_stat(course_id, student_delta=0, graded_delta=0, grade_delta=0.0):
+    # Tek atomik UPDATE (bkz. record_test_score); özet satırı olmayan ders baştan hesaplanır
+    if not (student_delta or graded_delta or grade_delta):
+        return
+    updated = db.session.execute(
+        db.update(CourseStat).where(CourseStat.course_id == course_id).values(
+            student_count=CourseStat.student_count + student_delta,
+            graded_count=CourseStat.graded_count + graded_delta,
+            grade_sum=CourseStat.grade_sum + grade_delta,
+            updated_at=datetime.utcnow()
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    if not updated:
+        db.session.flush()
+        refresh_course_stat(course_id)
+
+def refresh_student_stats(student_ids):
+    student_ids = list(student_ids)
+    if not student_ids:
+        return
+
+    rows = db.session.query(
+        CourseGrade.student_id, db.func.count(CourseGrade.id), db.func.sum(CourseGrade.final_grade)
+    ).filter(CourseGrade.student_id.in_(student_ids)).group_by(CourseGrade.student_id).all()
+    totals = {student_id: (count, total) for student_id, count, total in rows}
+
+    stats = {s.student_id: s for s in StudentStat.query.filter(StudentStat.student_id.in_(student_ids)).all()}
+    for student_id in student_ids:
+        stat = stats.get(student_id)
+        if student_id not in totals:
+            if stat:
+                db.session.delete(stat)
+            continue
+        if not stat:
+            stat = StudentStat(student_id=student_id)
+            db.session.add(stat)
+        stat.graded_count, stat.grade_sum = totals[student_id]
+
+def refresh_gradebook(course_id, student_ids=None, enrolled=0):
+    # Verilen öğrencilerin (None ise dersteki herkesin) final notlarını yeniden hesaplar,
+    # ardından ders ve öğrenci özetlerini günceller. Commit çağırana aittir.
+    # Öğrenci listesi verilirse ders özeti eski ve yeni notların farkıyla güncellenir (dersin tüm
+    # notları taranmaz); enrolled bu işlemde derse eklenen kayıt sayısıdır
+    existing_query = CourseGrade.query.filter_by(course_id=course_id)
+    if student_ids is not None:
+        # Satırlar kilitlenir: eşzamanlı güncellemeler farkı aynı eski nottan hesaplamaz
+        existing_query = existing_query.filter(CourseGrade.student_id.in_(student_ids)).with_for_update().populate_existing()
+    existing = {g.student_id: g for g in existing_query.all()}
+
+    grades = {
+        row['student_id']: (row['weighted_score'], row['total_weight'])
+        for row in iter_course_grades(course_id, student_ids)
+    }
+
+    graded_delta = 0
+    grade_delta = 0.0
+    for student_id, (weighted_score, total_weight) in grades.items():
+        if total_weight <= 0:
+            continue
+        row = existing.get(student_id)
+        if not row:
+            row = CourseGrade(student_id=student_id, course_id=course_id)
+            db.session.add(row)
+            graded_delta += 1
+        else:
+            grade_delta -= row.final_grade
+        row.weighted_score = weighted_score
+        row.total_weight = total_weight
+        row.final_grade = weighted_score / total_weight * 100
+        grade_delta += row.final_grade
+
+    for student_id, row in existing.items():
+        if grades.get(student_id, (0, 0))[1] <= 0:
+            graded_delta -= 1
+            grade_delta -= row.final_grade
+            db.session.delete(row)
+
+    db.session.flush()
+    if student_ids is None:
+        refresh_course_stat(course_id)
+    else:
+        change_course_stat(course_id, enrolled, graded_delta, grade_delta)
+    refresh_student_stats(set(grades) | set(existing))
+
+# Öğrenci panelleri için veri sürümleri (ETag): öğrenci ve ders başına artan sayaçlar.
+# Kayıt / girişim değişikliği öğrencinin, test / soru / ders değişikliği dersin sürümünü artırır.
+# Soru havuzu değişikliği ayrıca testin sürümünü artırır (worker'lar arası önbellek geçersizleme).
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+    scope = db.Column(db.String(20), primary_key=True)  # student, course, test
+    key_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+etag_stats = {}
+
+def bump_versions(scope, ids):
+    # Değişikliği yapan işlemle aynı transaction'da artırılır
+    ids = set(ids)
+    if not ids:
+        return
+    version_filter = db.and_(DataVersion.scope == scope, DataVersion.key_id.in_(ids))
+    result = db.session.execute(db.update(DataVersion).where(version_filter).values(version=DataVersion.version + 1))
+    if result.rowcount == len(ids):
+        return
+    
+    existing = {key_id for (key_id,) in db.session.query(DataVersion.key_id).filter(version_filter)}
+    missing = ids - existing
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(DataVersion), [{'scope': scope, 'key_id': key_id, 'version': 1} for key_id in missing])
+    except IntegrityError:
+        # Eşzamanlı istek satırı önce oluşturdu
+        db.session.execute(db.update(DataVersion).where(
+            DataVersion.scope == scope, DataVersion.key_id.in_(missing)).values(version=DataVersion.version + 1))
+
+def data_versions(scope, ids):
+    # {id: sürüm}; hiç değişmemiş (satırı olmayan) kayıtların sürümü 0
+    versions = dict.fromkeys(ids, 0)
+    if versions:
+        versions.update(db.session.query(DataVersion.key_id, DataVersion.version).filter(
+            DataVersion.scope == scope, DataVersion.key_id.in_(list(versions))))
+    return versions
+
+def dashboard_version(student_id, endpoint=None):
+    # Öğrencinin ve kayıtlı olduğu derslerin sürümleri tek sorguda okunur
+    endpoint = endpoint or request.endpoint
+    enrolled_courses = db.session.query(Enrollment.course_id).filter(Enrollment.student_id == student_id)
+    rows = db.session.query(DataVersion.scope, DataVersion.key_id, DataVersion.version).filter(db.or_(
+        db.and_(DataVersion.scope == 'student', DataVersion.key_id == student_id),
+        db.and_(DataVersion.scope == 'course', DataVersion.key_id.in_(enrolled_courses))
+    )).order_by(DataVersion.scope, DataVersion.key_id).all()
+    return hashlib.sha1(f'{endpoint}:{student_id}:{rows}'.encode()).hexdigest()[:20]
+
+def matching_etag(endpoint, tags, version):
+    # ETag "<sürüm>.<geçerlilik sonu>": zamana bağlı durumlar (upcoming -> available) sürüm
+    # değişmeden de eskir, bu yüzden geçerlilik süresi dolan ETag eşleşmez
+    stats = etag_stats.setdefault(endpoint, {'requests': 0, 'not_modified': 0})
+    stats['requests'] += 1
+    for tag in tags:
+        tag_version, separator, valid_until = tag.partition('.')
+        if tag_version != version:
+            continue
+        try:
+            fresh = not separator or time.time() < int(valid_until)
+        except ValueError:
+            # İstemciden gelen bozuk geçerlilik sonu eşleşmez sayılır
+            continue
+        if fresh:
+            stats['not_modified'] += 1
+            return tag
+    return None
+
+def etag_value(version, valid_until=None):
+    return f'{version}.{int(valid_until.timestamp())}' if valid_until else version
+
+def etag_not_modified(version):
+    tag = matching_etag(request.endpoint, request.if_none_match.as_set(), version)
+    if tag is None:
+        return None
+    response = app.response_class(status=304)
+    response.set_etag(tag)
+    return response
+
+def etag_response(payload, version, valid_until=None):
+    response = jsonify(payload)
+    response.set_etag(etag_value(version, valid_until))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response, 200
+
+def etag_stats_snapshot():
+    return {endpoint: dict(stats, hit_ratio=round(stats['not_modified'] / stats['requests'], 3) if stats['requests'] else 0)
+            for endpoint, stats in etag_stats.items()}
+
+# Kolon projeksiyonlu serializer'lar: sorgu yalnızca yanıttaki kolonları seçer ve satır tuple'ları
+# ORM nesnesi oluşturulmadan dict'e çevrilir. Alan: (anahtar, kolon) veya (anahtar, kolon, dönüştürücü);
+# dönüştürücü None olmayan değerlere uygulanır
+class RowSerializer:
+    def __init__(self, *fields):
+        self.keys = tuple(field[0] for field in fields)
+        self.columns = tuple(field[1] for field in fields)
+        self.converters = tuple((index, field[2]) for index, field in enumerate(fields) if len(field) > 2)
+    
+    def query(self):
+        return db.session.query(*self.columns)
+    
+    def dump(self, row):
+        if self.converters:
+            row = list(row)
+            for index, convert in self.converters:
+                if row[index] is not None:
+                    row[index] = convert(row[index])
+        return dict(zip(self.keys, row))
+    
+    def dump_all(self, rows):
+        if not self.converters:
+            keys = self.keys
+            return [dict(zip(keys, row)) for row in rows]
+        return [self.dump(row) for row in rows]
+
+# İlişki sayıları satır başına ayrı sorgu yerine ilişkili alt sorgu olarak seçilir
+course_student_count = db.select(db.func.count(Enrollment.id)).where(
+    Enrollment.course_id == Course.id).correlate(Course).scalar_subquery().label('student_count')
+course_test_count = db.select(db.func.count(Test.id)).where(
+    Test.course_id == Course.id).correlate(Course).scalar_subquery().label('test_count')
+test_pool_count = db.select(db.func.count(Question.id)).where(
+    Question.test_id == Test.id).correlate(Test).scalar_subquery().label('question_pool_count')
+
+user_serializer = RowSerializer(
+    ('id', User.id), ('username', User.username), ('email', User.email), ('role', User.role),
+    ('full_name', User.full_name))
+student_serializer = RowSerializer(
+    ('id', User.id), ('username', User.username), ('full_name', User.full_name), ('email', User.email))
+# Ders listeleri eğitmen adı için User'a outerjoin ister
+admin_course_serializer = RowSerializer(
+    ('id', Course.id), ('code', Course.code), ('name', Course.name), ('instructor_id', Course.instructor_id),
+    ('instructor_name', User.full_name), ('student_count', course_student_count))
+instructor_course_serializer = RowSerializer(
+    ('id', Course.id), ('code', Course.code), ('name', Course.name), ('student_count', course_student_count),
+    ('test_count', course_test_count))
+student_course_serializer = RowSerializer(
+    ('id', Course.id), ('code', Course.code), ('name', Course.name), ('instructor_name', User.full_name),
+    ('test_count', course_test_count))
+# Test listesi ders adı için Course'a join ister
+test_serializer = RowSerializer(
+    ('id', Test.id), ('course_id', Test.course_id), ('course_name', Course.name), ('name', Test.name),
+    ('weight', Test.weight), ('start_time', Test.start_time, datetime.isoformat),
+    ('end_time', Test.end_time, datetime.isoformat), ('duration_minutes', Test.duration_minutes),
+    ('question_pool_count', test_pool_count), ('question_count', Test.question_count))
+question_serializer = RowSerializer(
+    ('id', Question.id), ('test_id', Question.test_id), ('question_text', Question.question_text),
+    ('option_a', Question.option_a), ('option_b', Question.option_b), ('option_c', Question.option_c),
+    ('option_d', Question.option_d), ('correct_answer', Question.correct_answer), ('points', Question.points))
+
+# Question pool cache: test id -> (test sürümü, öğrenciye gönderilecek soru payload'ları; cevap anahtarı hariç).
+# invalidate_question_pool yalnızca bu process'i temizler; diğer worker'lar testin veri sürümü
+# değiştiği için havuzu yeniden okur
+question_pool_cache = TTLCache(app.config['QUESTION_POOL_CACHE_SIZE'], app.config['QUESTION_POOL_CACHE_TTL'])
+
+def get_question_pool(test_id, version=None):
+    # Sürüm sorulardan önce okunur: arada eklenen soru en fazla bir gereksiz yeniden okumaya yol açar
+    if version is None:
+        version = data_versions('test', [test_id])[test_id]
+    cached = question_pool_cache.get(test_id)
+    if cached is not _MISSING and cached[0] == version:
+        return cached[1]
+    
+    rows = db.session.query(
+        Question.id, Question.question_text, Question.option_a, Question.option_b,
+        Question.option_c, Question.option_d, Question.points
+    ).filter(Question.test_id == test_id).order_by(Question.id).all()
+    pool = tuple({
+        'id': question_id,
+        'question_text': question_text,
+        'option_a': option_a,
+        'option_b': option_b,
+        'option_c': option_c,
+        'option_d': option_d,
+        'points': points
+    } for question_id, question_text, option_a, option_b, option_c, option_d, points in rows)
+    question_pool_cache.set(test_id, (version, pool))
+    return pool
+
+def invalidate_question_pool(test_id):
+    question_pool_cache.pop(test_id)
+    exam_payload_cache.pop(test_id)
+    item_analysis_cache.pop(test_id)
+
+# Exam warm-up: start_test'in ihtiyaç duyduğu her şey test başlamadan hazırlanır.
+# Sorular gönderilmeye hazır JSON byte'ları olarak tutulur; yanıt bunların birleştirilmesiyle oluşur.
+# Hazır yanıt testin veri sürümüyle saklanır; başka bir worker'daki soru değişikliğinden sonra yeniden hazırlanır.
+exam_payload_cache = TTLCache(app.config['EXAM_PAYLOAD_CACHE_SIZE'], app.config['EXAM_PAYLOAD_CACHE_TTL'])
+exam_warmup_stats = {'warmed': 0, 'built_on_demand': 0, 'runs': 0, 'last_run_at': None, 'last_run_ms': 0.0}
+
+def _json_bytes(value):
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+def build_exam_payload(test_id, version=None):
+    if version is None:
+        version = data_versions('test', [test_id])[test_id]
+    test = db.session.query(
+        Test.id, Test.course_id, Test.name, Test.start_time, Test.end_time, Test.duration_minutes, Test.question_count
+    ).filter(Test.id == test_id).first()
+    if not test:
+        return None
+    
+    students = frozenset(student_id for (student_id,) in db.session.query(Enrollment.student_id).filter(
+        Enrollment.course_id == test.course_id))
+    pool = get_question_pool(test_id, version)
+    payload = {
+        'version': version,
+        'course_id': test.course_id,
+        'start_time': test.start_time,
+        'end_time': test.end_time,
+        'question_count': test.question_count,
+        'students': students,
+        'questions': tuple(_json_bytes(question) for question in pool),
+        'points': tuple(question['points'] for question in pool),
+        # Öğrenciden bağımsız alanlar; kapanış parantezi yanıt oluşturulurken eklenir
+        'header': _json_bytes({
+            'test_id': test.id,
+            'test_name': test.name,
+            'duration_minutes': test.duration_minutes,
+            'end_time': test.end_time.isoformat()
+        })[:-1]
+    }
+    exam_payload_cache.set(test_id, payload)
+    return payload
+
+def get_exam_payload(test_id):
+    version = data_versions('test', [test_id])[test_id]
+    payload = exam_payload_cache.get(test_id)
+    if payload is _MISSING or payload['version'] != version:
+        payload = build_exam_payload(test_id, version)
+        if payload is not None:
+            exam_warmup_stats['built_on_demand'] += 1
+    return payload
+
+def render_exam_start(payload, attempt_id, started_at):
+    # Rastgele soru seçimi indekslerle yapılır, sorular tekrar serileştirilmez
+    selected = random.sample(range(len(payload['questions'])), payload['question_count'])
+    max_score = sum(payload['points'][index] for index in selected)
+    return b''.join((
+        payload['header'],
+        b',"attempt_id":', str(attempt_id).encode(),
+        b',"started_at":', _json_bytes(started_at.isoformat()),
+        b',"max_score":', _json_bytes(max_score),
+        b',"questions":[', b','.join(payload['questions'][index] for index in selected), b']}'
+    ))
+
+def warm_upcoming_exams():
+    # Yakında başlayacak veya devam eden, önbellekte olmayan (ya da sürümü eskimiş) testler hazırlanır
+    started = time.perf_counter()
+    now = datetime.now()
+    test_ids = [test_id for (test_id,) in db.session.query(Test.id).filter(
+        Test.start_time <= now + timedelta(seconds=app.config['EXAM_WARMUP_LEAD']),
+        Test.end_time >= now
+    ).order_by(Test.start_time)]
+    
+    versions = data_versions('test', test_ids)
+    warmed = 0
+    for test_id in test_ids:
+        payload = exam_payload_cache.get(test_id)
+        if payload is not _MISSING and payload['version'] == versions[test_id]:
+            continue
+        if build_exam_payload(test_id, versions[test_id]) is not None:
+            warmed += 1
+    
+    exam_warmup_stats['warmed'] += warmed
+    exam_warmup_stats['runs'] += 1
+    exam_warmup_stats['last_run_at'] = now.isoformat()
+    exam_warmup_stats['last_run_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    if warmed:
+        print(f"DEBUG - Sinav isitma: {warmed} test hazirlandi")
+    return warmed
+
+# Scoring helpers
+def normalize_answers(answers_data):
+    # {"12": "a", ...} -> {12: "A"}; geçersiz soru id'leri atlanır
+    selected = {}
+    for question_id, selected_answer in answers_data.items():
+        try:
+            selected[int(question_id)] = selected_answer.upper() if selected_answer else None
+        except (TypeError, ValueError, AttributeError):
+            continue
+    return selected
+
+def save_answer_batch(entries):
+    # entries: [(attempt_id, test_id, {question_id: cevap})]. Birden çok girişimin cevapları
+    # sabit sayıda sorguyla puanlanıp yazılır; değişmeyen cevaplar tekrar yazılmaz.
+    # {attempt_id: (puan, en yüksek puan)} ve yazılan satır sayısını döner
+    entries = [(attempt_id, test_id, answers) for attempt_id, test_id, answers in entries if answers]
+    if not entries:
+        return {}, 0
+    
+    # 1. Gerekli soruları tek IN sorgusuyla yükle
+    question_ids = {question_id for _, _, answers in entries for question_id in answers}
+    questions = {question_id: (test_id, correct_answer, points) for question_id, test_id, correct_answer, points in db.session.query(
+        Question.id, Question.test_id, Question.correct_answer, Question.points
+    ).filter(Question.id.in_(question_ids))}
+    
+    # 2. Mevcut cevapları tek sorguda yükle
+    existing = {(attempt_id, question_id): (answer_id, selected_answer) for attempt_id, question_id, answer_id, selected_answer in db.session.query(
+        Answer.exam_attempt_id, Answer.question_id, Answer.id, Answer.selected_answer
+    ).filter(
+        Answer.exam_attempt_id.in_({attempt_id for attempt_id, _, _ in entries}),
+        Answer.question_id.in_(question_ids)
+    )}
+    
+    scores = {}
+    inserts = []
+    updates = []
+    for attempt_id, test_id, answers in entries:
+        total_score = 0
+        max_score = 0
+        for question_id, selected_answer in answers.items():
+            question = questions.get(question_id)
+            if question is None or question[0] != test_id:
+                continue
+            _, correct_answer, points = question
+            is_correct = selected_answer == correct_answer.upper()
+            points_earned = points if is_correct else 0
+            max_score += points
+            total_score += points_earned
+            
+            row = {
+                'selected_answer': selected_answer,
+                'is_correct': is_correct,
+                'points_earned': points_earned
+            }
+            current = existing.get((attempt_id, question_id))
+            if current is None:
+                inserts.append(dict(row, exam_attempt_id=attempt_id, question_id=question_id))
+            elif current[1] != selected_answer:
+                updates.append(dict(row, id=current[0]))
+        scores[attempt_id] = (total_score, max_score)
+    
+    # 3. Toplu upsert: yeni cevaplar tek INSERT, değişenler tek UPDATE (executemany)
+    if inserts:
+        db.session.execute(db.insert(Answer), inserts)
+    if updates:
+        db.session.execute(db.update(Answer), updates)
+    
+    return scores, len(inserts) + len(updates)
+
+def attempt_score(attempt_id):
+    # Girişimin kayıtlı tüm cevaplarından puan ve en yüksek puan
+    total_score, max_score = db.session.query(
+        db.func.coalesce(db.func.sum(Answer.points_earned), 0),
+        db.func.coalesce(db.func.sum(Question.points), 0)
+    ).join(Question, Question.id == Answer.question_id).filter(Answer.exam_attempt_id == attempt_id).one()
+    return float(total_score), float(max_score)
+
+# Autosave buffer: girişim id -> bekleyen cevaplar. Aynı soruya gelen ardışık cevaplar birleştirilir,
+# arka plan flush'ı tüm girişimlerin bekleyenlerini tek toplu yazmada kaydeder
+autosave_buffer = {}
+autosave_lock = threading.Lock()
+# Süren bir flush bitmeden submit bekleyen cevapları almaz. Kilit sırası her yolda aynıdır: önce bu
+# kilit, sonra girişim satırları (flush satırları bu kilidin içinde, submit kilidi bıraktıktan sonra kilitler)
+autosave_flush_lock = threading.Lock()
+autosave_stats = {'received': 0, 'coalesced': 0, 'pending': 0, 'flushes': 0, 'rows_written': 0,
+                  'skipped_submitted': 0, 'last_flush_ms': 0.0}
+
+def stage_autosave(attempt_id, test_id, answers):
+    # Bekleyen cevap sayısı eşiği aştıysa True döner
+    with autosave_lock:
+        entry = autosave_buffer.setdefault(attempt_id, {'test_id': test_id, 'answers': {}})
+        for question_id, selected_answer in answers.items():
+            if question_id in entry['answers']:
+                autosave_stats['coalesced'] += 1
+            else:
+                autosave_stats['pending'] += 1
+            entry['answers'][question_id] = selected_answer
+        autosave_stats['received'] += len(answers)
+        return autosave_stats['pending'] >= app.config['AUTOSAVE_FLUSH_SIZE']
+
+def take_autosave(attempt_id):
+    with autosave_lock:
+        entry = autosave_buffer.pop(attempt_id, None)
+        if entry is None:
+            return {}
+        autosave_stats['pending'] -= len(entry['answers'])
+        return entry['answers']
+
+def flush_autosaves():
+    with autosave_flush_lock:
+        return _flush_autosaves()
+
+def _flush_autosaves():
+    with autosave_lock:
+        batch = dict(autosave_buffer)
+        autosave_buffer.clear()
+        autosave_stats['pending'] = 0
+    if not batch:
+        return 0
+    
+    started = time.perf_counter()
+    try:
+        # Bu arada gönderilmiş (başka bir worker'da) girişimlerin cevapları değiştirilmez;
+        # satır kilidi aynı girişimin submit'i ile yazmaları sıraya koyar
+        open_attempts = {attempt_id for (attempt_id,) in db.session.query(ExamAttempt.id).filter(
+            ExamAttempt.id.in_(batch), ExamAttempt.submitted_at.is_(None)).with_for_update()}
+        _, written = save_answer_batch([
+            (attempt_id, entry['test_id'], entry['answers']) for attempt_id, entry in batch.items() if attempt_id in open_attempts])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # Yazılamayan cevaplar, bu arada gelen daha yeni cevapları ezmeden geri konur
+        with autosave_lock:
+            for attempt_id, entry in batch.items():
+                current = autosave_buffer.setdefault(attempt_id, {'test_id': entry['test_id'], 'answers': {}})
+                for question_id, selected_answer in entry['answers'].items():
+                    if question_id not in current['answers']:
+                        current['answers'][question_id] = selected_answer
+                        autosave_stats['pending'] += 1
+        raise
+    
+    autosave_stats['flushes'] += 1
+    autosave_stats['rows_written'] += written
+    autosave_stats['skipped_submitted'] += len(batch) - len(open_attempts)
+    autosave_stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return written
+
+@atexit.register
+def _flush_autosaves_on_exit():
+    if autosave_buffer:
+        with app.app_context():
+            flush_autosaves()
+
+# Canlı sınav izleme: start/submit olayları process içi yayın/abone veriyolu ile SSE
+# aboneliklerine dağıtılır. Olay bir kez serileştirilir; her abonenin kuyruğu sınırlıdır ve
+# yetişemeyen abone düşürülür (EventSource yeniden bağlanıp güncel özeti alır). Yayıncı
+# hiçbir zaman beklemez, abone yoksa hiç iş yapılmaz.
+def _sse(event, data):
+    return b'event: ' + event.encode() + b'\ndata: ' + _json_bytes(data) + b'\n\n'
+
+class ExamStreamSubscriber:
+    OVERFLOW = object()
+    
+    def __init__(self, limit):
+        self.events = deque()
+        self.limit = limit
+        self.overflowed = False
+        self.ready = threading.Condition()
+    
+    def offer(self, message):
+        with self.ready:
+            if len(self.events) >= self.limit:
+                self.overflowed = True
+                self.events.clear()
+            else:
+                self.events.append(message)
+            self.ready.notify()
+            return not self.overflowed
+    
+    def next(self, timeout):
+        # Sıradaki olay; süre dolarsa None (heartbeat), taşma olduysa OVERFLOW
+        with self.ready:
+            if not self.events and not self.overflowed:
+                self.ready.wait(timeout)
+            if self.overflowed:
+                return self.OVERFLOW
+            return self.events.popleft() if self.events else None
+
+class ExamEventBus:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}  # test id -> abone kümesi
+        self.states = {}  # test id -> sayaçlar, isim listesi ve son ortalama (yalnızca abone varken)
+        self.stats = {'published': 0, 'delivered': 0, 'dropped_subscribers': 0}
+    
+    def subscribe(self, test_id, load_state):
+        # İlk abone durumu veritabanından bir kez yükler; sonrakiler bellekten alır
+        with self.lock:
+            state = self.states.get(test_id)
+        if state is None:
+            state = load_state()
+        subscriber = ExamStreamSubscriber(app.config['EXAM_STREAM_QUEUE_SIZE'])
+        with self.lock:
+            state = self.states.setdefault(test_id, state)
+            self.subscribers.setdefault(test_id, set()).add(subscriber)
+            snapshot = _sse('snapshot', {'started': state['started'], 'submitted': state['submitted'], **state['summary']})
+        return subscriber, snapshot
+    
+    def unsubscribe(self, test_id, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(test_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[test_id]
+                self.states.pop(test_id, None)
+    
+    def publish(self, test_id, event, data):
+        with self.lock:
+            subscribers = self.subscribers.get(test_id)
+            if not subscribers:
+                return
+            state = self.states[test_id]
+            if event == 'average':
+                state['summary'] = data
+            else:
+                state[event] += 1
+                data = dict(data, student_name=state['roster'].get(data['student_id']))
+            message = _sse(event, dict(data, started=state['started'], submitted=state['submitted']))
+            self.stats['published'] += 1
+            for subscriber in list(subscribers):
+                if subscriber.offer(message):
+                    self.stats['delivered'] += 1
+                else:
+                    subscribers.discard(subscriber)
+                    self.stats['dropped_subscribers'] += 1
+    
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, watched_tests=len(self.subscribers),
+                        subscribers=sum(len(subscribers) for subscribers in self.subscribers.values()))
+
+exam_events = ExamEventBus()
+
+# /live isteğinde token URL'de taşınır; werkzeug erişim günlüğüne yazılmadan önce gizlenir
+class RedactTokenFilter(logging.Filter):
+    pattern = re.compile(r'([?&]jwt=)[^&\s"]+')
+    
+    def filter(self, record):
+        if isinstance(record.args, tuple):
+            record.args = tuple(self.pattern.sub(r'\1[gizli]', arg) if isinstance(arg, str) else arg
+                                for arg in record.args)
+        elif isinstance(record.msg, str):
+            record.msg = self.pattern.sub(r'\1[gizli]', record.msg)
+        return True
+
+logging.getLogger('werkzeug').addFilter(RedactTokenFilter())
+
+def load_exam_stream_state(test_id, course_id):
+    roster = dict(db.session.query(User.id, User.full_name).join(
+        Enrollment, Enrollment.student_id == User.id).filter(Enrollment.course_id == course_id))
+    started, submitted = db.session.query(
+        db.func.count(ExamAttempt.id), db.func.count(ExamAttempt.submitted_at)
+    ).filter(ExamAttempt.test_id == test_id).one()
+    return {'roster': roster, 'started': started, 'submitted': submitted, 'summary': test_score_summary(test_id)}
+
+# Öğrenci sınav çekirdeği: WSGI route'ları ve async_app.py aynı fonksiyonları kullanır.
+# Veritabanına db.session üzerinden erişilir; async modda db.session istek başına async
+# motora bağlı oturuma yönlendirilir (bkz. async_app.py)
+class ExamRequestError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def available_tests(student_id):
+    # Kayıtlı derslerin testleri ve öğrencinin girişimleri tek sorguda
+    rows = db.session.query(Test, Course.name, ExamAttempt).join(
+        Enrollment, db.and_(Enrollment.course_id == Test.course_id, Enrollment.student_id == student_id)
+    ).join(
+        Course, Course.id == Test.course_id
+    ).outerjoin(
+        ExamAttempt, db.and_(ExamAttempt.test_id == Test.id, ExamAttempt.student_id == student_id)
+    ).order_by(Test.id).all()
+    
+    result = []
+    now = datetime.now()
+    # Bir sonraki başlangıç/bitiş anına kadar durumlar değişmez
+    valid_until = min((moment for test, _, _ in rows for moment in (test.start_time, test.end_time) if moment > now), default=None)
+    
+    for test, course_name, attempt in rows:
+        status = 'not_started'
+        if attempt:
+            status = 'completed' if attempt.submitted_at else 'in_progress'
+        elif now < test.start_time:
+            status = 'upcoming'
+        elif now >= test.start_time and now <= test.end_time:
+            status = 'available'
+        elif now > test.end_time:
+            status = 'expired'
+        
+        result.append({
+            'id': test.id,
+            'course_id': test.course_id,
+            'course_name': course_name,
+            'name': test.name,
+            'start_time': test.start_time.isoformat(),
+            'end_time': test.end_time.isoformat(),
+            'duration_minutes': test.duration_minutes,
+            'status': status,
+            'has_attempt': attempt is not None,
+            'score': attempt.score if attempt else None
+        })
+    
+    return result, valid_until
+
+def open_exam_attempt(student_id, test_id):
+    # Önceden hazırlanmış test bilgisi, kayıtlı öğrenciler ve serileştirilmiş sorular
+    payload = get_exam_payload(test_id)
+    if not payload:
+        raise ExamRequestError('Test not found', 404)
+    
+    # Check if student is enrolled (hazırlıktan sonra yapılan kayıtlar veritabanından doğrulanır)
+    if student_id not in payload['students']:
+        enrollment = Enrollment.query.filter_by(
+            student_id=student_id,
+            course_id=payload['course_id']
+        ).first()
+        
+        if not enrollment:
+            raise ExamRequestError('Not enrolled in this course', 403)
+    
+    # Check if test is available (timezone-aware karşılaştırma)
+    now = datetime.now()
+    if now < payload['start_time']:
+        raise ExamRequestError('Test henuz baslamadi', 400)
+    if now > payload['end_time']:
+        raise ExamRequestError('Test suresi doldu', 400)
+    
+    # Soru havuzunda yeterli soru var mı kontrol et
+    if len(payload['questions']) < payload['question_count']:
+        raise ExamRequestError(
+            f'Soru havuzunda yeterli soru yok! Gerekli: {payload["question_count"]}, Mevcut: {len(payload["questions"])}', 400)
+    
+    # Yeni girişim doğrudan eklenir; unique_attempt çakışırsa mevcut girişime dönülür
+    started_at = datetime.now()
+    try:
+        attempt_id = db.session.execute(db.insert(ExamAttempt).values(
+            student_id=student_id,
+            test_id=test_id,
+            started_at=started_at
+        )).inserted_primary_key[0]
+        bump_versions('student', [student_id])
+        db.session.commit()
+        exam_events.publish(test_id, 'started', {
+            'student_id': student_id,
+            'attempt_id': attempt_id,
+            'started_at': started_at.isoformat()
+        })
+    except IntegrityError:
+        db.session.rollback()
+        existing_attempt = ExamAttempt.query.filter_by(
+            student_id=student_id,
+            test_id=test_id
+        ).first()
+        
+        if existing_attempt.submitted_at:
+            raise ExamRequestError('Test already completed', 400)
+        attempt_id, started_at = existing_attempt.id, existing_attempt.started_at
+    
+    return render_exam_start(payload, attempt_id, started_at)
+
+def open_attempt_id(student_id, test_id):
+    attempt = db.session.query(ExamAttempt.id, ExamAttempt.submitted_at).filter_by(
+        student_id=student_id,
+        test_id=test_id
+    ).first()
+    
+    if not attempt:
+        raise ExamRequestError('Test attempt not found', 404)
+    
+    if attempt.submitted_at:
+        raise ExamRequestError('Test already submitted', 400)
+    
+    # Okuma transaction'ı kapatılır: beklerken biten flush'ın yazdığı cevaplar sonraki okumalarda görünür
+    db.session.rollback()
+    return attempt.id
+
+def take_autosave_for_submit(attempt_id):
+    # Süren flush bitene kadar bekler; async modda event loop dışında (thread'de) çağrılır
+    with autosave_flush_lock:
+        return take_autosave(attempt_id)
+
+def finalize_submission(student_id, test_id, answers_data, autosaved=None):
+    # Otomatik kaydedilip henüz yazılmamış cevaplar satır kilidinden önce alınır (bkz. autosave_flush_lock).
+    # autosaved verilirse çağıran bunları open_attempt_id + take_autosave_for_submit ile zaten almıştır
+    if autosaved is None:
+        autosaved = take_autosave_for_submit(open_attempt_id(student_id, test_id))
+    answers = dict(autosaved)
+    
+    # Kilit: başka bir worker'ın otomatik kayıt flush'ı bu girişime aynı anda yazmaz
+    attempt = ExamAttempt.query.filter_by(
+        student_id=student_id,
+        test_id=test_id
+    ).with_for_update().populate_existing().first()
+    if not attempt:
+        raise ExamRequestError('Test attempt not found', 404)
+    if attempt.submitted_at:
+        raise ExamRequestError('Test already submitted', 400)
+    
+    test = Test.query.filter_by(id=test_id).first()
+    now = datetime.now()
+    
+    # Auto-submit if time expired
+    if now > test.end_time:
+        now = test.end_time
+    
+    # Otomatik kaydedilen cevaplar gönderilenlerle birleştirilir; değişmeyen cevaplar tekrar
+    # yazılmaz, puan girişimin kayıtlı tüm cevaplarından hesaplanır
+    attempt_id = attempt.id
+    answers.update(normalize_answers(answers_data or {}))
+    save_answer_batch([(attempt_id, test_id, answers)])
+    total_score, max_score = attempt_score(attempt_id)
+    
+    attempt.score = total_score
+    attempt.max_score = max_score
+    attempt.submitted_at = now
+    
+    record_test_score(test_id, total_score, max_score)
+    refresh_gradebook(test.course_id, [student_id])
+    bump_versions('student', [student_id])
+    db.session.commit()
+    
+    # Get test average
+    summary = test_score_summary(test_id)
+    average_score = summary['average']
+    average_percentage = (average_score / max_score * 100) if max_score else 0
+    
+    exam_events.publish(test_id, 'submitted', {
+        'student_id': student_id,
+        'attempt_id': attempt_id,
+        'score': total_score,
+        'max_score': max_score,
+        'percentage': (total_score / max_score * 100) if max_score else 0,
+        'submitted_at': now.isoformat()
+    })
+    exam_events.publish(test_id, 'average', summary)
+    
+    return {
+        'score': total_score,
+        'max_score': max_score,
+        'percentage': (total_score / max_score * 100) if max_score else 0,
+        'average_score': average_score,
+        'average_percentage': average_percentage,
+        'std_dev_score': summary['std_dev'],
+        'lowest_score': summary['lowest'],
+        'highest_score': summary['highest']
+    }
+
+# Arka plan işleri: jobs tablosunda tutulur, aynı makinedeki thread havuzunda çalışır (harici
+# broker yok). Kuyruktaki iş koşullu UPDATE ile alınır, böylece birden fazla process aynı işi
+# çalıştırmaz. Hata veren iş JOB_RETRY_DELAY * 2^(deneme-1) saniye sonra tekrar denenir.
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    target_id = db.Column(db.Integer)
+    params = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed, cancelled
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=1)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer)
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    created_by = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_after', 'status', 'run_after'),
+        db.Index('ix_jobs_created_by', 'created_by', 'created_at'),
+    )
+
+class JobCancelled(Exception):
+    pass
+
+# Bu process'te çalışan işler: id -> ilerleme ve iptal bayrağı. İlerleme DB'ye dispatcher
+# tarafından yazılır; iş kendi transaction'ı sürerken jobs tablosuna dokunmaz
+running_jobs = {}
+job_runtime_lock = threading.Lock()
+job_dispatch_lock = threading.Lock()
+job_stats = {'claimed': 0, 'completed': 0, 'failed': 0, 'retried': 0, 'cancelled': 0, 'requeued_stale': 0}
+_job_executor = None
+_jobs_pruned_at = 0.0
+JOB_PRUNE_INTERVAL = 600
+
+def get_job_executor():
+    global _job_executor
+    with job_runtime_lock:
+        if _job_executor is None:
+            _job_executor = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'], thread_name_prefix='job')
+        return _job_executor
+
+def enqueue_job(kind, target_id=None, params=None, created_by=None):
+    job_id = uuid.uuid4().hex
+    db.session.add(Job(
+        id=job_id,
+        kind=kind,
+        target_id=target_id,
+        params=json.dumps(params or {}),
+        max_attempts=JOB_KINDS[kind][1],
+        created_by=created_by,
+        run_after=datetime.utcnow()
+    ))
+    db.session.commit()
+    # Bu process iş çalıştırıyorsa ve boş işçi varsa iş hemen başlar
+    if app.config['JOB_POLL_INTERVAL'] > 0:
+        dispatch_jobs()
+    return job_id
+
+def job_file_path(job_id, extension):
+    return os.path.join(app.config['JOB_FILES_DIR'], f'{job_id}.{extension}')
+
+def remove_job_files(job_id, params):
+    paths = [job_file_path(job_id, params['format'])] if params.get('format') else []
+    if params.get('path'):
+        paths.append(params['path'])
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def dispatch_jobs():
+    # Aynı process'te ikinci bir dispatch (istek + arka plan thread'i) beklemeden çıkar
+    if not job_dispatch_lock.acquire(blocking=False):
+        return 0
+    try:
+        return _dispatch_jobs()
+    finally:
+        job_dispatch_lock.release()
+
+def _dispatch_jobs():
+    now = datetime.utcnow()
+    with job_runtime_lock:
+        active = {job_id: dict(state) for job_id, state in running_jobs.items()}
+    
+    # Çalışan işlerin ilerlemesi ve heartbeat'i yazılır, iptal istekleri okunur
+    for job_id, state in active.items():
+        db.session.execute(db.update(Job).where(Job.id == job_id, Job.status == 'running').values(
+            progress_done=state['done'], progress_total=state['total'], heartbeat_at=now))
+    if active:
+        cancelled = [job_id for (job_id,) in db.session.query(Job.id).filter(
+            Job.id.in_(active), Job.cancel_requested.is_(True))]
+        with job_runtime_lock:
+            for job_id in cancelled:
+                if job_id in running_jobs:
+                    running_jobs[job_id]['cancel'] = True
+    
+    # Heartbeat'i kesilen işler (process öldü) tekrar kuyruğa alınır ya da başarısız sayılır. Her turda
+    # yalnızca okuma yapılır; UPDATE'ler (SQLite'ta yazma kilidi) böyle bir iş bulunduğunda çalışır
+    stale = db.and_(Job.status == 'running', Job.heartbeat_at < now - timedelta(seconds=app.config['JOB_STALE_SECONDS']),
+                    Job.id.notin_(active))
+    changed = bool(active)
+    if db.session.query(Job.id).filter(stale).first():
+        requeued = db.session.execute(db.update(Job).where(stale, Job.attempts < Job.max_attempts).values(
+            status='queued', run_after=now, error='Is yarida kaldi (worker yanit vermiyor)')).rowcount
+        db.session.execute(db.update(Job).where(stale, Job.attempts >= Job.max_attempts).values(
+            status='failed', finished_at=now, error='Is yarida kaldi (worker yanit vermiyor)'))
+        job_stats['requeued_stale'] += requeued
+        changed = True
+    
+    claimed = []
+    free = app.config['JOB_WORKERS'] - len(active)
+    if free > 0:
+        candidates = [job_id for (job_id,) in db.session.query(Job.id).filter(
+            Job.status == 'queued', Job.run_after <= now
+        ).order_by(Job.run_after, Job.created_at).limit(free)]
+        for job_id in candidates:
+            # Koşullu UPDATE: başka bir process aynı işi aldıysa rowcount 0 olur
+            if db.session.execute(db.update(Job).where(Job.id == job_id, Job.status == 'queued').values(
+                    status='running', attempts=Job.attempts + 1, started_at=now, heartbeat_at=now,
+                    progress_done=0, progress_total=None)).rowcount:
+                claimed.append(job_id)
+    # Boş kuyrukta commit (ve yazma transaction'ı) yoktur
+    if changed or claimed:
+        db.session.commit()
+    
+    for job_id in claimed:
+        with job_runtime_lock:
+            running_jobs[job_id] = {'done': 0, 'total': None, 'cancel': False}
+        job_stats['claimed'] += 1
+        get_job_executor().submit(run_job, job_id)
+    
+    prune_jobs()
+    return len(claimed)
+
+def prune_jobs():
+    # Saklama süresi dolan biten işler ve dosyaları silinir
+    global _jobs_pruned_at
+    if time.time() - _jobs_pruned_at < JOB_PRUNE_INTERVAL:
+        return
+    _jobs_pruned_at = time.time()
+    cutoff = datetime.utcnow() - timedelta(days=app.config['JOB_RETENTION_DAYS'])
+    expired = db.session.query(Job.id, Job.params).filter(
+        Job.status.in_(('completed', 'failed', 'cancelled')), Job.finished_at < cutoff).all()
+    for job_id, params in expired:
+        remove_job_files(job_id, json.loads(params or '{}'))
+    if expired:
+        db.session.execute(db.delete(Job).where(Job.id.in_([job_id for job_id, _ in expired])))
+        db.session.commit()
+
+def run_job(job_id):
+    with app.app_context():
+        try:
+            job = db.session.get(Job, job_id)
+            context = {'id': job.id, 'kind': job.kind, 'target_id': job.target_id,
+                       'params': json.loads(job.params or '{}'), 'created_by': job.created_by}
+            attempts, max_attempts = job.attempts, job.max_attempts
+            db.session.commit()
+            
+            def progress(done, total=None):
+                # İşler ilerlemeyi commit sınırlarında bildirir; iptal yalnızca bu noktalarda uygulanır
+                with job_runtime_lock:
+                    state = running_jobs[job_id]
+                    state['done'], state['total'] = done, total
+                    if state['cancel']:
+                        raise JobCancelled()
+            
+            try:
+                result = JOB_KINDS[context['kind']][0](context, progress)
+            except JobCancelled:
+                db.session.rollback()
+                finish_job(job_id, 'cancelled')
+                job_stats['cancelled'] += 1
+            except Exception as e:
+                db.session.rollback()
+                print(f"ERROR - Arka plan isi hatasi ({context['kind']} {job_id}, deneme {attempts}/{max_attempts}): {str(e)}")
+                traceback.print_exc()
+                if attempts < max_attempts:
+                    delay = app.config['JOB_RETRY_DELAY'] * 2 ** (attempts - 1)
+                    finish_job(job_id, 'queued', error=str(e), run_after=datetime.utcnow() + timedelta(seconds=delay))
+                    job_stats['retried'] += 1
+                else:
+                    finish_job(job_id, 'failed', error=str(e))
+                    job_stats['failed'] += 1
+            else:
+                finish_job(job_id, 'completed', result=json.dumps(result, default=str), error=None)
+                job_stats['completed'] += 1
+        except Exception as e:
+            # Durum yazılamadıysa iş heartbeat'i kesilmiş sayılıp yeniden kuyruğa alınır
+            print(f"ERROR - Arka plan isi durumu yazilamadi ({job_id}): {str(e)}")
+            traceback.print_exc()
+        finally:
+            with job_runtime_lock:
+                running_jobs.pop(job_id, None)
+            db.session.remove()
+
+def finish_job(job_id, status, **values):
+    with job_runtime_lock:
+        state = running_jobs.get(job_id, {})
+    if status != 'queued':
+        values['finished_at'] = datetime.utcnow()
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(
+        status=status, progress_done=state.get('done', 0), progress_total=state.get('total'), **values))
+    db.session.commit()
+
+def job_payload(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'target_id': job.target_id,
+        'status': job.status,
+        'progress': {'done': job.progress_done, 'total': job.progress_total},
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'cancel_requested': job.cancel_requested,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'created_by': job.created_by,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'run_after': job.run_after.isoformat() if job.status == 'queued' else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+def job_response(job_id, message):
+    return jsonify({
+        'message': message,
+        'job_id': job_id,
+        'status_url': f'/api/jobs/{job_id}'
+    }), 202
+
+# Arka plan işçileri: her worker process'inde ilk istekte başlatılır. (isim, fonksiyon, aralık ayarı)
+BACKGROUND_WORKERS = (
+    ('exam-warmer', warm_upcoming_exams, 'EXAM_WARMUP_INTERVAL'),
+    ('autosave-flusher', flush_autosaves, 'AUTOSAVE_FLUSH_INTERVAL'),
+    ('job-dispatcher', dispatch_jobs, 'JOB_POLL_INTERVAL'),
+)
+_background_workers_started = False
+_background_workers_lock = threading.Lock()
+
+def _run_periodically(name, func, interval_key):
+    while True:
+        with app.app_context():
+            try:
+                func()
+            except Exception as e:
+                print(f"ERROR - Arka plan isi ({name}) hatasi: {str(e)}")
+                traceback.print_exc()
+            finally:
+                db.session.remove()
+        time.sleep(app.config[interval_key])
+
+@app.before_request
+def start_background_workers():
+    global _background_workers_started
+    if _background_workers_started:
+        return
+    with _background_workers_lock:
+        if _background_workers_started:
+            return
+        _background_workers_started = True
+        for name, func, interval_key in BACKGROUND_WORKERS:
+            # Aralık 0 ise işçi çalışmaz (ısıtma ilk istekte, flush submit/eşik anında yapılır)
+            if app.config[interval_key] > 0:
+                threading.Thread(target=_run_periodically, args=(name, func, interval_key), daemon=True, name=name).start()
+
+def rebuild_gradebook(progress=None):
+    CourseGrade.query.delete()
+    CourseStat.query.delete()
+    StudentStat.query.delete()
+
+    course_ids = [course_id for (course_id,) in db.session.query(Course.id).all()]
+    for index, course_id in enumerate(course_ids, 1):
+        refresh_gradebook(course_id)
+        if progress:
+            progress(index, len(course_ids))
+    db.session.commit()
+    return len(course_ids)
+
+# Purge helpers: ders/test/öğrenci silme zincirleri küme tabanlı DELETE'lerle, parça parça
+def purge_attempts(attempt_filter, progress=None):
+    # Her parça kendi transaction'ında silinir; kilit süresi girişim sayısıyla büyümez. Silinen
+    # girişimlerin test özetleri, puan kovaları ve not defteri aynı transaction'da güncellenir;
+    # silme yarıda kalsa (iptal, hata, worker çökmesi) da özetler kalan veriyle tutarlıdır
+    chunk_size = app.config['PURGE_CHUNK_SIZE']
+    total = db.session.query(db.func.count(ExamAttempt.id)).filter(attempt_filter).scalar()
+    deleted = 0
+    if progress:
+        progress(deleted, total)
+    
+    while True:
+        attempts = db.session.query(
+            ExamAttempt.id, ExamAttempt.test_id, ExamAttempt.student_id, ExamAttempt.score,
+            ExamAttempt.max_score, ExamAttempt.submitted_at
+        ).filter(attempt_filter).order_by(ExamAttempt.id).limit(chunk_size).all()
+        if not attempts:
+            break
+        
+        attempt_ids = [attempt.id for attempt in attempts]
+        Answer.query.filter(Answer.exam_attempt_id.in_(attempt_ids)).delete(synchronize_session=False)
+        ExamAttempt.query.filter(ExamAttempt.id.in_(attempt_ids)).delete(synchronize_session=False)
+        
+        remove_test_scores([(attempt.test_id, attempt.score, attempt.max_score) for attempt in attempts
+                            if attempt.submitted_at is not None and attempt.score is not None])
+        course_ids = dict(db.session.query(Test.id, Test.course_id).filter(
+            Test.id.in_({attempt.test_id for attempt in attempts})))
+        students_by_course = {}
+        for attempt in attempts:
+            if attempt.test_id in course_ids:
+                students_by_course.setdefault(course_ids[attempt.test_id], set()).add(attempt.student_id)
+        for course_id, student_ids in students_by_course.items():
+            refresh_gradebook(course_id, list(student_ids))
+        bump_versions('student', {attempt.student_id for attempt in attempts})
+        db.session.commit()
+        
+        deleted += len(attempt_ids)
+        if progress:
+            progress(deleted, max(total, deleted))
+    return deleted
+
+def purge_test(test_id, progress=None):
+    course_id = db.session.query(Test.course_id).filter_by(id=test_id).scalar()
+    deleted = purge_attempts(ExamAttempt.test_id == test_id, progress)
+    
+    Question.query.filter_by(test_id=test_id).delete(synchronize_session=False)
+    TestStat.query.filter_by(test_id=test_id).delete(synchronize_session=False)
+    TestScoreBucket.query.filter_by(test_id=test_id).delete(synchronize_session=False)
+    Test.query.filter_by(id=test_id).delete(synchronize_session=False)
+    
+    # Testin ağırlığı artık final notlarına katılmaz
+    if course_id is not None:
+        refresh_gradebook(course_id)
+        bump_versions('course', [course_id])
+    bump_versions('test', [test_id])
+    db.session.commit()
+    invalidate_question_pool(test_id)
+    
+    print(f"DEBUG - Test {test_id} silindi ({deleted} sinav girisimi)")
+    return deleted
+
+def purge_course(course_id, progress=None):
+    test_ids = [test_id for (test_id,) in db.session.query(Test.id).filter_by(course_id=course_id).all()]
+    course_tests = db.session.query(Test.id).filter(Test.course_id == course_id)
+    deleted = purge_attempts(ExamAttempt.test_id.in_(course_tests), progress)
+    
+    Question.query.filter(Question.test_id.in_(course_tests)).delete(synchronize_session=False)
+    TestStat.query.filter(TestStat.test_id.in_(course_tests)).delete(synchronize_session=False)
+    TestScoreBucket.query.filter(TestScoreBucket.test_id.in_(course_tests)).delete(synchronize_session=False)
+    Test.query.filter_by(course_id=course_id).delete(synchronize_session=False)
+    bump_versions('student', [student_id for (student_id,) in db.session.query(Enrollment.student_id).filter_by(course_id=course_id)])
+    Enrollment.query.filter_by(course_id=course_id).delete(synchronize_session=False)
+    
+    # Gradebook satırlarını sil ve öğrenci özetlerini güncelle
+    graded_student_ids = [student_id for (student_id,) in db.session.query(CourseGrade.student_id).filter_by(course_id=course_id).all()]
+    CourseGrade.query.filter_by(course_id=course_id).delete(synchronize_session=False)
+    CourseStat.query.filter_by(course_id=course_id).delete(synchronize_session=False)
+    refresh_student_stats(graded_student_ids)
+    
+    Course.query.filter_by(id=course_id).delete(synchronize_session=False)
+    bump_versions('test', test_ids)
+    db.session.commit()
+    
+    for test_id in test_ids:
+        invalidate_question_pool(test_id)
+    
+    print(f"DEBUG - Ders {course_id} silindi ({len(test_ids)} test, {deleted} sinav girisimi)")
+    return deleted
+
+def purge_user(user_id, progress=None):
+    # Silinen puanlar test özetlerinden her parçada düşülür (bkz. purge_attempts)
+    deleted = purge_attempts(ExamAttempt.student_id == user_id, progress)
+    
+    course_ids = [course_id for (course_id,) in db.session.query(Enrollment.course_id).filter_by(student_id=user_id).all()]
+    Enrollment.query.filter_by(student_id=user_id).delete(synchronize_session=False)
+    
+    # Gradebook satırlarını sil ve derslerin özetlerini güncelle
+    CourseGrade.query.filter_by(student_id=user_id).delete(synchronize_session=False)
+    StudentStat.query.filter_by(student_id=user_id).delete(synchronize_session=False)
+    for course_id in course_ids:
+        refresh_course_stat(course_id)
+    
+    # ORM üzerinden silinir ki kullanıcı önbelleği de temizlensin
+    user = db.session.get(User, user_id)
+    if user:
+        db.session.delete(user)
+    db.session.commit()
+    
+    print(f"DEBUG - Kullanici {user_id} silindi ({deleted} sinav girisimi)")
+    return deleted
+
+def purge_response(kind, target_id, purge_func, message):
+    # ?background=1 ile silme arka plan işi olarak yapılır ve 202 döner
+    if request.args.get('background', type=int):
+        job_id = enqueue_job(f'purge_{kind}', target_id, created_by=int(get_jwt_identity()))
+        return job_response(job_id, 'Silme islemi arka planda baslatildi')
+    
+    try:
+        purge_func(target_id)
+        return jsonify({'message': message}), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR - Silme hatasi ({kind} {target_id}): {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': f'Silme sirasinda hata: {str(e)}'}), 500
+
+# Import helpers: yüklenen CSV/NDJSON gövdesini satır satır okur (tamamı belleğe alınmaz)
+def iter_upload_rows(stream, upload_format):
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding='utf-8-sig', newline='')
+    if upload_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Gecersiz JSON: {e}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'Satir bir JSON nesnesi olmali'
+            continue
+        yield line_number, row, None
+
+def get_upload_format():
+    upload_format = request.args.get('format')
+    if not upload_format:
+        content_type = request.mimetype or ''
+        upload_format = 'ndjson' if 'ndjson' in content_type or 'json' in content_type else 'csv'
+    return upload_format if upload_format in ('csv', 'ndjson') else None
+
+def import_enrollments(rows, progress=None):
+    # Kullanıcı adı / ders kodu çözümlemesi için bellek içi eşleme tabloları
+    student_ids_by_username = dict(db.session.query(User.username, User.id).filter(User.role == 'student').all())
+    student_ids = set(student_ids_by_username.values())
+    course_ids_by_code = dict(db.session.query(Course.code, Course.id).all())
+    course_ids = set(course_ids_by_code.values())
+    
+    summary = {'inserted': 0, 'skipped': 0, 'rejected': 0, 'errors': []}
+    seen = set()
+    batch = []
+    affected_courses = set()
+    
+    def reject(line_number, message):
+        summary['rejected'] += 1
+        if len(summary['errors']) < MAX_IMPORT_ERRORS:
+            summary['errors'].append({'line': line_number, 'error': message})
+    
+    def flush_batch():
+        if not batch:
+            return
+        # unique_enrollment çakışmaları tek sorguda ayıklanır
+        existing = set(db.session.query(Enrollment.student_id, Enrollment.course_id).filter(
+            Enrollment.student_id.in_({student_id for student_id, _ in batch}),
+            Enrollment.course_id.in_({course_id for _, course_id in batch})
+        ).all())
+        new_rows = [
+            {'student_id': student_id, 'course_id': course_id}
+            for student_id, course_id in batch if (student_id, course_id) not in existing
+        ]
+        if new_rows:
+            db.session.execute(db.insert(Enrollment), new_rows)
+            affected_courses.update(row['course_id'] for row in new_rows)
+            bump_versions('student', [row['student_id'] for row in new_rows])
+        db.session.commit()
+        summary['inserted'] += len(new_rows)
+        summary['skipped'] += len(batch) - len(new_rows)
+        batch.clear()
+        if progress:
+            progress(summary['inserted'] + summary['skipped'] + summary['rejected'])
+    
+    try:
+        for line_number, row, error in rows:
+            if error:
+                reject(line_number, error)
+                continue
+            
+            username = str(row.get('username') or '').strip()
+            course_code = str(row.get('course_code') or '').strip()
+            if not (username or row.get('student_id')) or not (course_code or row.get('course_id')):
+                reject(line_number, 'Ogrenci (username/student_id) ve ders (course_code/course_id) zorunludur')
+                continue
+            
+            try:
+                student_id = int(row['student_id']) if row.get('student_id') not in (None, '') else student_ids_by_username.get(username)
+                course_id = int(row['course_id']) if row.get('course_id') not in (None, '') else course_ids_by_code.get(course_code)
+            except (TypeError, ValueError):
+                reject(line_number, 'Gecersiz student_id veya course_id')
+                continue
+            
+            if student_id not in student_ids:
+                reject(line_number, f'Ogrenci bulunamadi: {username or row.get("student_id")}')
+                continue
+            if course_id not in course_ids:
+                reject(line_number, f'Ders bulunamadi: {course_code or row.get("course_id")}')
+                continue
+            
+            if (student_id, course_id) in seen:
+                summary['skipped'] += 1
+                continue
+            seen.add((student_id, course_id))
+            
+            batch.append((student_id, course_id))
+            if len(batch) >= app.config['IMPORT_BATCH_SIZE']:
+                flush_batch()
+        
+        flush_batch()
+    finally:
+        # Derslerin öğrenci sayıları (course_stats) güncellenir; iş yarıda iptal edilse de
+        # o ana kadar yazılan kayıtlar için
+        db.session.rollback()
+        for course_id in affected_courses:
+            refresh_course_stat(course_id)
+        db.session.commit()
+    
+    return summary
+
+# Şifre hash'leme işlem havuzları: ilk kullanımda oluşturulur
+_process_pools = {}
+_process_pools_lock = threading.Lock()
+USER_ROLES = ('admin', 'instructor', 'student', 'department_head')
+
+def get_process_pool(name, max_workers, initializer=None):
+    with _process_pools_lock:
+        if name not in _process_pools:
+            _process_pools[name] = ProcessPoolExecutor(max_workers=max_workers, initializer=initializer)
+        return _process_pools[name]
+
+def _lower_worker_priority():
+    # Login doğrulamaları CPU'yu sınav gönderimlerinden önce tüketmesin
+    if hasattr(os, 'nice'):
+        os.nice(5)
+
+def hash_passwords(passwords):
+    workers = app.config['PASSWORD_HASH_WORKERS']
+    chunksize = max(1, len(passwords) // (workers * 4))
+    pool = get_process_pool('hash', workers)
+    return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+class LoginQueueFull(Exception):
+    pass
+
+login_slots = threading.BoundedSemaphore(app.config['LOGIN_QUEUE_DEPTH'])
+login_stats = {'verified': 0, 'rejected': 0, 'timed_out': 0}
+
+def verify_password(password_hash, password):
+    workers = app.config['LOGIN_VERIFY_WORKERS']
+    if workers <= 0:
+        return check_password_hash(password_hash, password)
+    
+    # Kuyruk doluysa beklemeden reddet
+    if not login_slots.acquire(blocking=False):
+        login_stats['rejected'] += 1
+        raise LoginQueueFull()
+    try:
+        pool = get_process_pool('login', workers, initializer=_lower_worker_priority)
+        future = pool.submit(check_password_hash, password_hash, password)
+    except Exception:
+        login_slots.release()
+        raise
+    # Slot hash bittiğinde (ya da kuyrukta iptal edildiğinde) bırakılır: zaman aşımına uğrayan ama
+    # çalışmaya devam eden doğrulama kuyruk sınırına sayılmaya devam eder
+    future.add_done_callback(lambda _: login_slots.release())
+    try:
+        result = future.result(timeout=app.config['LOGIN_VERIFY_TIMEOUT'])
+    except FutureTimeoutError:
+        future.cancel()
+        login_stats['timed_out'] += 1
+        raise LoginQueueFull()
+    login_stats['verified'] += 1
+    return result
+
+def import_users(rows, progress=None):
+    # Benzersizlik kontrolleri önceden yüklenen kümelerle yapılır (satır başına sorgu yok)
+    usernames, emails, full_names = set(), set(), set()
+    for username, email, full_name in db.session.query(User.username, User.email, User.full_name).all():
+        usernames.add(username)
+        emails.add(email)
+        full_names.add(full_name)
+    
+    summary = {'inserted': 0, 'rejected': 0, 'errors': []}
+    batch = []
+    started = time.perf_counter()
+    
+    def reject(line_number, message):
+        summary['rejected'] += 1
+        if len(summary['errors']) < MAX_IMPORT_ERRORS:
+            summary['errors'].append({'line': line_number, 'error': message})
+    
+    def flush_batch():
+        if not batch:
+            return
+        password_hashes = hash_passwords([row.pop('password') for row in batch])
+        for row, password_hash in zip(batch, password_hashes):
+            row['password_hash'] = password_hash
+        db.session.execute(db.insert(User), batch)
+        db.session.commit()
+        summary['inserted'] += len(batch)
+        batch.clear()
+        if progress:
+            progress(summary['inserted'] + summary['rejected'])
+    
+    for line_number, row, error in rows:
+        if error:
+            reject(line_number, error)
+            continue
+        
+        user = {field: str(row.get(field) or '').strip() for field in ('username', 'email', 'password', 'role', 'full_name')}
+        user['role'] = user['role'] or 'student'
+        
+        if not user['username'] or not user['email'] or not user['password'] or not user['full_name']:
+            reject(line_number, 'Tum alanlar zorunludur')
+        elif not re.match(r'^[a-zA-Z0-9_]+$', user['username']):
+            reject(line_number, 'Kullanici adi sadece harf, rakam ve alt cizgi (_) icerebilir')
+        elif len(user['password']) < 6:
+            reject(line_number, 'Sifre en az 6 karakter olmalidir')
+        elif user['role'] not in USER_ROLES:
+            reject(line_number, f'Gecersiz rol: {user["role"]}')
+        elif user['username'] in usernames:
+            reject(line_number, f'"{user["username"]}" kullanici adi zaten kullaniliyor')
+        elif user['email'] in emails:
+            reject(line_number, f'"{user["email"]}" e-posta adresi zaten kayitli')
+        elif user['full_name'] in full_names:
+            reject(line_number, f'"{user["full_name"]}" adinda bir kullanici zaten mevcut')
+        else:
+            usernames.add(user['username'])
+            emails.add(user['email'])
+            full_names.add(user['full_name'])
+            batch.append(user)
+            if len(batch) >= app.config['IMPORT_BATCH_SIZE']:
+                flush_batch()
+    
+    flush_batch()
+    
+    elapsed = time.perf_counter() - started
+    summary['elapsed_seconds'] = round(elapsed, 3)
+    summary['users_per_second'] = round(summary['inserted'] / elapsed, 1) if elapsed > 0 else 0
+    return summary
+
+def _insert_in_batches(model, rows):
+    batch_size = app.config['IMPORT_BATCH_SIZE']
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(db.insert(model), rows[start:start + batch_size])
+
+def seed_synthetic_data(students=1000, instructors=20, courses=40, courses_per_student=5, tests_per_course=3,
+                        pool_size=30, questions_per_test=10, submit_ratio=0.8, password='seed-pass-123',
+                        prefix='seed', rng_seed=42):
+    # Üretim ölçeğinde sentetik veri: toplu INSERT'ler, şifre hash'i tek kez hesaplanır.
+    # Her dersin son testi şu an açıktır (start/submit akışları için); öncekiler bitmiş ve gönderilmiştir.
+    rng = random.Random(rng_seed)
+    started = time.perf_counter()
+    password_hash = generate_password_hash(password)
+    now = datetime.now()
+    
+    if db.session.query(User.id).filter(User.username.like(f'{prefix}\\_%', escape='\\')).first():
+        raise ValueError(f'"{prefix}" onekli veri zaten mevcut')
+    
+    def users(role, count):
+        return [{
+            'username': f'{prefix}_{role}_{i}', 'email': f'{prefix}_{role}_{i}@example.com',
+            'password_hash': password_hash, 'role': role, 'full_name': f'{prefix.title()} {role.title()} {i}'
+        } for i in range(count)]
+    
+    _insert_in_batches(User, users('instructor', instructors) + users('student', students) + users('department_head', 1))
+    instructor_ids = [user_id for (user_id,) in db.session.query(User.id).filter(
+        User.username.like(f'{prefix}\\_instructor\\_%', escape='\\')).order_by(User.id)]
+    student_ids = [user_id for (user_id,) in db.session.query(User.id).filter(
+        User.username.like(f'{prefix}\\_student\\_%', escape='\\')).order_by(User.id)]
+    
+    _insert_in_batches(Course, [{
+        'code': f'{prefix.upper()}{i:04d}', 'name': f'{prefix.title()} Course {i}',
+        'instructor_id': instructor_ids[i % len(instructor_ids)]
+    } for i in range(courses)])
+    course_ids = [course_id for (course_id,) in db.session.query(Course.id).filter(
+        Course.code.like(f'{prefix.upper()}%')).order_by(Course.id)]
+    
+    enrollments = {}
+    enrollment_rows = []
+    for student_id in student_ids:
+        for course_id in rng.sample(course_ids, min(courses_per_student, len(course_ids))):
+            enrollments.setdefault(course_id, []).append(student_id)
+            enrollment_rows.append({'student_id': student_id, 'course_id': course_id})
+    _insert_in_batches(Enrollment, enrollment_rows)
+    
+    test_rows = []
+    for course_id in course_ids:
+        for i in range(tests_per_course):
+            is_open = i == tests_per_course - 1
+            start_time = now - timedelta(hours=1) if is_open else now - timedelta(days=7 * (tests_per_course - i))
+            test_rows.append({
+                'course_id': course_id, 'name': f'Sinav {i + 1}', 'weight': 100 / tests_per_course,
+                'start_time': start_time, 'end_time': now + timedelta(days=1) if is_open else start_time + timedelta(hours=2),
+                'duration_minutes': 60, 'question_count': questions_per_test
+            })
+    _insert_in_batches(Test, test_rows)
+    tests = db.session.query(Test.id, Test.course_id, Test.end_time).filter(Test.course_id.in_(course_ids)).all()
+    test_ids = [test_id for test_id, _, _ in tests]
+    _insert_in_batches(TestStat, [{'test_id': test_id} for test_id in test_ids])
+    
+    _insert_in_batches(Question, [{
+        'test_id': test_id, 'question_text': f'Soru {i + 1}', 'option_a': 'A secenegi', 'option_b': 'B secenegi',
+        'option_c': 'C secenegi', 'option_d': 'D secenegi', 'correct_answer': rng.choice('ABCD'),
+        'points': float(rng.choice((1, 2, 5)))
+    } for test_id in test_ids for i in range(pool_size)])
+    pools = {}
+    for question_id, test_id, correct_answer, points in db.session.query(
+            Question.id, Question.test_id, Question.correct_answer, Question.points).filter(Question.test_id.in_(test_ids)):
+        pools.setdefault(test_id, []).append((question_id, correct_answer, points))
+    
+    # Bitmiş testler için gönderilmiş girişimler; puanlar cevaplardan hesaplanır
+    attempt_rows = []
+    attempt_answers = {}
+    for test_id, course_id, end_time in tests:
+        if end_time > now:
+            continue
+        for student_id in enrollments.get(course_id, []):
+            if rng.random() >= submit_ratio:
+                continue
+            answers = []
+            score = max_score = 0.0
+            for question_id, correct_answer, points in rng.sample(pools[test_id], min(questions_per_test, len(pools[test_id]))):
+                selected = correct_answer if rng.random() < 0.65 else rng.choice('ABCD')
+                is_correct = selected == correct_answer
+                answers.append({'question_id': question_id, 'selected_answer': selected, 'is_correct': is_correct,
+                                'points_earned': points if is_correct else 0.0})
+                score += points if is_correct else 0.0
+                max_score += points
+            attempt_answers[(student_id, test_id)] = answers
+            attempt_rows.append({'student_id': student_id, 'test_id': test_id, 'started_at': end_time - timedelta(minutes=90),
+                                 'submitted_at': end_time - timedelta(minutes=rng.randint(31, 89)),
+                                 'score': score, 'max_score': max_score})
+    _insert_in_batches(ExamAttempt, attempt_rows)
+    
+    answer_rows = []
+    for attempt_id, student_id, test_id in db.session.query(ExamAttempt.id, ExamAttempt.student_id, ExamAttempt.test_id).filter(
+            ExamAttempt.test_id.in_(test_ids)):
+        for answer in attempt_answers.get((student_id, test_id), ()):
+            answer_rows.append(dict(answer, exam_attempt_id=attempt_id))
+    _insert_in_batches(Answer, answer_rows)
+    db.session.commit()
+    
+    rebuild_test_stats(test_ids)
+    rebuild_gradebook()
+    
+    return {
+        'users': students + instructors + 1,
+        'courses': len(course_ids),
+        'enrollments': len(enrollment_rows),
+        'tests': len(test_ids),
+        'questions': sum(len(pool) for pool in pools.values()),
+        'attempts': len(attempt_rows),
+        'answers': len(answer_rows),
+        'elapsed_seconds': round(time.perf_counter() - started, 3)
+    }
+
+# CSV / NDJSON dışa aktarma: satırlar üretildikçe gönderilir, tüm sonuç bellekte tutulmaz
+EXPORT_FLUSH_ROWS = 200
+
+def get_export_format():
+    export_format = request.args.get('format')
+    if not export_format:
+        export_format = 'ndjson' if 'ndjson' in request.headers.get('Accept', '') else 'csv'
+    return export_format if export_format in ('csv', 'ndjson') else None
+
+def _iter_csv(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for index, row in enumerate(rows, 1):
+        writer.writerow([row.get(column) for column in columns])
+        if index % EXPORT_FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _iter_ndjson(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=str))
+        if len(lines) >= EXPORT_FLUSH_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines.clear()
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def stream_export(rows, columns, export_format, filename):
+    # rows: dict üreten generator; CSV'de columns sırası kullanılır
+    if export_format == 'ndjson':
+        body, mimetype = _iter_ndjson(rows), 'application/x-ndjson'
+    else:
+        body, mimetype = _iter_csv(columns, rows), 'text/csv'
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+# Dışa aktarma kaynakları: (satır generator'ı, CSV sütunları, dosya adı). Route'lar akış olarak,
+# arka plan işleri dosyaya yazar
+def course_grades_export(course_id, export_format):
+    course_code = db.session.query(Course.code).filter_by(id=course_id).scalar()
+    # CSV sütunları dersin testlerinden gelir (test başına puan ve yüzde)
+    test_names = [name for (name,) in db.session.query(Test.name).filter(Test.course_id == course_id).order_by(Test.id)]
+    columns = ['student_id', 'student_name']
+    for name in test_names:
+        columns += [f'{name} score', f'{name} max_score', f'{name} percentage']
+    columns += ['total_weight', 'final_grade']
+    
+    def rows():
+        for row in iter_course_grades(course_id, chunk_size=app.config['EXPORT_CHUNK_SIZE']):
+            if export_format == 'ndjson':
+                yield {key: row[key] for key in ('student_id', 'student_name', 'grades', 'total_weight', 'final_grade')}
+                continue
+            flat = {'student_id': row['student_id'], 'student_name': row['student_name'],
+                    'total_weight': row['total_weight'],
+                    'final_grade': round(row['final_grade'], 2) if row['final_grade'] is not None else None}
+            for name, grade in row['grades'].items():
+                flat[f'{name} score'] = grade['score']
+                flat[f'{name} max_score'] = grade['max_score']
+                flat[f'{name} percentage'] = round(grade['percentage'], 2)
+            yield flat
+    
+    return rows(), columns, f'{course_code}-grades'
+
+def test_results_export(test_id, export_format):
+    query = db.session.query(
+        ExamAttempt.id, ExamAttempt.student_id, User.username, User.full_name, ExamAttempt.started_at,
+        ExamAttempt.submitted_at, ExamAttempt.score, ExamAttempt.max_score
+    ).join(User, User.id == ExamAttempt.student_id).filter(
+        ExamAttempt.test_id == test_id
+    ).order_by(ExamAttempt.id).yield_per(app.config['EXPORT_CHUNK_SIZE'])
+    
+    columns = ['attempt_id', 'student_id', 'username', 'student_name', 'started_at', 'submitted_at',
+               'score', 'max_score', 'percentage']
+    
+    def rows():
+        for attempt in query:
+            yield {
+                'attempt_id': attempt.id,
+                'student_id': attempt.student_id,
+                'username': attempt.username,
+                'student_name': attempt.full_name,
+                'started_at': attempt.started_at.isoformat(),
+                'submitted_at': attempt.submitted_at.isoformat() if attempt.submitted_at else None,
+                'score': attempt.score,
+                'max_score': attempt.max_score,
+                'percentage': round(attempt.score / attempt.max_score * 100, 2) if attempt.max_score else None
+            }
+    
+    return rows(), columns, f'test-{test_id}-results'
+
+def test_answers_export(test_id, export_format):
+    query = db.session.query(
+        Answer.exam_attempt_id, ExamAttempt.student_id, User.full_name, Answer.question_id,
+        Question.question_text, Answer.selected_answer, Question.correct_answer, Answer.is_correct,
+        Answer.points_earned, Question.points
+    ).join(
+        ExamAttempt, ExamAttempt.id == Answer.exam_attempt_id
+    ).join(
+        User, User.id == ExamAttempt.student_id
+    ).join(
+        Question, Question.id == Answer.question_id
+    ).filter(
+        ExamAttempt.test_id == test_id
+    ).order_by(Answer.exam_attempt_id, Answer.question_id).yield_per(app.config['EXPORT_CHUNK_SIZE'])
+    
+    columns = ['attempt_id', 'student_id', 'student_name', 'question_id', 'question_text', 'selected_answer',
+               'correct_answer', 'is_correct', 'points_earned', 'points']
+    
+    def rows():
+        for answer in query:
+            yield {
+                'attempt_id': answer.exam_attempt_id,
+                'student_id': answer.student_id,
+                'student_name': answer.full_name,
+                'question_id': answer.question_id,
+                'question_text': answer.question_text,
+                'selected_answer': answer.selected_answer,
+                'correct_answer': answer.correct_answer,
+                'is_correct': answer.is_correct,
+                'points_earned': answer.points_earned,
+                'points': answer.points
+            }
+    
+    return rows(), columns, f'test-{test_id}-answers'
+
+def write_export_file(path, rows, columns, export_format, progress=None):
+    # Geçici dosyaya yazılır; yarıda kalan dosya indirilemez
+    count = 0
+    
+    def counted():
+        nonlocal count
+        for row in rows:
+            yield row
+            count += 1
+            if progress and count % app.config['EXPORT_CHUNK_SIZE'] == 0:
+                progress(count)
+    
+    body = _iter_ndjson(counted()) if export_format == 'ndjson' else _iter_csv(columns, counted())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with open(path + '.part', 'w', encoding='utf-8', newline='') as f:
+            for chunk in body:
+                f.write(chunk)
+    except BaseException:
+        os.remove(path + '.part')
+        raise
+    os.replace(path + '.part', path)
+    if progress:
+        progress(count, count)
+    return count
+
+def spool_upload(stream, upload_format):
+    # Arka plan içe aktarması için istek gövdesi parça parça diske yazılır
+    directory = os.path.join(app.config['JOB_FILES_DIR'], 'uploads')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{uuid.uuid4().hex}.{upload_format}')
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(stream, f, 1024 * 1024)
+    return path
+
+# İş türleri: fonksiyon (iş bilgisi, progress) alır ve JSON'a çevrilebilir sonuç döner
+def _purge_job(purge_func):
+    def run(job, progress):
+        return {'deleted_attempts': purge_func(job['target_id'], progress)}
+    return run
+
+def _import_job(import_func):
+    def run(job, progress):
+        params = job['params']
+        try:
+            with open(params['path'], 'rb') as f:
+                return import_func(iter_upload_rows(f, params['format']), progress)
+        finally:
+            remove_job_files(job['id'], {'path': params['path']})
+    return run
+
+def _export_job(export_func):
+    def run(job, progress):
+        export_format = job['params']['format']
+        rows, columns, filename = export_func(job['target_id'], export_format)
+        count = write_export_file(job_file_path(job['id'], export_format), rows, columns, export_format, progress)
+        return {'rows': count, 'filename': f'{filename}.{export_format}', 'download_url': f"/api/jobs/{job['id']}/download"}
+    return run
+
+def _rebuild_gradebook_job(job, progress):
+    return {'courses': rebuild_gradebook(progress)}
+
+def _rebuild_test_stats_job(job, progress):
+    rebuild_test_stats()
+    db.session.commit()
+    return {'tests': db.session.query(db.func.count(TestStat.test_id)).scalar()}
+
+# tür -> (fonksiyon, en fazla deneme). İçe aktarmalar yarıda kalırsa tekrar çalıştırılmaz
+JOB_KINDS = {
+    'purge_test': (_purge_job(purge_test), 3),
+    'purge_course': (_purge_job(purge_course), 3),
+    'purge_user': (_purge_job(purge_user), 3),
+    'import_users': (_import_job(import_users), 1),
+    'import_enrollments': (_import_job(import_enrollments), 1),
+    'export_course_grades': (_export_job(course_grades_export), 3),
+    'export_test_results': (_export_job(test_results_export), 3),
+    'export_test_answers': (_export_job(test_answers_export), 3),
+    'rebuild_gradebook': (_rebuild_gradebook_job, 3),
+    'rebuild_test_stats': (_rebuild_test_stats_job, 3),
+}
+ADMIN_JOB_KINDS = ('rebuild_gradebook', 'rebuild_test_stats')
+
+# Keyset sayfalama: cursor son satırın id'sini taşır, sıralama id üzerinden sabittir
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(json.dumps({'after': last_id}).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        after = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))['after']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Gecersiz cursor')
+    if not isinstance(after, int):
+        raise ValueError('Gecersiz cursor')
+    return after
+
+def get_page_args():
+    # (limit, after) döner; sayfalama istenmemişse limit None
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', type=int)
+    if cursor is None and limit is None:
+        return None, None
+    limit = min(max(limit or app.config['DEFAULT_PAGE_SIZE'], 1), app.config['MAX_PAGE_SIZE'])
+    return limit, decode_cursor(cursor) if cursor else None
+
+def keyset_page(query, key_column, limit, after):
+    # limit + 1 satır okunur; fazlası varsa bir sonraki sayfa vardır
+    if after is not None:
+        query = query.filter(key_column > after)
+    query = query.order_by(key_column)
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def count_rows(query, key_column):
+    return query.with_entities(db.func.count(key_column)).order_by(None).scalar()
+
+def list_response(payload, total=None, next_cursor=None):
+    response = jsonify(payload)
+    if total is not None:
+        response.headers['X-Total-Count'] = str(total)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
+def prefix_pattern(value):
+    # LIKE joker karakterleri kaçırılır
+    return re.sub(r'([\\%_])', r'\\\1', value) + '%'
+
+# Kullanıcı id -> rol (kullanıcı yoksa None)
+user_cache = TTLCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+
+def get_user_role(user_id):
+    role = user_cache.get(user_id)
+    if role is _MISSING:
+        role = db.session.query(User.role).filter_by(id=user_id).scalar()
+        user_cache.set(user_id, role)
+    return role
+
+def invalidate_user_cache(user_id):
+    user_cache.pop(user_id)
+
+# Rol değişikliği veya silme: flush anında ve commit sonrasında önbellekten düşür
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _queue_user_cache_invalidation(mapper, connection, target):
+    invalidate_user_cache(target.id)
+    session = db.session.object_session(target)
+    if session is not None:
+        session.info.setdefault('invalidated_users', set()).add(target.id)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop('invalidated_users', ()):
+        invalidate_user_cache(user_id)
 
 # Helper function to check role
-def require_role(*roles):
+def require_role(*roles, locations=None, scope=None):
     def decorator(f):
         @wraps(f)
-        @jwt_required()
+        @jwt_required(locations=locations)
         def decorated_function(*args, **kwargs):
             current_user_id = int(get_jwt_identity())
-            user = User.query.filter_by(id=current_user_id).first()
-            if not user or user.role not in roles:
+            role = get_user_role(current_user_id)
+            # Token'daki rol güncel rolle uyuşmuyorsa (rol değişmiş) token geçersiz sayılır
+            claims = get_jwt()
+            claimed_role = claims.get('role')
+            if not role or role not in roles or (claimed_role is not None and claimed_role != role):
+                return jsonify({'error': 'Unauthorized'}), 403
+            # Kapsamlı (kısa ömürlü) token yalnızca kendi route'unda, URL'deki token yalnızca kapsamlıysa geçerlidir
+            if claims.get('scope') != scope and (claims.get('scope') is not None or get_jwt_request_location() == 'query_string'):
                 return jsonify({'error': 'Unauthorized'}), 403
             return f(*args, **kwargs)
+        decorated_function.required_roles = roles
         return decorated_function
     return decorator
 
@@ -156,8 +2776,16 @@ def login():
     
     user = User.query.filter_by(username=username).first()
     
-    if user and check_password_hash(user.password_hash, password):
-        access_token = create_access_token(identity=str(user.id))
+    try:
+        password_ok = user is not None and verify_password(user.password_hash, password)
+    except LoginQueueFull:
+        response = jsonify({'error': 'Sunucu su anda yogun, lutfen birkac saniye sonra tekrar deneyin'})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    
+    if password_ok:
+        access_token = create_access_token(identity=str(user.id), additional_claims={'role': user.role})
+        user_cache.set(user.id, user.role)
         return jsonify({
             'access_token': access_token,
             'user': {
@@ -257,23 +2885,54 @@ def create_user():
         print(f"ERROR - Kullanıcı oluşturma hatası: {str(e)}")
         return jsonify({'error': f'Kullanici olusturulurken hata: {str(e)}'}), 500
 
+@app.route('/api/admin/users/import', methods=['POST'])
+@require_role('admin')
+def import_users_upload():
+    # Gövde: CSV (username, email, password, role, full_name başlıklı) veya NDJSON
+    upload_format = get_upload_format()
+    if not upload_format:
+        return jsonify({'error': 'Desteklenen formatlar: csv, ndjson'}), 400
+    
+    if request.args.get('background', type=int):
+        params = {'format': upload_format, 'path': spool_upload(request.stream, upload_format)}
+        return job_response(enqueue_job('import_users', params=params, created_by=int(get_jwt_identity())),
+                            'Toplu kullanici olusturma arka planda baslatildi')
+    
+    try:
+        summary = import_users(iter_upload_rows(request.stream, upload_format))
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR - Toplu kullanici olusturma hatasi: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': f'Toplu kullanici olusturma sirasinda hata: {str(e)}'}), 500
+    
+    print(f"DEBUG - Toplu kullanici: {summary['inserted']} eklendi, {summary['rejected']} reddedildi ({summary['users_per_second']} kullanici/sn)")
+    return jsonify(summary), 200
+
 @app.route('/api/admin/users', methods=['GET'])
 @require_role('admin')
 def get_all_users():
     role = request.args.get('role')
-    query = User.query
+    course_id = request.args.get('course_id', type=int)
+    name_prefix = request.args.get('q', '').strip()
+    try:
+        limit, after = get_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    if role:
-        query = query.filter_by(role=role)
+    query = user_serializer.query()
     
-    users = query.all()
-    return jsonify([{
-        'id': u.id,
-        'username': u.username,
-        'email': u.email,
-        'role': u.role,
-        'full_name': u.full_name
-    } for u in users]), 200
+    if role:
+        query = query.filter(User.role == role)
+    if course_id:
+        query = query.join(Enrollment, Enrollment.student_id == User.id).filter(Enrollment.course_id == course_id)
+    if name_prefix:
+        pattern = prefix_pattern(name_prefix)
+        query = query.filter(db.or_(User.username.like(pattern, escape='\\'), User.full_name.like(pattern, escape='\\')))
+    
+    total = count_rows(query, User.id) if limit else None
+    users, next_cursor = keyset_page(query, User.id, limit, after)
+    return list_response(user_serializer.dump_all(users), total, next_cursor)
 
 @app.route('/api/admin/users/<int:user_id>', methods=['DELETE'])
 @require_role('admin')
@@ -293,49 +2952,54 @@ def delete_user(user_id):
     if user.username == 'admin':
         return jsonify({'error': 'Ana admin hesabi silinemez'}), 400
     
-    try:
-        # İlişkili kayıtları temizle (DOĞRU SIRADA)
-        if user.role == 'student':
-            print(f"DEBUG - Siliniyor: Öğrenci {user.username} (ID: {user_id})")
-            
-            # 1. Önce exam_attempts'leri bul
-            exam_attempts = ExamAttempt.query.filter_by(student_id=user_id).all()
-            print(f"DEBUG - {len(exam_attempts)} sınav girişimi bulundu")
-            
-            # 2. Her attempt için önce answers'ları sil
-            for attempt in exam_attempts:
-                Answer.query.filter_by(exam_attempt_id=attempt.id).delete()
-                print(f"DEBUG - Attempt {attempt.id} için cevaplar silindi")
-            
-            # 3. Şimdi exam_attempts'leri sil
-            ExamAttempt.query.filter_by(student_id=user_id).delete()
-            print(f"DEBUG - Sınav girişimleri silindi")
-            
-            # 4. Enrollment kayıtlarını sil
-            Enrollment.query.filter_by(student_id=user_id).delete()
-            print(f"DEBUG - Ders kayıtları silindi")
-            
-        elif user.role == 'instructor':
-            # Öğretim üyesinin derslerini kontrol et
-            courses = Course.query.filter_by(instructor_id=user_id).all()
-            if courses:
-                return jsonify({
-                    'error': f'Bu ogretim uyesinin {len(courses)} dersi var. Once dersleri silin veya baska ogretim uyesine atayin.'
-                }), 400
-        
-        # 5. En son kullanıcıyı sil
-        db.session.delete(user)
-        db.session.commit()
-        
-        print(f"DEBUG - Kullanıcı {user.username} başarıyla silindi")
-        return jsonify({'message': 'Kullanici basariyla silindi'}), 200
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"ERROR - Kullanıcı silme hatası: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': f'Kullanici silinirken hata: {str(e)}'}), 500
+    if user.role == 'instructor':
+        # Öğretim üyesinin derslerini kontrol et
+        course_count = Course.query.filter_by(instructor_id=user_id).count()
+        if course_count:
+            return jsonify({
+                'error': f'Bu ogretim uyesinin {course_count} dersi var. Once dersleri silin veya baska ogretim uyesine atayin.'
+            }), 400
+    
+    print(f"DEBUG - Siliniyor: Kullanıcı {user.username} (ID: {user_id})")
+    return purge_response('user', user_id, purge_user, 'Kullanici basariyla silindi')
+
+@app.route('/api/admin/metrics', methods=['GET'])
+@require_role('admin')
+def get_metrics():
+    if request.args.get('reset', type=int):
+        with sql_metrics_lock:
+            sql_metrics.clear()
+    
+    return jsonify({
+        'sql': sql_metrics_snapshot(),
+        'login': dict(login_stats),
+        'autosave': dict(autosave_stats, buffered_attempts=len(autosave_buffer)),
+        'exam_warmup': dict(
+            exam_warmup_stats,
+            cached_tests=len(exam_payload_cache),
+            hits=exam_payload_cache.hits,
+            misses=exam_payload_cache.misses
+        ),
+        'etag': etag_stats_snapshot(),
+        'exam_stream': exam_events.snapshot(),
+        'item_analysis': dict(item_analysis_stats, available=item_analysis is not None,
+                              cached_tests=len(item_analysis_cache)),
+        'jobs': dict(
+            job_stats,
+            running_here=len(running_jobs),
+            by_status=dict(db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all())
+        ),
+        'replica': {
+            'configured': 'replica' in app.config.get('SQLALCHEMY_BINDS', {}),
+            'available': replica_available(),
+            'routed_requests': replica_state['routed'],
+            'fallbacks': replica_state['fallbacks']
+        },
+        'caches': {
+            'user': {'size': len(user_cache), 'hits': user_cache.hits, 'misses': user_cache.misses},
+            'question_pool': {'size': len(question_pool_cache), 'hits': question_pool_cache.hits, 'misses': question_pool_cache.misses}
+        }
+    }), 200
 
 @app.route('/api/admin/courses', methods=['POST'])
 @require_role('admin')
@@ -363,20 +3027,27 @@ def create_course():
 
 @app.route('/api/admin/courses', methods=['GET'])
 @require_role('admin', 'department_head')
+@read_replica
 def get_all_courses():
-    courses = Course.query.all()
-    result = []
-    for course in courses:
-        instructor = User.query.filter_by(id=course.instructor_id).first()
-        result.append({
-            'id': course.id,
-            'code': course.code,
-            'name': course.name,
-            'instructor_id': course.instructor_id,
-            'instructor_name': instructor.full_name if instructor else None,
-            'student_count': len(course.enrollments)
-        })
-    return jsonify(result), 200
+    instructor_id = request.args.get('instructor_id', type=int)
+    name_prefix = request.args.get('q', '').strip()
+    try:
+        limit, after = get_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Eğitmen adı ve öğrenci sayısı aynı sorguda (ders başına ek sorgu yok)
+    query = admin_course_serializer.query().outerjoin(User, User.id == Course.instructor_id)
+    
+    if instructor_id:
+        query = query.filter(Course.instructor_id == instructor_id)
+    if name_prefix:
+        pattern = prefix_pattern(name_prefix)
+        query = query.filter(db.or_(Course.code.like(pattern, escape='\\'), Course.name.like(pattern, escape='\\')))
+    
+    total = count_rows(query, Course.id) if limit else None
+    courses, next_cursor = keyset_page(query, Course.id, limit, after)
+    return list_response(admin_course_serializer.dump_all(courses), total, next_cursor)
 
 @app.route('/api/admin/courses/<int:course_id>/instructor', methods=['PUT'])
 @require_role('admin')
@@ -400,6 +3071,7 @@ def update_course_instructor(course_id):
     course.instructor_id = new_instructor_id
     
     try:
+        bump_versions('course', [course_id])
         db.session.commit()
         print(f"DEBUG - Ders '{course.name}' öğretim üyesi değiştirildi: {old_instructor_id} -> {new_instructor_id}")
         
@@ -425,53 +3097,8 @@ def delete_course(course_id):
     if not course:
         return jsonify({'error': 'Ders bulunamadi'}), 404
     
-    try:
-        print(f"DEBUG - Siliniyor: Ders {course.name} (ID: {course_id})")
-        
-        # 1. Bu dersteki tüm testleri bul
-        tests = Test.query.filter_by(course_id=course_id).all()
-        print(f"DEBUG - {len(tests)} test bulundu")
-        
-        for test in tests:
-            # Her test için exam_attempts bul
-            exam_attempts = ExamAttempt.query.filter_by(test_id=test.id).all()
-            print(f"DEBUG - Test {test.id} için {len(exam_attempts)} sınav girişimi bulundu")
-            
-            # Her attempt için answers'ları sil
-            for attempt in exam_attempts:
-                Answer.query.filter_by(exam_attempt_id=attempt.id).delete()
-                print(f"DEBUG - Attempt {attempt.id} için cevaplar silindi")
-            
-            # Exam attempts'leri sil
-            ExamAttempt.query.filter_by(test_id=test.id).delete()
-            print(f"DEBUG - Test {test.id} için sınav girişimleri silindi")
-            
-            # Soruları sil
-            Question.query.filter_by(test_id=test.id).delete()
-            print(f"DEBUG - Test {test.id} için sorular silindi")
-        
-        # 2. Testleri sil
-        Test.query.filter_by(course_id=course_id).delete()
-        print(f"DEBUG - Tüm testler silindi")
-        
-        # 3. Enrollment kayıtlarını sil
-        enrollments_count = Enrollment.query.filter_by(course_id=course_id).count()
-        Enrollment.query.filter_by(course_id=course_id).delete()
-        print(f"DEBUG - {enrollments_count} öğrenci kaydı silindi")
-        
-        # 4. Dersi sil
-        db.session.delete(course)
-        db.session.commit()
-        
-        print(f"DEBUG - Ders '{course.name}' başarıyla silindi")
-        return jsonify({'message': 'Ders basariyla silindi'}), 200
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"ERROR - Ders silme hatası: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': f'Ders silinirken hata: {str(e)}'}), 500
+    print(f"DEBUG - Siliniyor: Ders {course.name} (ID: {course_id})")
+    return purge_response('course', course_id, purge_course, 'Ders basariyla silindi')
 
 @app.route('/api/admin/enrollments', methods=['POST'])
 @require_role('admin')
@@ -493,6 +3120,9 @@ def create_enrollment():
     )
     
     db.session.add(enrollment)
+    db.session.flush()
+    refresh_gradebook(enrollment.course_id, [enrollment.student_id], enrolled=1)
+    bump_versions('student', [enrollment.student_id])
     db.session.commit()
     
     return jsonify({
@@ -501,44 +3131,53 @@ def create_enrollment():
         'course_id': enrollment.course_id
     }), 201
 
+@app.route('/api/admin/enrollments/import', methods=['POST'])
+@require_role('admin')
+def import_enrollments_upload():
+    # Gövde: CSV (username|student_id, course_code|course_id başlıklı) veya NDJSON
+    upload_format = get_upload_format()
+    if not upload_format:
+        return jsonify({'error': 'Desteklenen formatlar: csv, ndjson'}), 400
+    
+    if request.args.get('background', type=int):
+        params = {'format': upload_format, 'path': spool_upload(request.stream, upload_format)}
+        return job_response(enqueue_job('import_enrollments', params=params, created_by=int(get_jwt_identity())),
+                            'Toplu kayit arka planda baslatildi')
+    
+    try:
+        started = time.perf_counter()
+        summary = import_enrollments(iter_upload_rows(request.stream, upload_format))
+        summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR - Toplu kayit hatasi: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': f'Toplu kayit sirasinda hata: {str(e)}'}), 500
+    
+    print(f"DEBUG - Toplu kayit: {summary['inserted']} eklendi, {summary['skipped']} atlandi, {summary['rejected']} reddedildi")
+    return jsonify(summary), 200
+
 # Instructor Routes
 @app.route('/api/instructor/courses', methods=['GET'])
 @require_role('instructor')
 def get_instructor_courses():
     current_user_id = int(get_jwt_identity())
-    courses = Course.query.filter_by(instructor_id=current_user_id).all()
-    
-    result = []
-    for course in courses:
-        result.append({
-            'id': course.id,
-            'code': course.code,
-            'name': course.name,
-            'student_count': len(course.enrollments),
-            'test_count': len(course.tests)
-        })
-    return jsonify(result), 200
+    courses = instructor_course_serializer.query().filter(
+        Course.instructor_id == current_user_id).order_by(Course.id).all()
+    return jsonify(instructor_course_serializer.dump_all(courses)), 200
 
 @app.route('/api/instructor/courses/<int:course_id>/students', methods=['GET'])
 @require_role('instructor')
 def get_course_students(course_id):
     current_user_id = int(get_jwt_identity())
-    course = Course.query.filter_by(id=course_id).first()
+    instructor_id = db.session.query(Course.instructor_id).filter(Course.id == course_id).scalar()
     
-    if not course or course.instructor_id != current_user_id:
+    if instructor_id != current_user_id:
         return jsonify({'error': 'Course not found or unauthorized'}), 404
     
-    students = []
-    for enrollment in course.enrollments:
-        student = enrollment.student
-        students.append({
-            'id': student.id,
-            'username': student.username,
-            'full_name': student.full_name,
-            'email': student.email
-        })
-    
-    return jsonify(students), 200
+    students = student_serializer.query().join(Enrollment, Enrollment.student_id == User.id).filter(
+        Enrollment.course_id == course_id).order_by(Enrollment.id).all()
+    return jsonify(student_serializer.dump_all(students)), 200
 
 @app.route('/api/instructor/tests', methods=['POST'])
 @require_role('instructor')
@@ -594,6 +3233,9 @@ def create_test():
     )
     
     db.session.add(test)
+    db.session.flush()
+    db.session.add(TestStat(test_id=test.id))
+    bump_versions('course', [test.course_id])
     db.session.commit()
     
     return jsonify({
@@ -613,29 +3255,55 @@ def get_instructor_tests():
     current_user_id = int(get_jwt_identity())
     course_id = request.args.get('course_id', type=int)
     
-    query = Test.query.join(Course).filter(Course.instructor_id == current_user_id)
+    name_prefix = request.args.get('q', '').strip()
+    try:
+        limit, after = get_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = test_serializer.query().join(Course, Course.id == Test.course_id).filter(
+        Course.instructor_id == current_user_id)
     
     if course_id:
         query = query.filter(Test.course_id == course_id)
+    if name_prefix:
+        query = query.filter(Test.name.like(prefix_pattern(name_prefix), escape='\\'))
+    
+    total = count_rows(query, Test.id) if limit else None
+    tests, next_cursor = keyset_page(query, Test.id, limit, after)
+    return list_response(test_serializer.dump_all(tests), total, next_cursor)
+
+@app.route('/api/instructor/tests/<int:test_id>/weight', methods=['PUT'])
+@require_role('instructor')
+def update_test_weight(test_id):
+    data = request.get_json()
+    current_user_id = int(get_jwt_identity())
     
-    tests = query.all()
+    test = Test.query.filter_by(id=test_id).first()
+    if not test or test.course.instructor_id != current_user_id:
+        return jsonify({'error': 'Test not found or unauthorized'}), 404
     
-    result = []
-    for test in tests:
-        result.append({
-            'id': test.id,
-            'course_id': test.course_id,
-            'course_name': test.course.name,
-            'name': test.name,
-            'weight': test.weight,
-            'start_time': test.start_time.isoformat(),
-            'end_time': test.end_time.isoformat(),
-            'duration_minutes': test.duration_minutes,
-            'question_pool_count': len(test.questions),
-            'question_count': test.question_count
-        })
+    try:
+        weight = float(data.get('weight'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Agirlik gerekli'}), 400
     
-    return jsonify(result), 200
+    if weight <= 0 or weight > 100:
+        return jsonify({'error': 'Agirlik 0 ile 100 arasinda olmalidir'}), 400
+    
+    test.weight = weight
+    
+    # Ağırlık değişince dersin tüm final notları yeniden hesaplanır
+    refresh_gradebook(test.course_id)
+    bump_versions('course', [test.course_id])
+    db.session.commit()
+    
+    return jsonify({
+        'id': test.id,
+        'course_id': test.course_id,
+        'name': test.name,
+        'weight': test.weight
+    }), 200
 
 @app.route('/api/instructor/questions', methods=['POST'])
 @require_role('instructor')
@@ -659,7 +3327,10 @@ def create_question():
     )
     
     db.session.add(question)
+    bump_versions('course', [test.course_id])
+    bump_versions('test', [test.id])
     db.session.commit()
+    invalidate_question_pool(question.test_id)
     
     return jsonify({
         'id': question.id,
@@ -695,7 +3366,10 @@ def delete_question(question_id):
         
         # Soruyu sil
         db.session.delete(question)
+        bump_versions('course', [test.course_id])
+        bump_versions('test', [test.id])
         db.session.commit()
+        invalidate_question_pool(test.id)
         
         print(f"DEBUG - Soru basariyla silindi")
         return jsonify({'message': 'Soru basariyla silindi'}), 200
@@ -705,112 +3379,273 @@ def delete_question(question_id):
         print(f"ERROR - Soru silme hatasi: {str(e)}")
         return jsonify({'error': f'Soru silinirken hata: {str(e)}'}), 500
 
-@app.route('/api/instructor/tests/<int:test_id>', methods=['DELETE'])
+@app.route('/api/instructor/tests/<int:test_id>', methods=['DELETE'])
+@require_role('instructor')
+def delete_test(test_id):
+    current_user_id = int(get_jwt_identity())
+    
+    test = Test.query.filter_by(id=test_id).first()
+    if not test:
+        return jsonify({'error': 'Test bulunamadi'}), 404
+    
+    # Test'in öğretim üyesi kontrolü
+    if test.course.instructor_id != current_user_id:
+        return jsonify({'error': 'Bu testi silme yetkiniz yok'}), 403
+    
+    print(f"DEBUG - Test siliniyor: {test.name} (ID: {test_id})")
+    return purge_response('test', test_id, purge_test, 'Test basariyla silindi')
+
+# Arka plan işleri: kullanıcı kendi işlerini, admin tüm işleri görür
+def get_owned_job(job_id):
+    current_user_id = int(get_jwt_identity())
+    job = db.session.get(Job, job_id)
+    if not job or (job.created_by != current_user_id and get_user_role(current_user_id) != 'admin'):
+        return None
+    return job
+
+@app.route('/api/jobs', methods=['GET'])
+@require_role('admin', 'instructor')
+def get_jobs():
+    current_user_id = int(get_jwt_identity())
+    query = Job.query
+    if get_user_role(current_user_id) != 'admin':
+        query = query.filter(Job.created_by == current_user_id)
+    for field in ('status', 'kind'):
+        if request.args.get(field):
+            query = query.filter(getattr(Job, field) == request.args[field])
+    limit = min(request.args.get('limit', 50, type=int), app.config['MAX_PAGE_SIZE'])
+    return jsonify([job_payload(job) for job in query.order_by(Job.created_at.desc()).limit(limit)]), 200
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@app.route('/api/purge-jobs/<job_id>', methods=['GET'])
+@require_role('admin', 'instructor')
+def get_job(job_id):
+    job = get_owned_job(job_id)
+    if not job:
+        return jsonify({'error': 'Is bulunamadi'}), 404
+    return jsonify(job_payload(job)), 200
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@require_role('admin', 'instructor')
+def cancel_job(job_id):
+    job = get_owned_job(job_id)
+    if not job:
+        return jsonify({'error': 'Is bulunamadi'}), 404
+    
+    # Kuyruktaki iş hemen iptal edilir; çalışan iş bir sonraki ilerleme noktasında durur
+    cancelled = db.session.execute(db.update(Job).where(Job.id == job_id, Job.status == 'queued').values(
+        status='cancelled', cancel_requested=True, finished_at=datetime.utcnow())).rowcount
+    if not cancelled:
+        if job.status != 'running':
+            return jsonify({'error': f'Is zaten bitmis ({job.status})'}), 409
+        db.session.execute(db.update(Job).where(Job.id == job_id).values(cancel_requested=True))
+    db.session.commit()
+    
+    job = db.session.get(Job, job_id)
+    if job.status == 'cancelled':
+        remove_job_files(job.id, json.loads(job.params or '{}'))
+    return jsonify(job_payload(job)), 200 if job.status == 'cancelled' else 202
+
+@app.route('/api/jobs/<job_id>/retry', methods=['POST'])
+@require_role('admin', 'instructor')
+def retry_job(job_id):
+    job = get_owned_job(job_id)
+    if not job:
+        return jsonify({'error': 'Is bulunamadi'}), 404
+    if job.status not in ('failed', 'cancelled'):
+        return jsonify({'error': 'Sadece basarisiz veya iptal edilmis isler tekrar calistirilabilir'}), 409
+    if job.kind.startswith('import_'):
+        return jsonify({'error': 'Ice aktarma isleri dosya yeniden yuklenerek baslatilmalidir'}), 409
+    
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(
+        status='queued', attempts=0, cancel_requested=False, error=None, result=None,
+        run_after=datetime.utcnow(), finished_at=None))
+    db.session.commit()
+    if app.config['JOB_POLL_INTERVAL'] > 0:
+        dispatch_jobs()
+    return job_response(job_id, 'Is tekrar kuyruga alindi')
+
+@app.route('/api/jobs/<job_id>/download', methods=['GET'])
+@require_role('admin', 'instructor')
+def download_job_result(job_id):
+    job = get_owned_job(job_id)
+    if not job or not job.kind.startswith('export_'):
+        return jsonify({'error': 'Is bulunamadi'}), 404
+    if job.status != 'completed':
+        return jsonify({'error': f'Is henuz tamamlanmadi ({job.status})'}), 409
+    
+    export_format = json.loads(job.params)['format']
+    path = job_file_path(job.id, export_format)
+    if not os.path.exists(path):
+        return jsonify({'error': 'Dosya artik mevcut degil'}), 410
+    return send_file(path, mimetype='application/x-ndjson' if export_format == 'ndjson' else 'text/csv',
+                     as_attachment=True, download_name=json.loads(job.result)['filename'])
+
+@app.route('/api/admin/jobs', methods=['POST'])
+@require_role('admin')
+def create_admin_job():
+    data = request.get_json(silent=True) or {}
+    kind = data.get('kind')
+    if kind not in ADMIN_JOB_KINDS:
+        return jsonify({'error': f'kind su degerlerden biri olmalidir: {", ".join(ADMIN_JOB_KINDS)}'}), 400
+    return job_response(enqueue_job(kind, created_by=int(get_jwt_identity())), 'Is kuyruga alindi')
+
+@app.route('/api/instructor/questions', methods=['GET'])
 @require_role('instructor')
-def delete_test(test_id):
+def get_questions():
     current_user_id = int(get_jwt_identity())
+    test_id = request.args.get('test_id', type=int)
     
-    test = Test.query.filter_by(id=test_id).first()
-    if not test:
-        return jsonify({'error': 'Test bulunamadi'}), 404
+    if not test_id:
+        return jsonify({'error': 'test_id required'}), 400
     
-    # Test'in öğretim üyesi kontrolü
-    if test.course.instructor_id != current_user_id:
-        return jsonify({'error': 'Bu testi silme yetkiniz yok'}), 403
+    instructor_id = db.session.query(Course.instructor_id).join(Test, Test.course_id == Course.id).filter(
+        Test.id == test_id).scalar()
+    if instructor_id != current_user_id:
+        return jsonify({'error': 'Test not found or unauthorized'}), 404
     
     try:
-        print(f"DEBUG - Test siliniyor: {test.name} (ID: {test_id})")
-        
-        # 1. Exam attempts bul
-        exam_attempts = ExamAttempt.query.filter_by(test_id=test_id).all()
-        print(f"DEBUG - {len(exam_attempts)} sinav girisimi bulundu")
-        
-        # 2. Her attempt için answers'ları sil
-        for attempt in exam_attempts:
-            Answer.query.filter_by(exam_attempt_id=attempt.id).delete()
-        
-        # 3. Exam attempts'leri sil
-        ExamAttempt.query.filter_by(test_id=test_id).delete()
-        print(f"DEBUG - Sinav girisimleri silindi")
-        
-        # 4. Soruları sil
-        Question.query.filter_by(test_id=test_id).delete()
-        print(f"DEBUG - Sorular silindi")
-        
-        # 5. Testi sil
-        db.session.delete(test)
-        db.session.commit()
-        
-        print(f"DEBUG - Test '{test.name}' basariyla silindi")
-        return jsonify({'message': 'Test basariyla silindi'}), 200
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"ERROR - Test silme hatasi: {str(e)}")
-        return jsonify({'error': f'Test silinirken hata: {str(e)}'}), 500
+        limit, after = get_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = question_serializer.query().filter(Question.test_id == test_id)
+    total = count_rows(query, Question.id) if limit else None
+    questions, next_cursor = keyset_page(query, Question.id, limit, after)
+    return list_response(question_serializer.dump_all(questions), total, next_cursor)
 
-@app.route('/api/instructor/questions', methods=['GET'])
+@app.route('/api/instructor/questions/analysis', methods=['GET'])
 @require_role('instructor')
-def get_questions():
+@read_replica
+def get_question_analysis():
     current_user_id = int(get_jwt_identity())
     test_id = request.args.get('test_id', type=int)
     
     if not test_id:
         return jsonify({'error': 'test_id required'}), 400
     
-    test = Test.query.filter_by(id=test_id).first()
-    if not test or test.course.instructor_id != current_user_id:
+    instructor_id = db.session.query(Course.instructor_id).join(Test, Test.course_id == Course.id).filter(
+        Test.id == test_id).scalar()
+    if instructor_id != current_user_id:
         return jsonify({'error': 'Test not found or unauthorized'}), 404
     
-    questions = Question.query.filter_by(test_id=test_id).all()
+    if item_analysis is None:
+        return jsonify({'error': 'Madde analizi icin numpy kurulu olmali'}), 501
     
-    return jsonify([{
-        'id': q.id,
-        'test_id': q.test_id,
-        'question_text': q.question_text,
-        'option_a': q.option_a,
-        'option_b': q.option_b,
-        'option_c': q.option_c,
-        'option_d': q.option_d,
-        'correct_answer': q.correct_answer,
-        'points': q.points
-    } for q in questions]), 200
+    return jsonify(test_item_analysis(test_id)), 200
 
 @app.route('/api/instructor/tests/<int:test_id>/results', methods=['GET'])
 @require_role('instructor')
+@read_replica
 def get_test_results(test_id):
     current_user_id = int(get_jwt_identity())
     
-    test = Test.query.filter_by(id=test_id).first()
-    if not test or test.course.instructor_id != current_user_id:
+    test_name = db.session.query(Test.name).join(Course, Course.id == Test.course_id).filter(
+        Test.id == test_id, Course.instructor_id == current_user_id).scalar()
+    if test_name is None:
         return jsonify({'error': 'Test not found or unauthorized'}), 404
     
-    attempts = ExamAttempt.query.filter_by(test_id=test_id).all()
-    
+    state = request.args.get('state')
+    name_prefix = request.args.get('q', '').strip()
+    if state not in (None, 'submitted', 'in_progress'):
+        return jsonify({'error': 'state submitted veya in_progress olmalidir'}), 400
+    try:
+        limit, after = get_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = db.session.query(
+        ExamAttempt.id, ExamAttempt.student_id, User.full_name, ExamAttempt.score,
+        ExamAttempt.max_score, ExamAttempt.submitted_at
+    ).join(User, User.id == ExamAttempt.student_id).filter(ExamAttempt.test_id == test_id)
+    
+    if state == 'submitted':
+        query = query.filter(ExamAttempt.submitted_at.isnot(None))
+    elif state == 'in_progress':
+        query = query.filter(ExamAttempt.submitted_at.is_(None))
+    if name_prefix:
+        query = query.filter(User.full_name.like(prefix_pattern(name_prefix), escape='\\'))
+    
+    total = count_rows(query, ExamAttempt.id) if limit else None
+    attempts, next_cursor = keyset_page(query, ExamAttempt.id, limit, after)
+    
+    distribution = score_distribution(test_id)
     results = []
-    total_score = 0
     for attempt in attempts:
-        student = attempt.student
-        total_score += attempt.score if attempt.score else 0
         results.append({
-            'student_id': student.id,
-            'student_name': student.full_name,
+            'student_id': attempt.student_id,
+            'student_name': attempt.full_name,
             'score': attempt.score,
             'max_score': attempt.max_score,
             'percentage': (attempt.score / attempt.max_score * 100) if attempt.max_score else 0,
+            'percentile_rank': distribution.percentile_rank(attempt.score, attempt.max_score) if attempt.submitted_at else None,
             'submitted_at': attempt.submitted_at.isoformat() if attempt.submitted_at else None
         })
     
-    average = total_score / len(attempts) if attempts else 0
-    max_score = test.questions[0].points * len(test.questions) if test.questions else 0
+    summary = test_score_summary(test_id)
+    average = summary['average']
+    # Soru havuzu önbellekten okunur (havuzun tamamı ORM nesnesi olarak yüklenmez)
+    pool = get_question_pool(test_id)
+    max_score = pool[0]['points'] * len(pool) if pool else 0
     
-    return jsonify({
+    return list_response({
         'test_id': test_id,
-        'test_name': test.name,
+        'test_name': test_name,
         'average_score': average,
         'average_percentage': (average / max_score * 100) if max_score else 0,
+        'submitted_count': summary['count'],
+        'std_dev_score': summary['std_dev'],
+        'lowest_score': summary['lowest'],
+        'highest_score': summary['highest'],
+        'distribution': distribution.summary(),
         'results': results
-    }), 200
+    }, total, next_cursor)
+
+@app.route('/api/instructor/tests/<int:test_id>/live-token', methods=['POST'])
+@require_role('instructor')
+def create_live_token(test_id):
+    # EventSource başlık gönderemez; URL'ye 24 saatlik erişim token'ı yerine bu teste özel kısa ömürlü token konur
+    current_user_id = int(get_jwt_identity())
+    owned = db.session.query(Test.id).join(Course).filter(
+        Test.id == test_id, Course.instructor_id == current_user_id).scalar()
+    if owned is None:
+        return jsonify({'error': 'Test not found or unauthorized'}), 404
+    
+    ttl = app.config['EXAM_STREAM_TOKEN_TTL']
+    token = create_access_token(identity=str(current_user_id), expires_delta=timedelta(seconds=ttl),
+                                additional_claims={'role': 'instructor', 'scope': 'live', 'test_id': test_id})
+    return jsonify({'token': token, 'expires_in': ttl}), 200
+
+@app.route('/api/instructor/tests/<int:test_id>/live', methods=['GET'])
+@require_role('instructor', locations=['headers', 'query_string'], scope='live')
+def stream_test_events(test_id):
+    # Token Authorization başlığıyla ya da ?jwt= ile (yalnızca /live-token'dan alınan, bu teste özel token) verilir
+    current_user_id = int(get_jwt_identity())
+    if get_jwt().get('scope') == 'live' and get_jwt().get('test_id') != test_id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    course_id = db.session.query(Test.course_id).join(Course).filter(
+        Test.id == test_id, Course.instructor_id == current_user_id).scalar()
+    if course_id is None:
+        return jsonify({'error': 'Test not found or unauthorized'}), 404
+    
+    subscriber, snapshot = exam_events.subscribe(test_id, lambda: load_exam_stream_state(test_id, course_id))
+    heartbeat = app.config['EXAM_STREAM_HEARTBEAT']
+    
+    # stream_with_context kullanılmaz: istek bağlamı (ve DB bağlantısı) akış başlamadan bırakılır
+    def events():
+        try:
+            yield b'retry: 3000\n' + snapshot
+            while True:
+                message = subscriber.next(heartbeat)
+                if message is ExamStreamSubscriber.OVERFLOW:
+                    yield _sse('overflow', {'reconnect': True})
+                    return
+                yield message if message is not None else b': ping\n\n'
+        finally:
+            exam_events.unsubscribe(test_id, subscriber)
+    
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/instructor/courses/<int:course_id>/weight-summary', methods=['GET'])
 @require_role('instructor')
@@ -838,6 +3673,7 @@ def get_course_weight_summary(course_id):
 
 @app.route('/api/instructor/courses/<int:course_id>/grades', methods=['GET'])
 @require_role('instructor')
+@read_replica
 def get_course_grades(course_id):
     current_user_id = int(get_jwt_identity())
     course = Course.query.filter_by(id=course_id).first()
@@ -845,43 +3681,13 @@ def get_course_grades(course_id):
     if not course or course.instructor_id != current_user_id:
         return jsonify({'error': 'Course not found or unauthorized'}), 404
     
-    # Get all tests for this course
-    tests = Test.query.filter_by(course_id=course_id).all()
-    
-    # Get all enrolled students
-    students = [e.student for e in course.enrollments]
-    
     results = []
-    for student in students:
-        student_grades = {}
-        total_weighted_score = 0
-        total_weight = 0
-        
-        for test in tests:
-            attempt = ExamAttempt.query.filter_by(
-                student_id=student.id,
-                test_id=test.id
-            ).first()
-            
-            if attempt and attempt.score is not None:
-                percentage = (attempt.score / attempt.max_score * 100) if attempt.max_score else 0
-                weighted_score = percentage * (test.weight / 100)
-                student_grades[test.name] = {
-                    'score': attempt.score,
-                    'max_score': attempt.max_score,
-                    'percentage': percentage,
-                    'weight': test.weight
-                }
-                total_weighted_score += weighted_score
-                total_weight += test.weight
-        
-        final_grade = (total_weighted_score / total_weight * 100) if total_weight > 0 else 0
-        
+    for row in iter_course_grades(course_id):
         results.append({
-            'student_id': student.id,
-            'student_name': student.full_name,
-            'grades': student_grades,
-            'final_grade': final_grade
+            'student_id': row['student_id'],
+            'student_name': row['student_name'],
+            'grades': row['grades'],
+            'final_grade': row['final_grade'] if row['final_grade'] is not None else 0
         })
     
     return jsonify({
@@ -890,234 +3696,151 @@ def get_course_grades(course_id):
         'student_grades': results
     }), 200
 
-# Student Routes
-@app.route('/api/student/courses', methods=['GET'])
-@require_role('student')
-def get_student_courses():
+@app.route('/api/instructor/courses/<int:course_id>/grades/export', methods=['GET'])
+@require_role('instructor')
+def export_course_grades(course_id):
     current_user_id = int(get_jwt_identity())
+    course = Course.query.filter_by(id=course_id).first()
     
-    enrollments = Enrollment.query.filter_by(student_id=current_user_id).all()
+    if not course or course.instructor_id != current_user_id:
+        return jsonify({'error': 'Course not found or unauthorized'}), 404
     
-    result = []
-    for enrollment in enrollments:
-        course = enrollment.course
-        instructor = course.instructor
-        result.append({
-            'id': course.id,
-            'code': course.code,
-            'name': course.name,
-            'instructor_name': instructor.full_name if instructor else None,
-            'test_count': len(course.tests)
-        })
+    export_format = get_export_format()
+    if not export_format:
+        return jsonify({'error': 'format csv veya ndjson olmalidir'}), 400
     
-    return jsonify(result), 200
+    if request.args.get('background', type=int):
+        return job_response(enqueue_job('export_course_grades', course_id, {'format': export_format}, current_user_id),
+                            'Disa aktarma arka planda baslatildi')
+    
+    rows, columns, filename = course_grades_export(course_id, export_format)
+    return stream_export(rows, columns, export_format, filename)
 
-@app.route('/api/student/tests', methods=['GET'])
-@require_role('student')
-def get_available_tests():
+@app.route('/api/instructor/tests/<int:test_id>/results/export', methods=['GET'])
+@require_role('instructor')
+def export_test_results(test_id):
     current_user_id = int(get_jwt_identity())
     
-    # Get all courses the student is enrolled in
-    enrollments = Enrollment.query.filter_by(student_id=current_user_id).all()
-    course_ids = [e.course_id for e in enrollments]
-    
-    # Get all tests for these courses
-    tests = Test.query.filter(Test.course_id.in_(course_ids)).all()
+    test = Test.query.filter_by(id=test_id).first()
+    if not test or test.course.instructor_id != current_user_id:
+        return jsonify({'error': 'Test not found or unauthorized'}), 404
     
-    result = []
-    now = datetime.now()
+    export_format = get_export_format()
+    if not export_format:
+        return jsonify({'error': 'format csv veya ndjson olmalidir'}), 400
     
-    for test in tests:
-        # Check if student has already attempted
-        attempt = ExamAttempt.query.filter_by(
-            student_id=current_user_id,
-            test_id=test.id
-        ).first()
-        
-        status = 'not_started'
-        if attempt:
-            status = 'completed' if attempt.submitted_at else 'in_progress'
-        elif now < test.start_time:
-            status = 'upcoming'
-        elif now >= test.start_time and now <= test.end_time:
-            status = 'available'
-        elif now > test.end_time:
-            status = 'expired'
-        
-        result.append({
-            'id': test.id,
-            'course_id': test.course_id,
-            'course_name': test.course.name,
-            'name': test.name,
-            'start_time': test.start_time.isoformat(),
-            'end_time': test.end_time.isoformat(),
-            'duration_minutes': test.duration_minutes,
-            'status': status,
-            'has_attempt': attempt is not None,
-            'score': attempt.score if attempt else None
-        })
+    if request.args.get('background', type=int):
+        return job_response(enqueue_job('export_test_results', test_id, {'format': export_format}, current_user_id),
+                            'Disa aktarma arka planda baslatildi')
     
-    return jsonify(result), 200
+    rows, columns, filename = test_results_export(test_id, export_format)
+    return stream_export(rows, columns, export_format, filename)
 
-@app.route('/api/student/tests/<int:test_id>/start', methods=['POST'])
-@require_role('student')
-def start_test(test_id):
+@app.route('/api/instructor/tests/<int:test_id>/answers/export', methods=['GET'])
+@require_role('instructor')
+def export_test_answers(test_id):
     current_user_id = int(get_jwt_identity())
     
     test = Test.query.filter_by(id=test_id).first()
-    if not test:
-        return jsonify({'error': 'Test not found'}), 404
-    
-    # Check if student is enrolled
-    enrollment = Enrollment.query.filter_by(
-        student_id=current_user_id,
-        course_id=test.course_id
-    ).first()
-    
-    if not enrollment:
-        return jsonify({'error': 'Not enrolled in this course'}), 403
-    
-    # Check if test is available (timezone-aware karşılaştırma)
-    now = datetime.now()
-    if now < test.start_time:
-        return jsonify({'error': 'Test henuz baslamadi'}), 400
-    if now > test.end_time:
-        return jsonify({'error': 'Test suresi doldu'}), 400
+    if not test or test.course.instructor_id != current_user_id:
+        return jsonify({'error': 'Test not found or unauthorized'}), 404
     
-    # Check if already attempted
-    existing_attempt = ExamAttempt.query.filter_by(
-        student_id=current_user_id,
-        test_id=test_id
-    ).first()
+    export_format = get_export_format()
+    if not export_format:
+        return jsonify({'error': 'format csv veya ndjson olmalidir'}), 400
     
-    if existing_attempt and existing_attempt.submitted_at:
-        return jsonify({'error': 'Test already completed'}), 400
+    if request.args.get('background', type=int):
+        return job_response(enqueue_job('export_test_answers', test_id, {'format': export_format}, current_user_id),
+                            'Disa aktarma arka planda baslatildi')
     
-    if existing_attempt:
-        attempt = existing_attempt
-    else:
-        # Create new attempt
-        attempt = ExamAttempt(
-            student_id=current_user_id,
-            test_id=test_id,
-            started_at=datetime.now()
-        )
-        db.session.add(attempt)
-        db.session.commit()
+    rows, columns, filename = test_answers_export(test_id, export_format)
+    return stream_export(rows, columns, export_format, filename)
+
+@app.route('/api/student/courses', methods=['GET'])
+@require_role('student')
+def get_student_courses():
+    current_user_id = int(get_jwt_identity())
     
-    # Soru havuzundan rastgele seçim
-    all_questions = Question.query.filter_by(test_id=test_id).all()
+    version = dashboard_version(current_user_id)
+    not_modified = etag_not_modified(version)
+    if not_modified:
+        return not_modified
     
-    # Soru havuzunda yeterli soru var mı kontrol et
-    if len(all_questions) < test.question_count:
-        return jsonify({
-            'error': f'Soru havuzunda yeterli soru yok! Gerekli: {test.question_count}, Mevcut: {len(all_questions)}'
-        }), 400
+    courses = student_course_serializer.query().join(Enrollment, Enrollment.course_id == Course.id).outerjoin(
+        User, User.id == Course.instructor_id).filter(Enrollment.student_id == current_user_id).order_by(
+        Enrollment.id).all()
+    return etag_response(student_course_serializer.dump_all(courses), version)
+
+@app.route('/api/student/tests', methods=['GET'])
+@require_role('student')
+def get_available_tests():
+    current_user_id = int(get_jwt_identity())
     
-    # Test'te belirlenen sayıda soru seç (rastgele)
-    questions = Question.query.filter_by(test_id=test_id).order_by(db.func.random()).limit(test.question_count).all()
+    version = dashboard_version(current_user_id)
+    not_modified = etag_not_modified(version)
+    if not_modified:
+        return not_modified
     
-    print(f"DEBUG - Soru havuzu: {len(all_questions)} soru, Seçilen: {len(questions)} soru")
+    result, valid_until = available_tests(current_user_id)
+    return etag_response(result, version, valid_until)
+
+@app.route('/api/student/tests/<int:test_id>/start', methods=['POST'])
+@require_role('student')
+def start_test(test_id):
+    current_user_id = int(get_jwt_identity())
     
-    # Calculate max score
-    max_score = sum(q.points for q in questions)
+    try:
+        body = open_exam_attempt(current_user_id, test_id)
+    except ExamRequestError as e:
+        return jsonify({'error': e.message}), e.status
     
-    return jsonify({
-        'attempt_id': attempt.id,
-        'test_id': test_id,
-        'test_name': test.name,
-        'duration_minutes': test.duration_minutes,
-        'started_at': attempt.started_at.isoformat(),
-        'end_time': test.end_time.isoformat(),
-        'max_score': max_score,
-        'questions': [{
-            'id': q.id,
-            'question_text': q.question_text,
-            'option_a': q.option_a,
-            'option_b': q.option_b,
-            'option_c': q.option_c,
-            'option_d': q.option_d,
-            'points': q.points
-        } for q in questions]
-    }), 200
+    return app.response_class(body, status=200, mimetype='application/json')
 
-@app.route('/api/student/tests/<int:test_id>/submit', methods=['POST'])
+@app.route('/api/student/tests/<int:test_id>/autosave', methods=['POST'])
 @require_role('student')
-def submit_test(test_id):
+def autosave_answers(test_id):
     current_user_id = int(get_jwt_identity())
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     
-    attempt = ExamAttempt.query.filter_by(
+    answers = normalize_answers(data.get('answers') or {})
+    if not answers:
+        return jsonify({'error': 'answers gerekli'}), 400
+    
+    attempt = db.session.query(ExamAttempt.id, ExamAttempt.submitted_at).filter_by(
         student_id=current_user_id,
         test_id=test_id
     ).first()
     
     if not attempt:
         return jsonify({'error': 'Test attempt not found'}), 404
-    
     if attempt.submitted_at:
         return jsonify({'error': 'Test already submitted'}), 400
     
-    test = Test.query.filter_by(id=test_id).first()
-    now = datetime.now()
-    
-    # Auto-submit if time expired
-    if now > test.end_time:
-        now = test.end_time
-    
-    # Save answers and calculate score
-    answers_data = data.get('answers', {})
-    total_score = 0
-    max_score = 0
-    
-    for question_id, selected_answer in answers_data.items():
-        question = Question.query.filter_by(id=int(question_id)).first()
-        if not question or question.test_id != test_id:
-            continue
-        
-        max_score += question.points
-        is_correct = (selected_answer.upper() == question.correct_answer.upper())
-        points_earned = question.points if is_correct else 0
-        total_score += points_earned
-        
-        # Check if answer already exists
-        existing_answer = Answer.query.filter_by(
-            exam_attempt_id=attempt.id,
-            question_id=question.id
-        ).first()
-        
-        if existing_answer:
-            existing_answer.selected_answer = selected_answer.upper()
-            existing_answer.is_correct = is_correct
-            existing_answer.points_earned = points_earned
-        else:
-            answer = Answer(
-                exam_attempt_id=attempt.id,
-                question_id=question.id,
-                selected_answer=selected_answer.upper(),
-                is_correct=is_correct,
-                points_earned=points_earned
-            )
-            db.session.add(answer)
+    payload = get_exam_payload(test_id)
+    if payload and datetime.now() > payload['end_time']:
+        return jsonify({'error': 'Test suresi doldu'}), 400
     
-    attempt.score = total_score
-    attempt.max_score = max_score
-    attempt.submitted_at = now
+    # Cevaplar hemen yazılmaz; eşik aşıldıysa bu istek toplu yazmayı tetikler
+    if stage_autosave(attempt.id, test_id, answers):
+        flush_autosaves()
     
-    db.session.commit()
+    return jsonify({'attempt_id': attempt.id, 'staged': len(answers)}), 202
+
+@app.route('/api/student/tests/<int:test_id>/submit', methods=['POST'])
+@require_role('student')
+def submit_test(test_id):
+    statements_before = g.get('sql_statement_count', 0)
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json()
     
-    # Get test average
-    all_attempts = ExamAttempt.query.filter_by(test_id=test_id).all()
-    average_score = sum(a.score for a in all_attempts if a.score) / len(all_attempts) if all_attempts else 0
-    average_percentage = (average_score / max_score * 100) if max_score else 0
+    try:
+        result = finalize_submission(current_user_id, test_id, data.get('answers'))
+    except ExamRequestError as e:
+        return jsonify({'error': e.message}), e.status
     
-    return jsonify({
-        'score': total_score,
-        'max_score': max_score,
-        'percentage': (total_score / max_score * 100) if max_score else 0,
-        'average_score': average_score,
-        'average_percentage': average_percentage
-    }), 200
+    response = jsonify(result)
+    response.headers['X-Statement-Count'] = str(g.get('sql_statement_count', 0) - statements_before)
+    return response, 200
 
 @app.route('/api/student/tests/<int:test_id>/result', methods=['GET'])
 @require_role('student')
@@ -1144,38 +3867,31 @@ def get_test_result(test_id):
         
         print(f"DEBUG - Test found: {test.name}")
         
-        # Get answers WITHOUT eager loading to avoid issues
-        answers = Answer.query.filter_by(exam_attempt_id=attempt.id).all()
+        # Cevaplar soru metni ve doğru cevapla birlikte tek JOIN sorgusuyla okunur (cevap başına sorgu yok)
+        answers = db.session.query(
+            Answer.question_id, Answer.selected_answer, Answer.is_correct, Answer.points_earned,
+            Question.question_text, Question.correct_answer
+        ).join(Question, Question.id == Answer.question_id).filter(
+            Answer.exam_attempt_id == attempt.id
+        ).order_by(Answer.id).all()
         print(f"DEBUG - Found {len(answers)} answers")
         
-        # Build answer list safely
-        answer_list = []
-        for a in answers:
-            try:
-                question = Question.query.filter_by(id=a.question_id).first()
-                if question:
-                    answer_list.append({
-                        'question_id': a.question_id,
-                        'question_text': question.question_text,
-                        'selected_answer': a.selected_answer if a.selected_answer else '-',
-                        'correct_answer': question.correct_answer,
-                        'is_correct': a.is_correct if a.is_correct is not None else False,
-                        'points_earned': a.points_earned if a.points_earned is not None else 0
-                    })
-            except Exception as e:
-                print(f"DEBUG - Error processing answer {a.id}: {str(e)}")
-                continue
+        answer_list = [{
+            'question_id': a.question_id,
+            'question_text': a.question_text,
+            'selected_answer': a.selected_answer if a.selected_answer else '-',
+            'correct_answer': a.correct_answer,
+            'is_correct': a.is_correct if a.is_correct is not None else False,
+            'points_earned': a.points_earned if a.points_earned is not None else 0
+        } for a in answers]
         
-        # Get test average - sadece tamamlanmış sınavları say
-        all_attempts = ExamAttempt.query.filter_by(test_id=test_id).filter(
-            ExamAttempt.submitted_at.isnot(None)
-        ).all()
+        # Get test average - sadece tamamlanmış sınavları say (test_stats özetinden)
+        summary = test_score_summary(test_id)
         
-        print(f"DEBUG - Found {len(all_attempts)} completed attempts")
+        print(f"DEBUG - Found {summary['count']} completed attempts")
         
-        if all_attempts and attempt.max_score and attempt.max_score > 0:
-            total_score = sum(a.score for a in all_attempts if a.score is not None)
-            average_score = total_score / len(all_attempts) if all_attempts else 0
+        if summary['count'] and attempt.max_score and attempt.max_score > 0:
+            average_score = summary['average']
             average_percentage = (average_score / attempt.max_score * 100)
         else:
             average_score = 0
@@ -1187,6 +3903,9 @@ def get_test_result(test_id):
         else:
             percentage = 0
         
+        # Sınıf içindeki yeri: bakımı yapılan puan kovalarından (girişimler taranmaz)
+        distribution = score_distribution(test_id)
+        
         result = {
             'test_id': test_id,
             'test_name': test.name,
@@ -1195,6 +3914,11 @@ def get_test_result(test_id):
             'percentage': round(percentage, 2),
             'average_score': round(average_score, 2),
             'average_percentage': round(average_percentage, 2),
+            'std_dev_score': round(summary['std_dev'], 2),
+            'lowest_score': summary['lowest'],
+            'highest_score': summary['highest'],
+            'percentile_rank': distribution.percentile_rank(attempt.score, attempt.max_score) if attempt.submitted_at else None,
+            'distribution': distribution.summary(),
             'submitted_at': attempt.submitted_at.isoformat() if attempt.submitted_at else None,
             'answers': answer_list
         }
@@ -1222,31 +3946,10 @@ def get_course_grade(course_id):
         return jsonify({'error': 'Not enrolled in this course'}), 404
     
     course = Course.query.filter_by(id=course_id).first()
-    tests = Test.query.filter_by(course_id=course_id).all()
-    
-    grades = {}
-    total_weighted_score = 0
-    total_weight = 0
-    
-    for test in tests:
-        attempt = ExamAttempt.query.filter_by(
-            student_id=current_user_id,
-            test_id=test.id
-        ).first()
-        
-        if attempt and attempt.score is not None:
-            percentage = (attempt.score / attempt.max_score * 100) if attempt.max_score else 0
-            weighted_score = percentage * (test.weight / 100)
-            grades[test.name] = {
-                'score': attempt.score,
-                'max_score': attempt.max_score,
-                'percentage': percentage,
-                'weight': test.weight
-            }
-            total_weighted_score += weighted_score
-            total_weight += test.weight
     
-    final_grade = (total_weighted_score / total_weight * 100) if total_weight > 0 else None
+    rows = compute_course_grades(course_id, [current_user_id])
+    grades = rows[0]['grades'] if rows else {}
+    final_grade = rows[0]['final_grade'] if rows else None
     
     return jsonify({
         'course_id': course_id,
@@ -1258,87 +3961,45 @@ def get_course_grade(course_id):
 # Department Head Routes
 @app.route('/api/department-head/statistics', methods=['GET'])
 @require_role('department_head')
+@read_replica
 def get_statistics():
-    # Get all courses
-    courses = Course.query.all()
+    # Final notları course_grades tablosunda hazır tutulur (bkz. refresh_gradebook),
+    # burada sadece özet tablolar okunur
+    course_rows = db.session.query(
+        Course.id, Course.code, Course.name, User.full_name,
+        CourseStat.student_count, CourseStat.graded_count, CourseStat.grade_sum
+    ).outerjoin(
+        User, User.id == Course.instructor_id
+    ).outerjoin(
+        CourseStat, CourseStat.course_id == Course.id
+    ).order_by(Course.id).all()
     
     course_stats = []
-    for course in courses:
-        # Get all tests
-        tests = Test.query.filter_by(course_id=course.id).all()
-        
-        # Get all enrolled students
-        students = [e.student for e in course.enrollments]
-        
-        # Calculate course average
-        student_final_grades = []
-        for student in students:
-            total_weighted_score = 0
-            total_weight = 0
-            
-            for test in tests:
-                attempt = ExamAttempt.query.filter_by(
-                    student_id=student.id,
-                    test_id=test.id
-                ).first()
-                
-                if attempt and attempt.score is not None:
-                    percentage = (attempt.score / attempt.max_score * 100) if attempt.max_score else 0
-                    weighted_score = percentage * (test.weight / 100)
-                    total_weighted_score += weighted_score
-                    total_weight += test.weight
-            
-            if total_weight > 0:
-                final_grade = (total_weighted_score / total_weight * 100)
-                student_final_grades.append(final_grade)
-        
-        course_average = sum(student_final_grades) / len(student_final_grades) if student_final_grades else 0
+    for course_id, code, name, instructor_name, student_count, graded_count, grade_sum in course_rows:
+        course_average = grade_sum / graded_count if graded_count else 0
         
         course_stats.append({
-            'course_id': course.id,
-            'course_code': course.code,
-            'course_name': course.name,
-            'instructor_name': course.instructor.full_name if course.instructor else None,
-            'student_count': len(students),
+            'course_id': course_id,
+            'course_code': code,
+            'course_name': name,
+            'instructor_name': instructor_name,
+            'student_count': student_count or 0,
             'course_average': round(course_average, 2)
         })
     
-    # Get all students
-    all_students = User.query.filter_by(role='student').all()
+    student_rows = db.session.query(
+        User.id, User.full_name, StudentStat.graded_count, StudentStat.grade_sum
+    ).outerjoin(
+        StudentStat, StudentStat.student_id == User.id
+    ).filter(User.role == 'student').order_by(User.id).all()
     
     student_stats = []
-    for student in all_students:
-        enrollments = Enrollment.query.filter_by(student_id=student.id).all()
-        student_averages = []
-        
-        for enrollment in enrollments:
-            course = enrollment.course
-            tests = Test.query.filter_by(course_id=course.id).all()
-            
-            total_weighted_score = 0
-            total_weight = 0
-            
-            for test in tests:
-                attempt = ExamAttempt.query.filter_by(
-                    student_id=student.id,
-                    test_id=test.id
-                ).first()
-                
-                if attempt and attempt.score is not None:
-                    percentage = (attempt.score / attempt.max_score * 100) if attempt.max_score else 0
-                    weighted_score = percentage * (test.weight / 100)
-                    total_weighted_score += weighted_score
-                    total_weight += test.weight
-            
-            if total_weight > 0:
-                final_grade = (total_weighted_score / total_weight * 100)
-                student_averages.append(final_grade)
-        
-        overall_average = sum(student_averages) / len(student_averages) if student_averages else 0
+    for student_id, full_name, graded_count, grade_sum in student_rows:
+        overall_average = grade_sum / graded_count if graded_count else 0
         
         student_stats.append({
-            'student_id': student.id,
-            'student_name': student.full_name,
+            'student_id': student_id,
+            'student_name': full_name,
             'overall_average': round(overall_average, 2)
         })
     
@@ -1362,6 +4023,285 @@ def init_db():
         )
         db.session.add(admin)
         db.session.commit()
+    
+    # Gradebook tabloları sonradan eklendi; mevcut veritabanında bir kez doldurulur
+    if not CourseStat.query.first() and Course.query.first():
+        rebuild_gradebook()
+    
+    if not TestStat.query.first() and Test.query.first():
+        rebuild_test_stats()
+        db.session.commit()
+    
+    # Puan kovaları sonradan eklendi; teslim edilmiş girişimi olan veritabanında bir kez doldurulur
+    if not TestScoreBucket.query.first() and ExamAttempt.query.filter(ExamAttempt.submitted_at.isnot(None)).first():
+        rebuild_score_buckets()
+        db.session.commit()
+    
+    # create_all mevcut tablolara yeni indeksleri eklemez
+    for index_name in ensure_indexes():
+        print(f"DEBUG - Indeks olusturuldu: {index_name}")
+
+def ensure_indexes():
+    # Modellerde tanımlı olup veritabanında bulunmayan indeksleri oluşturur
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+    return created
+
+# Index advisor: GET endpoint'lerini örnek verilerle çalıştırır, çalışan sorguları
+# EXPLAIN (SQLite: EXPLAIN QUERY PLAN) ile inceler ve tam tablo taramalarını raporlar
+# Akış (SSE) endpoint'leri kapanmadığı için tekrar oynatılmaz
+ADVISOR_SKIP_ENDPOINTS = {'stream_test_events'}
+
+def advisor_write_path_queries(sample):
+    # Yazma yapan sıcak yollar (login, start_test, submit_test, silmeler) tekrar oynatılamaz;
+    # route'lardaki filtrelerin aynısı burada örnek değerlerle kurulur
+    return {
+        'login': [User.query.filter_by(username=sample['username'])],
+        'start_test': [
+            db.session.query(Test.id, Test.course_id).filter(Test.id == sample['test_id']),
+            db.session.query(Enrollment.student_id).filter(Enrollment.course_id == sample['course_id']),
+            Enrollment.query.filter_by(student_id=sample['student_id'], course_id=sample['course_id']),
+            ExamAttempt.query.filter_by(student_id=sample['student_id'], test_id=sample['test_id']),
+            db.session.query(Question.id, Question.points).filter(Question.test_id == sample['test_id']),
+        ],
+        'autosave_answers': [
+            db.session.query(ExamAttempt.id, ExamAttempt.submitted_at).filter_by(student_id=sample['student_id'], test_id=sample['test_id']),
+        ],
+        'submit_test': [
+            db.session.query(Question.id, Question.test_id, Question.correct_answer, Question.points).filter(
+                Question.id.in_(sample['question_ids'])),
+            db.session.query(Answer.exam_attempt_id, Answer.question_id, Answer.id, Answer.selected_answer).filter(
+                Answer.exam_attempt_id.in_([sample['attempt_id']]), Answer.question_id.in_(sample['question_ids'])),
+            db.session.query(db.func.sum(Answer.points_earned), db.func.sum(Question.points)).join(
+                Question, Question.id == Answer.question_id).filter(Answer.exam_attempt_id == sample['attempt_id']),
+            CourseGrade.query.filter_by(course_id=sample['course_id']).filter(CourseGrade.student_id.in_([sample['student_id']])),
+            Enrollment.query.filter_by(course_id=sample['course_id']),
+        ],
+        'flush_autosaves': [
+            db.session.query(ExamAttempt.id).filter(ExamAttempt.id.in_([sample['attempt_id']]), ExamAttempt.submitted_at.is_(None)),
+        ],
+        'delete_question': [Answer.query.filter_by(question_id=sample['question_ids'][0])],
+        'purge_test': [db.session.query(ExamAttempt.id).filter(ExamAttempt.test_id == sample['test_id']).order_by(ExamAttempt.id).limit(500)],
+        'purge_course': [db.session.query(Test.id).filter(Test.course_id == sample['course_id'])],
+    }
+
+def advisor_sample():
+    attempt = ExamAttempt.query.filter(ExamAttempt.submitted_at.isnot(None)).first()
+    if not attempt:
+        return None
+    test = db.session.get(Test, attempt.test_id)
+    course = db.session.get(Course, test.course_id)
+    question_ids = [question_id for (question_id,) in db.session.query(Question.id).filter_by(test_id=test.id).limit(5).all()]
+    return {
+        'attempt_id': attempt.id,
+        'student_id': attempt.student_id,
+        'username': db.session.get(User, attempt.student_id).username,
+        'test_id': test.id,
+        'course_id': course.id,
+        'instructor_id': course.instructor_id,
+        'question_ids': question_ids or [0],
+        'user_id': attempt.student_id,
+    }
+
+def explain_statement(connection, statement, parameters):
+    # (uyarı listesi, plan satırları) döner
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+        plan = [row[-1] for row in rows]
+        warnings = [detail for detail in plan if detail.startswith('SCAN ') and ' USING ' not in detail]
+        warnings += [f'{detail} (tam indeks taramasi)' for detail in plan if detail.startswith('SCAN ') and ' USING ' in detail]
+    elif dialect == 'mysql':
+        result = connection.exec_driver_sql(f'EXPLAIN {statement}', parameters)
+        columns = list(result.keys())
+        plan = [dict(zip(columns, row)) for row in result.fetchall()]
+        warnings = [f"{row['table']}: tam tablo taramasi (type=ALL, rows={row.get('rows')})" for row in plan if row.get('type') == 'ALL']
+        warnings += [f"{row['table']}: tam indeks taramasi (key={row.get('key')})" for row in plan if row.get('type') == 'index']
+    else:
+        return [], []
+    return warnings, plan
+
+def run_index_advisor():
+    sample = advisor_sample()
+    if not sample:
+        raise click.ClickException('Analiz icin en az bir gonderilmis sinav girisimi gereken ornek veri yok')
+    
+    captured = {}
+    current = {'endpoint': None}
+    advisor_thread = threading.get_ident()
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # Arka plan işçilerinin (ısıtma, flush) sorguları o an çalışan endpoint'e yazılmaz
+        if threading.get_ident() != advisor_thread:
+            return
+        if current['endpoint'] and not executemany and statement.lstrip().upper().startswith('SELECT'):
+            captured.setdefault(current['endpoint'], {}).setdefault(statement, parameters)
+    
+    # 1. GET endpoint'lerini uygun rolde bir kullanıcıyla çalıştır
+    sample_users = {
+        'student': sample['student_id'],
+        'instructor': sample['instructor_id'],
+        'admin': db.session.query(User.id).filter_by(role='admin').scalar(),
+        'department_head': db.session.query(User.id).filter_by(role='department_head').scalar(),
+    }
+    path_values = {'course_id': sample['course_id'], 'test_id': sample['test_id'], 'user_id': sample['user_id'],
+                   'question_id': sample['question_ids'][0]}
+    client = app.test_client()
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        for rule in app.url_map.iter_rules():
+            view = app.view_functions[rule.endpoint]
+            roles = getattr(view, 'required_roles', None)
+            if 'GET' not in rule.methods or not roles or rule.endpoint in ADVISOR_SKIP_ENDPOINTS:
+                continue
+            if any(argument not in path_values for argument in rule.arguments):
+                continue
+            user_id = next((sample_users[role] for role in roles if sample_users.get(role)), None)
+            if not user_id:
+                continue
+            token = create_access_token(identity=str(user_id), additional_claims={'role': get_user_role(user_id)})
+            path = rule.build({argument: path_values[argument] for argument in rule.arguments}, append_unknown=False)[1]
+            current['endpoint'] = rule.endpoint
+            client.get(path, query_string={'test_id': sample['test_id']}, headers={'Authorization': f'Bearer {token}'})
+            current['endpoint'] = None
+        
+        # 2. Yazma yapan sıcak yolların sorguları (sadece okunur, veri değişmez)
+        for endpoint, queries in advisor_write_path_queries(sample).items():
+            current['endpoint'] = endpoint
+            for query in queries:
+                query.all()
+            current['endpoint'] = None
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    
+    # 3. EXPLAIN
+    connection = db.session.connection()
+    report = []
+    for endpoint, statements in sorted(captured.items()):
+        for statement, parameters in statements.items():
+            warnings, plan = explain_statement(connection, statement, parameters)
+            # Filtresiz liste sorgularında tam tarama beklenen durumdur (alt sorguların WHERE'i sayılmaz)
+            outer_statement = statement
+            while re.search(r'\([^()]*\)', outer_statement):
+                outer_statement = re.sub(r'\([^()]*\)', '', outer_statement)
+            expected = not re.search(r'\bWHERE\b', outer_statement, re.IGNORECASE)
+            report.append({'endpoint': endpoint, 'statement': statement, 'warnings': warnings,
+                           'expected': expected, 'plan': plan})
+    db.session.rollback()
+    return report
+
+@app.cli.command('explain-queries')
+@click.option('--create-missing', is_flag=True, help='Eksik model indekslerini once olustur')
+@click.option('--verbose', is_flag=True, help='Tum sorgulari ve planlarini yazdir')
+@click.option('--fail-on-scan', is_flag=True, help='Beklenmeyen tam tarama varsa hata koduyla cik')
+def explain_queries_command(create_missing, verbose, fail_on_scan):
+    if create_missing:
+        for index_name in ensure_indexes():
+            print(f"Indeks olusturuldu: {index_name}")
+    
+    report = run_index_advisor()
+    flagged = [item for item in report if item['warnings'] and not item['expected']]
+    
+    for item in report:
+        if not verbose and (not item['warnings'] or item['expected']):
+            continue
+        status = 'UYARI' if item['warnings'] and not item['expected'] else 'ok'
+        print(f"[{status}] {item['endpoint']}")
+        print('    ' + ' '.join(item['statement'].split())[:300])
+        for warning in item['warnings']:
+            print(f"    -> {warning}")
+        if verbose:
+            for line in item['plan']:
+                print(f"       {line}")
+    
+    print(f"{len(report)} sorgu incelendi ({db.engine.dialect.name}), {len(flagged)} beklenmeyen tam tarama")
+    if fail_on_scan and flagged:
+        raise SystemExit(1)
+
+@app.cli.command('rebuild-gradebook')
+def rebuild_gradebook_command():
+    db.create_all()
+    rebuild_gradebook()
+    print(f"Gradebook yeniden olusturuldu: {CourseGrade.query.count()} not, {CourseStat.query.count()} ders")
+
+@app.cli.command('import-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'upload_format', type=click.Choice(['csv', 'ndjson']), default=None)
+def import_users_command(path, upload_format):
+    db.create_all()
+    upload_format = upload_format or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    with open(path, 'rb', buffering=0) as stream:
+        summary = import_users(iter_upload_rows(stream, upload_format))
+    
+    print(f"{summary['inserted']} kullanici eklendi, {summary['rejected']} satir reddedildi "
+          f"({summary['elapsed_seconds']} sn, {summary['users_per_second']} kullanici/sn)")
+    for error in summary['errors']:
+        print(f"  satir {error['line']}: {error['error']}")
+
+@app.cli.command('rebuild-test-stats')
+def rebuild_test_stats_command():
+    db.create_all()
+    rebuild_test_stats()
+    db.session.commit()
+    print(f"Test istatistikleri yeniden olusturuldu: {TestStat.query.count()} test")
+
+@app.cli.command('run-jobs')
+@click.option('--once', is_flag=True, help='Kuyrukta hazir is kalmayinca cik')
+def run_jobs_command(once):
+    # Ayrı iş worker'ı: web process'lerinde JOB_POLL_INTERVAL=0 iken işleri bu komut çalıştırır
+    db.create_all()
+    interval = app.config['JOB_POLL_INTERVAL'] or 1
+    print(f"Is worker'i basladi ({app.config['JOB_WORKERS']} isci)")
+    while True:
+        dispatch_jobs()
+        db.session.remove()
+        if once and not running_jobs and not db.session.query(Job.id).filter(
+                Job.status == 'queued', Job.run_after <= datetime.utcnow()).first():
+            break
+        time.sleep(interval)
+    db.session.remove()
+    print(', '.join(f'{key}={value}' for key, value in job_stats.items()))
+
+@app.cli.command('seed-data')
+@click.option('--students', default=1000, show_default=True)
+@click.option('--instructors', default=20, show_default=True)
+@click.option('--courses', default=40, show_default=True)
+@click.option('--courses-per-student', default=5, show_default=True)
+@click.option('--tests-per-course', default=3, show_default=True)
+@click.option('--pool-size', default=30, show_default=True, help='Test basina soru havuzu')
+@click.option('--questions-per-test', default=10, show_default=True, help='Girisim basina sorulan soru')
+@click.option('--submit-ratio', default=0.8, show_default=True, help='Bitmis testlere giren ogrenci orani')
+@click.option('--password', default='seed-pass-123', show_default=True)
+@click.option('--prefix', default='seed', show_default=True)
+@click.option('--seed', 'rng_seed', default=42, show_default=True)
+def seed_data_command(**options):
+    db.create_all()
+    try:
+        summary = seed_synthetic_data(**options)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(', '.join(f'{key}={value}' for key, value in summary.items()))
+
+@app.cli.command('sync-replica')
+def sync_replica_command():
+    # Yerel deneme için: SQLite primary dosyasını replika dosyasına kopyalar
+    primary, replica = db.engines[None], db.engines.get('replica')
+    if replica is None:
+        raise click.ClickException('REPLICA_DATABASE_URL tanimli degil')
+    if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise click.ClickException('Sadece SQLite icin; MySQL replikasyonu veritabani tarafinda yapilandirilir')
+    
+    with primary.connect() as source, replica.connect() as target:
+        source.connection.driver_connection.backup(target.connection.driver_connection)
+    print(f"Replika guncellendi: {replica.url.database}")
 
 if __name__ == '__main__':
     with app.app_context():
@@ -0,0 +1,185 @@
+# Opsiyonel asyncio sunum modu: öğrenci sınav route'ları (test listesi, start, submit) Quart
+# ile async motor üzerinden, diğer tüm istekler mevcut Flask uygulamasına (WSGI) gider.
+#
+# Kurulum ve çalıştırma (bkz. README "Async sunum modu"):
+#   pip install -r requirements-async.txt
+#   uvicorn async_app:application --host 0.0.0.0 --port 5000
+#
+# Sınav mantığı app.py'deki çekirdek fonksiyonlarla (available_tests, open_exam_attempt,
+# finalize_submission) aynıdır; fonksiyonlar AsyncSession.run_sync içinde çalışır ve
+# db.session o istek için async motora bağlı oturuma yönlendirilir. Böylece veritabanı
+# beklerken event loop diğer bağlantılara hizmet eder. run_sync event loop thread'inde çalıştığı
+# için thread kilitleri (autosave_flush_lock) burada alınmaz, asyncio.to_thread ile beklenir.
+import asyncio
+import os
+
+import jwt
+from a2wsgi import WSGIMiddleware
+from quart import Quart, Response, request
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+
+import app as exam_app
+from app import app as flask_app, db
+
+# Senkron sürücü -> async karşılığı
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'mysql': 'mysql+aiomysql'}
+
+flask_app.config['ASYNC_DATABASE_URL'] = os.getenv('ASYNC_DATABASE_URL')
+# Async route'lara uymayan istekleri çalıştıran thread sayısı
+flask_app.config['ASYNC_WSGI_WORKERS'] = int(os.getenv('ASYNC_WSGI_WORKERS', 10))
+
+async_app = Quart(__name__, static_folder=None)
+async_state = {'engine': None, 'sessions': None}
+
+
+def async_database_url():
+    # Açıkça verilmediyse Flask'ın çözümlediği URL'den türetilir (instance/ altındaki SQLite dahil)
+    if flask_app.config['ASYNC_DATABASE_URL']:
+        return flask_app.config['ASYNC_DATABASE_URL']
+    with flask_app.app_context():
+        url = db.engine.url
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f'Async surucu bulunamadi: {backend} (ASYNC_DATABASE_URL ayarlayin)')
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+@async_app.before_serving
+async def open_engine():
+    url = async_database_url()
+    engine = create_async_engine(url, **exam_app.engine_options('ASYNC_DB', url))
+    async_state['engine'] = engine
+    async_state['sessions'] = async_sessionmaker(engine, expire_on_commit=False)
+    with flask_app.app_context():
+        exam_app.start_background_workers()
+    print(f"DEBUG - Async mod: {engine.url.render_as_string()}")
+
+
+@async_app.after_serving
+async def close_engine():
+    await async_state['engine'].dispose()
+
+
+def _in_app_context(session, func, *args):
+    # run_sync içinde: db.session (ve Model.query) bu isteğin oturumunu kullanır. Oturum
+    # Flask-SQLAlchemy'nin teardown'ında kapanmasın diye registry pop'tan önce temizlenir
+    with flask_app.app_context():
+        db.session.registry.set(session)
+        try:
+            return func(*args)
+        finally:
+            db.session.registry.clear()
+
+
+async def run_in_session(session, func, *args):
+    return await session.run_sync(_in_app_context, func, *args)
+
+
+def json_error(message, status):
+    return {'error': message}, status
+
+
+async def current_student(session):
+    # require_role('student') karşılığı: aynı token, aynı rol önbelleği ve aynı hata yanıtları
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None, json_error('Unauthorized: Missing Authorization Header', 401)
+    try:
+        claims = jwt.decode(header[7:], flask_app.config['JWT_SECRET_KEY'],
+                            algorithms=[flask_app.config.get('JWT_ALGORITHM', 'HS256')])
+    except jwt.ExpiredSignatureError:
+        return None, json_error('Token expired', 401)
+    except jwt.InvalidTokenError as e:
+        return None, json_error(f'Invalid token: {e}', 422)
+    if claims.get('type') != 'access':
+        return None, json_error('Invalid token: Only access tokens are allowed', 422)
+
+    user_id = int(claims['sub'])
+    role = exam_app.user_cache.get(user_id)
+    if role is exam_app._MISSING:
+        role = await run_in_session(session, exam_app.get_user_role, user_id)
+    claimed_role = claims.get('role')
+    if role != 'student' or (claimed_role is not None and claimed_role != role) or claims.get('scope') is not None:
+        return None, json_error('Unauthorized', 403)
+    return user_id, None
+
+
+@async_app.after_request
+async def add_cors_headers(response):
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+@async_app.route('/api/student/tests', methods=['GET'])
+async def get_available_tests():
+    async with async_state['sessions']() as session:
+        student_id, error = await current_student(session)
+        if error:
+            return error
+
+        # WSGI route'u ile aynı ETag: iki mod arasında geçiş istemci önbelleğini bozmaz
+        version = await run_in_session(session, exam_app.dashboard_version, student_id, 'get_available_tests')
+        tag = exam_app.matching_etag('get_available_tests', request.if_none_match.as_set(), version)
+        if tag is not None:
+            response = Response('', status=304)
+            response.set_etag(tag)
+            return response
+
+        result, valid_until = await run_in_session(session, exam_app.available_tests, student_id)
+
+    response = Response(exam_app._json_bytes(result), status=200, mimetype='application/json')
+    response.set_etag(exam_app.etag_value(version, valid_until))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@async_app.route('/api/student/tests/<int:test_id>/start', methods=['POST'])
+async def start_test(test_id):
+    async with async_state['sessions']() as session:
+        student_id, error = await current_student(session)
+        if error:
+            return error
+        try:
+            body = await run_in_session(session, exam_app.open_exam_attempt, student_id, test_id)
+        except exam_app.ExamRequestError as e:
+            return json_error(e.message, e.status)
+    return Response(body, status=200, mimetype='application/json')
+
+
+@async_app.route('/api/student/tests/<int:test_id>/submit', methods=['POST'])
+async def submit_test(test_id):
+    data = await request.get_json(force=True, silent=True) or {}
+    async with async_state['sessions']() as session:
+        student_id, error = await current_student(session)
+        if error:
+            return error
+        try:
+            attempt_id = await run_in_session(session, exam_app.open_attempt_id, student_id, test_id)
+            autosaved = await asyncio.to_thread(exam_app.take_autosave_for_submit, attempt_id)
+            result = await run_in_session(session, exam_app.finalize_submission, student_id, test_id,
+                                          data.get('answers'), autosaved)
+        except exam_app.ExamRequestError as e:
+            return json_error(e.message, e.status)
+    return result, 200
+
+
+wsgi_fallback = WSGIMiddleware(flask_app, workers=flask_app.config['ASYNC_WSGI_WORKERS'])
+async_routes = async_app.url_map.bind('')
+
+
+def is_async_route(scope):
+    # Yalnızca yol ve method async route'a uyuyorsa; CORS preflight (OPTIONS) Flask'ta kalır
+    try:
+        async_routes.match(scope['path'], method=scope['method'])
+    except HTTPException:
+        return False
+    return True
+
+
+async def application(scope, receive, send):
+    # ASGI giriş noktası: lifespan ve async route'lar Quart'a, geri kalanı Flask'a
+    if scope['type'] == 'lifespan' or (scope['type'] == 'http' and is_async_route(scope)):
+        await async_app(scope, receive, send)
+    else:
+        await wsgi_fallback(scope, receive, send)
@@ -0,0 +1,219 @@
+# Eşzamanlı bağlantı kapasitesi: WSGI (thread'li werkzeug) ve async mod (uvicorn + async_app)
+#
+# Kullanım (proje kök dizininden, async bağımlılıkları kurulu olmalı):
+#   python -m benchmarks.async_capacity --connections 50,200,500 --think 0.2
+#
+# Her bağlantı bir öğrencidir ve açık (keep-alive) bağlantı üzerinden test listesi ->
+# start_test -> submit_test akışını, istekler arasında --think kadar bekleyerek yürütür.
+# Her mod ayrı süreçte ve ayrı geçici SQLite veritabanında çalıştırılır.
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import ServerThread, latency_summary, load_app
+
+MODES = ('wsgi', 'async')
+
+
+def seed(exam_app, students, questions):
+    from flask_jwt_extended import create_access_token
+    from werkzeug.security import generate_password_hash
+    db = exam_app.db
+    with exam_app.app.app_context():
+        password_hash = generate_password_hash('capacity-pass-123')
+        db.session.execute(db.insert(exam_app.User), [{
+            'username': f'cap{i}', 'email': f'cap{i}@example.com', 'password_hash': password_hash,
+            'role': 'student', 'full_name': f'Capacity Student {i}'
+        } for i in range(students)])
+        instructor = exam_app.User(username='cap_instructor', email='cap_instructor@example.com',
+                                   password_hash=password_hash, role='instructor', full_name='Capacity Instructor')
+        db.session.add(instructor)
+        db.session.flush()
+        course = exam_app.Course(code='CAP', name='Capacity Course', instructor_id=instructor.id)
+        db.session.add(course)
+        db.session.flush()
+        now = datetime.now()
+        test = exam_app.Test(course_id=course.id, name='Final', weight=100, start_time=now - timedelta(minutes=5),
+                             end_time=now + timedelta(hours=2), duration_minutes=60, question_count=questions)
+        db.session.add(test)
+        db.session.flush()
+        db.session.add(exam_app.TestStat(test_id=test.id))
+        db.session.execute(db.insert(exam_app.Question), [{
+            'test_id': test.id, 'question_text': f'Q{i}', 'option_a': 'a', 'option_b': 'b',
+            'option_c': 'c', 'option_d': 'd', 'correct_answer': 'A', 'points': 1.0
+        } for i in range(questions * 2)])
+        student_ids = [user_id for (user_id,) in db.session.query(exam_app.User.id).filter(
+            exam_app.User.username.like('cap%'), exam_app.User.role == 'student').order_by(exam_app.User.id)]
+        db.session.execute(db.insert(exam_app.Enrollment), [
+            {'student_id': student_id, 'course_id': course.id} for student_id in student_ids])
+        db.session.commit()
+        # Giriş (parola doğrulama) ölçülmez; token'lar doğrudan üretilir
+        tokens = [create_access_token(identity=str(student_id), additional_claims={'role': 'student'})
+                  for student_id in student_ids]
+        return test.id, tokens
+
+
+def start_server(mode, exam_app):
+    if mode == 'wsgi':
+        server = ServerThread(exam_app.app)
+        server.start()
+        return server.base_url, server.stop
+
+    import uvicorn
+    import async_app
+    server = uvicorn.Server(uvicorn.Config(async_app.application, host='127.0.0.1', port=0,
+                                           log_level='warning', lifespan='on', backlog=4096))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+    return f'http://127.0.0.1:{port}', stop
+
+
+class Connection:
+    # Tek bir keep-alive HTTP/1.1 bağlantısı (sunucu kapatırsa yeniden açılır)
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, token, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode() if body is not None else b''
+        self.writer.write((f'{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nAuthorization: Bearer {token}\r\n'
+                           f'Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n').encode() + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'content-length' in headers:
+            payload = await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            payload = b''
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                payload += chunk[:-2]
+        else:
+            payload = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def run_level(base_url, test_id, tokens, think, timeout):
+    host, port = base_url.rsplit('/', 1)[1].split(':')
+    latencies = {'list': [], 'start': [], 'submit': []}
+    errors = {}
+
+    async def call(connection, name, method, path, token, body=None):
+        started = time.perf_counter()
+        status, payload = await connection.request(method, path, token, body)
+        latencies[name].append(time.perf_counter() - started)
+        if status >= 400:
+            raise RuntimeError(f'{name} {status}')
+        await asyncio.sleep(think)
+        return payload
+
+    async def student(token):
+        connection = Connection(host, int(port))
+        try:
+            await call(connection, 'list', 'GET', '/api/student/tests', token)
+            exam = json.loads(await call(connection, 'start', 'POST', f'/api/student/tests/{test_id}/start', token))
+            await call(connection, 'submit', 'POST', f'/api/student/tests/{test_id}/submit', token,
+                       {'answers': {str(q['id']): 'A' for q in exam['questions']}})
+        except Exception as e:
+            key = type(e).__name__ if not isinstance(e, RuntimeError) else str(e)
+            errors[key] = errors.get(key, 0) + 1
+        finally:
+            connection.close()
+
+    async def bounded(token):
+        try:
+            await asyncio.wait_for(student(token), timeout)
+        except asyncio.TimeoutError:
+            errors['timeout'] = errors.get('timeout', 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded(token) for token in tokens))
+    wall = time.perf_counter() - started
+    requests = sum(len(values) for values in latencies.values())
+    return {
+        'connections': len(tokens),
+        'wall_seconds': round(wall, 2),
+        'throughput_rps': round(requests / wall, 1) if wall else 0.0,
+        'errors': errors,
+        **{name: latency_summary(values) for name, values in latencies.items()},
+    }
+
+
+def run_mode(args):
+    levels = [int(level) for level in args.connections.split(',')]
+    exam_app = load_app()
+    # Öğrenci başına tek girişim: her seviye kendi öğrencilerini kullanır
+    test_id, tokens = seed(exam_app, sum(levels), args.questions)
+    base_url, stop = start_server(args.mode, exam_app)
+    results = []
+    try:
+        offset = 0
+        for level in levels:
+            results.append(asyncio.run(run_level(base_url, test_id, tokens[offset:offset + level], args.think, args.timeout)))
+            offset += level
+    finally:
+        stop()
+    return {'mode': args.mode, 'levels': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='WSGI / async eszamanli baglanti kapasitesi')
+    parser.add_argument('--connections', default='50,200,500', help='Virgulle ayrilmis eszamanli baglanti seviyeleri')
+    parser.add_argument('--think', type=float, default=0.2, help='Istekler arasi bekleme (sn); baglanti acik kalir')
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=60, help='Ogrenci akisi zaman asimi (sn)')
+    parser.add_argument('--mode', choices=MODES, default=None, help='Tek mod calistir')
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = []
+    for mode in MODES:
+        command = [sys.executable, '-m', 'benchmarks.async_capacity', '--mode', mode,
+                   '--connections', args.connections, '--think', str(args.think),
+                   '--questions', str(args.questions), '--timeout', str(args.timeout)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'mode':<6} {'conns':>6} {'wall s':>7} {'rps':>7} {'start p95':>10} {'submit p95':>11} {'list p95':>9}  errors")
+    for result in results:
+        for level in result['levels']:
+            print(f"{result['mode']:<6} {level['connections']:>6} {level['wall_seconds']:>7} {level['throughput_rps']:>7} "
+                  f"{level['start']['p95_ms']:>10} {level['submit']['p95_ms']:>11} {level['list']['p95_ms']:>9}  {level['errors']}")
+
+
+if __name__ == '__main__':
+    main()
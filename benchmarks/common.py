@@ -0,0 +1,82 @@
+# Benchmark yardımcıları: geçici veritabanı, arka planda HTTP sunucusu, yüzdelik hesapları
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app(database_url=None):
+    # app modülü DATABASE_URL okunmadan önce ayarlanmalı
+    if database_url is None and 'DATABASE_URL' not in os.environ:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='exam-bench-'), 'bench.db')
+    if database_url:
+        os.environ['DATABASE_URL'] = database_url
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import app as exam_app
+    with exam_app.app.app_context():
+        exam_app.init_db()
+    return exam_app
+
+
+class ServerThread(threading.Thread):
+    # Gerçek eşzamanlılık için çok thread'li werkzeug sunucusu
+    def __init__(self, flask_app):
+        super().__init__(daemon=True)
+        from werkzeug.serving import make_server
+        self.server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def run(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def request_json(base_url, method, path, body=None, token=None, timeout=60):
+    # (status, saniye, gövde) döner
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header('Content-Type', 'application/json')
+    if token:
+        req.add_header('Authorization', f'Bearer {token}')
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            payload = resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        payload = e.read()
+        status = e.code
+    elapsed = time.perf_counter() - started
+    try:
+        return status, elapsed, json.loads(payload) if payload else None
+    except ValueError:
+        return status, elapsed, None
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * pct / 100
+    lower = int(index)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+
+def latency_summary(values):
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p95_ms': round(percentile(values, 95) * 1000, 2),
+        'p99_ms': round(percentile(values, 99) * 1000, 2),
+        'max_ms': round(max(values) * 1000, 2) if values else 0.0,
+    }
@@ -0,0 +1,141 @@
+# Sınav başında login fırtınası: N eşzamanlı giriş sırasında login ve submit_test gecikmeleri
+#
+# Kullanım (proje kök dizininden):
+#   python -m benchmarks.login_storm --logins 500 --concurrency 100 --submitters 20
+#
+# Her mod (inline = istek thread'inde doğrulama, pool = sınırlı işlem havuzu) ayrı
+# geçici SQLite veritabanında çalıştırılır.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from benchmarks.common import ServerThread, latency_summary, load_app, request_json
+
+PASSWORD = 'storm-pass-123'
+
+
+def seed(exam_app, logins, submitters, questions):
+    from werkzeug.security import generate_password_hash
+    db = exam_app.db
+    with exam_app.app.app_context():
+        # Hepsi aynı hash'i paylaşır: tohumlama hızlı, doğrulama maliyeti gerçek
+        password_hash = generate_password_hash(PASSWORD)
+        db.session.execute(db.insert(exam_app.User), [{
+            'username': f'storm{i}', 'email': f'storm{i}@example.com', 'password_hash': password_hash,
+            'role': 'student', 'full_name': f'Storm Student {i}'
+        } for i in range(logins + submitters)])
+        instructor = exam_app.User(username='storm_instructor', email='storm_instructor@example.com',
+                                   password_hash=password_hash, role='instructor', full_name='Storm Instructor')
+        db.session.add(instructor)
+        db.session.flush()
+        course = exam_app.Course(code='STORM', name='Storm Course', instructor_id=instructor.id)
+        db.session.add(course)
+        db.session.flush()
+        now = datetime.now()
+        test = exam_app.Test(course_id=course.id, name='Final', weight=100, start_time=now - timedelta(minutes=5),
+                             end_time=now + timedelta(hours=2), duration_minutes=60, question_count=questions)
+        db.session.add(test)
+        db.session.flush()
+        db.session.add(exam_app.TestStat(test_id=test.id))
+        db.session.execute(db.insert(exam_app.Question), [{
+            'test_id': test.id, 'question_text': f'Q{i}', 'option_a': 'a', 'option_b': 'b',
+            'option_c': 'c', 'option_d': 'd', 'correct_answer': 'A', 'points': 1.0
+        } for i in range(questions)])
+        submitter_ids = [user_id for (user_id,) in db.session.query(exam_app.User.id).filter(
+            exam_app.User.username.in_([f'storm{i}' for i in range(logins, logins + submitters)])).all()]
+        db.session.execute(db.insert(exam_app.Enrollment), [
+            {'student_id': student_id, 'course_id': course.id} for student_id in submitter_ids])
+        db.session.commit()
+        return test.id
+
+
+def run_mode(args):
+    exam_app = load_app()
+    exam_app.app.config['LOGIN_VERIFY_WORKERS'] = args.workers
+    test_id = seed(exam_app, args.logins, args.submitters, args.questions)
+    server = ServerThread(exam_app.app)
+    server.start()
+    base = server.base_url
+
+    # Gönderecek öğrenciler fırtınadan önce giriş yapıp sınavı başlatır
+    submit_tokens = []
+    for i in range(args.logins, args.logins + args.submitters):
+        _, _, body = request_json(base, 'POST', '/api/auth/login', {'username': f'storm{i}', 'password': PASSWORD})
+        token = body['access_token']
+        _, _, started = request_json(base, 'POST', f'/api/student/tests/{test_id}/start', token=token)
+        submit_tokens.append((token, {str(q['id']): 'A' for q in started['questions']}))
+
+    login_latencies, submit_latencies, statuses = [], [], {}
+
+    def login(i):
+        status, elapsed, _ = request_json(base, 'POST', '/api/auth/login', {'username': f'storm{i}', 'password': PASSWORD})
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == 200:
+            login_latencies.append(elapsed)
+
+    def submit(item):
+        token, answers = item
+        time.sleep(args.submit_delay)
+        status, elapsed, _ = request_json(base, 'POST', f'/api/student/tests/{test_id}/submit', {'answers': answers}, token=token)
+        submit_latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency + args.submitters) as pool:
+        futures = [pool.submit(login, i) for i in range(args.logins)]
+        futures += [pool.submit(submit, item) for item in submit_tokens]
+        for future in futures:
+            future.result()
+    wall = time.perf_counter() - started
+    server.stop()
+
+    return {
+        'mode': 'inline' if args.workers <= 0 else f'pool({args.workers})',
+        'wall_seconds': round(wall, 2),
+        'login_statuses': statuses,
+        'login': latency_summary(login_latencies),
+        'submit': latency_summary(submit_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Login storm benchmark')
+    parser.add_argument('--logins', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--submitters', type=int, default=20)
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--submit-delay', type=float, default=0.5, help='Fırtına başladıktan sonra gönderim gecikmesi (sn)')
+    parser.add_argument('--workers', type=int, default=None, help='Tek mod çalıştır: 0 = inline, N = havuz boyutu')
+    parser.add_argument('--queue-depth', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.workers is not None:
+        if args.queue_depth is not None:
+            os.environ['LOGIN_QUEUE_DEPTH'] = str(args.queue_depth)
+        print(json.dumps(run_mode(args)))
+        return
+
+    # Her mod temiz bir süreçte çalışır (ayrı veritabanı ve ayrı havuzlar)
+    pool_workers = max(1, (os.cpu_count() or 2) // 2)
+    results = []
+    for workers in (0, pool_workers):
+        command = [sys.executable, '-m', 'benchmarks.login_storm', '--workers', str(workers)]
+        for option in ('logins', 'concurrency', 'submitters', 'questions', 'submit_delay', 'queue_depth'):
+            value = getattr(args, option)
+            if value is not None:
+                command += ['--' + option.replace('_', '-'), str(value)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'mode':<10} {'wall s':>7} {'login p50':>10} {'login p99':>10} {'submit p50':>11} {'submit p99':>11}  statuses")
+    for result in results:
+        print(f"{result['mode']:<10} {result['wall_seconds']:>7} {result['login']['p50_ms']:>10} {result['login']['p99_ms']:>10} "
+              f"{result['submit']['p50_ms']:>11} {result['submit']['p99_ms']:>11}  {result['login_statuses']}")
+
+
+if __name__ == '__main__':
+    main()
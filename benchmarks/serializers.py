@@ -0,0 +1,144 @@
+# Liste serileştirme mikro benchmark'ı: ORM nesnesi + elle dict + stdlib json ile kolon projeksiyonu +
+# RowSerializer + hızlı JSON kodlayıcının (orjson kuruluysa) satır başına CPU ve bellek maliyeti
+#
+# Kullanım (proje kök dizininden):
+#   python -m benchmarks.serializers --rows 10000 --repeat 5
+#
+# Her yol için veritabanından okuma + dict oluşturma ve JSON kodlama süreleri (en iyi tekrar, satır
+# başına mikro saniye) ile tracemalloc tepe bellek kullanımı (satır başına byte) raporlanır.
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks.common import load_app
+
+
+def seed(exam_app, rows):
+    db = exam_app.db
+    with exam_app.app.app_context():
+        db.session.execute(db.insert(exam_app.User), [{
+            'username': f'ser{i}', 'email': f'ser{i}@example.com', 'password_hash': 'x' * 102,
+            'role': 'student', 'full_name': f'Serializer Student {i}'
+        } for i in range(rows)])
+        instructor = exam_app.User(username='ser_instructor', email='ser_instructor@example.com',
+                                   password_hash='x' * 102, role='instructor', full_name='Serializer Instructor')
+        db.session.add(instructor)
+        db.session.flush()
+        course = exam_app.Course(code='SER', name='Serializer Course', instructor_id=instructor.id)
+        db.session.add(course)
+        db.session.flush()
+        now = datetime.now()
+        test = exam_app.Test(course_id=course.id, name='Final', weight=100, start_time=now,
+                             end_time=now + timedelta(hours=1), duration_minutes=60, question_count=10)
+        db.session.add(test)
+        db.session.flush()
+        db.session.execute(db.insert(exam_app.Question), [{
+            'test_id': test.id, 'question_text': f'Soru {i}: ' + 'metin ' * 20, 'option_a': 'Secenek A',
+            'option_b': 'Secenek B', 'option_c': 'Secenek C', 'option_d': 'Secenek D', 'correct_answer': 'ABCD'[i % 4],
+            'points': 1.0
+        } for i in range(rows)])
+        db.session.commit()
+        return test.id
+
+
+def cases(exam_app, test_id):
+    User, Question = exam_app.User, exam_app.Question
+
+    def orm_users():
+        # Önceki route'lardaki kalıp: tam ORM nesnesi (password_hash dahil) ve elle dict
+        return [{
+            'id': u.id, 'username': u.username, 'email': u.email, 'role': u.role, 'full_name': u.full_name
+        } for u in User.query.filter(User.role == 'student').order_by(User.id).all()]
+
+    def projected_users():
+        serializer = exam_app.user_serializer
+        return serializer.dump_all(serializer.query().filter(User.role == 'student').order_by(User.id).all())
+
+    def orm_questions():
+        return [{
+            'id': q.id, 'test_id': q.test_id, 'question_text': q.question_text, 'option_a': q.option_a,
+            'option_b': q.option_b, 'option_c': q.option_c, 'option_d': q.option_d,
+            'correct_answer': q.correct_answer, 'points': q.points
+        } for q in Question.query.filter_by(test_id=test_id).order_by(Question.id).all()]
+
+    def projected_questions():
+        serializer = exam_app.question_serializer
+        return serializer.dump_all(serializer.query().filter(Question.test_id == test_id).order_by(Question.id).all())
+
+    return {
+        'users': (orm_users, projected_users),
+        'questions': (orm_questions, projected_questions),
+    }
+
+
+def encoders(exam_app):
+    # jsonify'ın yanıt gövdesini üreten sağlayıcılar: Flask varsayılanı (stdlib json) ve orjson
+    from flask.json.provider import DefaultJSONProvider
+    result = {'stdlib': DefaultJSONProvider(exam_app.app).response}
+    if exam_app.orjson is not None:
+        result['orjson'] = exam_app.OrjsonProvider(exam_app.app).response
+    return result
+
+
+def measure(exam_app, build, encode, repeat):
+    db = exam_app.db
+    build_times, encode_times = [], []
+    for _ in range(repeat):
+        # Her tekrar boş oturumla başlar (identity map önceki tekrardan nesne taşımaz)
+        db.session.remove()
+        started = time.perf_counter()
+        payload = build()
+        built = time.perf_counter()
+        encode(payload)
+        build_times.append(built - started)
+        encode_times.append(time.perf_counter() - built)
+
+    db.session.remove()
+    tracemalloc.start()
+    encode(build())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.session.remove()
+    return len(payload), min(build_times), min(encode_times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Liste serilestirme mikro benchmarki')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    exam_app = load_app()
+    test_id = seed(exam_app, args.rows)
+    available = encoders(exam_app)
+    fast = 'orjson' if 'orjson' in available else 'stdlib'
+
+    results = []
+    with exam_app.app.app_context():
+        for name, (orm, projected) in cases(exam_app, test_id).items():
+            for label, build, encoder in (('orm + stdlib', orm, 'stdlib'),
+                                          ('projeksiyon + stdlib', projected, 'stdlib'),
+                                          (f'projeksiyon + {fast}', projected, fast)):
+                rows, build_time, encode_time, peak = measure(exam_app, build, available[encoder], args.repeat)
+                results.append({
+                    'list': name, 'path': label, 'rows': rows,
+                    'build_us_per_row': round(build_time / rows * 1e6, 2),
+                    'encode_us_per_row': round(encode_time / rows * 1e6, 2),
+                    'total_us_per_row': round((build_time + encode_time) / rows * 1e6, 2),
+                    'peak_bytes_per_row': round(peak / rows),
+                })
+
+    if fast == 'stdlib':
+        print('orjson kurulu degil: hizli kodlayici yerine stdlib json olculdu')
+    print(f"{'liste':10} {'yol':24} {'satir':>6} {'okuma+dict':>11} {'kodlama':>8} {'toplam':>8} {'tepe B/satir':>13}")
+    for result in results:
+        print(f"{result['list']:10} {result['path']:24} {result['rows']:>6} {result['build_us_per_row']:>11} "
+              f"{result['encode_us_per_row']:>8} {result['total_us_per_row']:>8} {result['peak_bytes_per_row']:>13}")
+    print('(sureler satir basina mikro saniye)')
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+# Endpoint benchmark paketi: sentetik veri üzerinde gerçekçi akışlar (Flask test client)
+#
+# Kullanım (proje kök dizininden):
+#   python -m benchmarks.suite --students 500 --output results.json
+#   python -m benchmarks.suite --baseline results.json --fail-threshold 20
+#
+# Akışlar: login, öğrenci paneli, start_test/submit_test patlaması, eğitmen not defteri,
+# bölüm başkanı istatistikleri. Endpoint başına throughput, p50/p95/p99 ve istek başına
+# SQL ifadesi sayısı raporlanır; --baseline ile kayıtlı sonuçlarla karşılaştırılır.
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import latency_summary, load_app
+
+PASSWORD = 'bench-pass-123'
+PREFIX = 'bench'
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, endpoint, elapsed, status, statements):
+        with self.lock:
+            entry = self.samples.setdefault(endpoint, {'latencies': [], 'statements': [], 'errors': 0, 'wall': 0.0})
+            entry['latencies'].append(elapsed)
+            entry['statements'].append(statements)
+            if status >= 400:
+                entry['errors'] += 1
+
+    def add_wall_time(self, endpoints, wall):
+        with self.lock:
+            for endpoint in endpoints:
+                if endpoint in self.samples:
+                    self.samples[endpoint]['wall'] += wall
+
+    def summary(self):
+        results = {}
+        for endpoint, entry in self.samples.items():
+            stats = latency_summary(entry['latencies'])
+            stats['errors'] = entry['errors']
+            stats['throughput_rps'] = round(len(entry['latencies']) / entry['wall'], 1) if entry['wall'] else 0.0
+            stats['statements_avg'] = round(sum(entry['statements']) / len(entry['statements']), 2)
+            stats['statements_max'] = max(entry['statements'])
+            results[endpoint] = stats
+        return results
+
+
+class Client:
+    # Thread başına bir test client; süre ve X-SQL-Queries kaydedilir
+    def __init__(self, exam_app, recorder):
+        self.client = exam_app.app.test_client()
+        self.recorder = recorder
+
+    def call(self, endpoint, method, path, token=None, body=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        elapsed = time.perf_counter() - started
+        self.recorder.add(endpoint, elapsed, response.status_code, int(response.headers.get('X-SQL-Queries', 0)))
+        return response
+
+
+def run_flow(exam_app, recorder, name, endpoints, jobs, concurrency):
+    local = threading.local()
+
+    def worker(job):
+        if not hasattr(local, 'client'):
+            local.client = Client(exam_app, recorder)
+        job(local.client)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, jobs))
+    wall = time.perf_counter() - started
+    recorder.add_wall_time(endpoints, wall)
+    print(f"  {name}: {len(jobs)} is, {wall:.2f} sn", file=sys.stderr)
+
+
+def login(client, username):
+    response = client.call('POST /api/auth/login', 'POST', '/api/auth/login',
+                           body={'username': username, 'password': PASSWORD})
+    return response.get_json()['access_token']
+
+
+def run_suite(args):
+    exam_app = load_app()
+    exam_app.app.config['SQL_DEBUG_HEADERS'] = True
+    exam_app.app.config['LOGIN_VERIFY_WORKERS'] = args.login_workers
+    db = exam_app.db
+    rng = random.Random(args.seed)
+
+    with exam_app.app.app_context():
+        seeded = exam_app.seed_synthetic_data(
+            students=args.students, instructors=args.instructors, courses=args.courses,
+            courses_per_student=args.courses_per_student, tests_per_course=args.tests_per_course,
+            pool_size=args.pool_size, questions_per_test=args.questions_per_test,
+            password=PASSWORD, prefix=PREFIX, rng_seed=args.seed)
+        students = [username for (username,) in db.session.query(exam_app.User.username).filter(
+            exam_app.User.role == 'student', exam_app.User.username.like(f'{PREFIX}%'))]
+        instructors = [username for (username,) in db.session.query(exam_app.User.username).filter(
+            exam_app.User.role == 'instructor', exam_app.User.username.like(f'{PREFIX}%'))]
+        # Öğrenci -> kayıtlı derslerdeki açık testler
+        open_tests = {}
+        for username, test_id in db.session.query(exam_app.User.username, exam_app.Test.id).join(
+                exam_app.Enrollment, exam_app.Enrollment.student_id == exam_app.User.id).join(
+                exam_app.Test, exam_app.Test.course_id == exam_app.Enrollment.course_id).filter(
+                exam_app.Test.end_time > exam_app.datetime.now()):
+            open_tests.setdefault(username, []).append(test_id)
+    print(f"Veri: {json.dumps(seeded)}", file=sys.stderr)
+
+    recorder = Recorder()
+    tokens = {}
+    sample = rng.sample(students, min(args.logins, len(students)))
+
+    def login_job(username):
+        return lambda client: tokens.__setitem__(username, login(client, username))
+
+    run_flow(exam_app, recorder, 'login', ['POST /api/auth/login'],
+             [login_job(username) for username in sample], args.concurrency)
+
+    def dashboard_job(username):
+        def job(client):
+            token = tokens[username]
+            courses = client.call('GET /api/student/courses', 'GET', '/api/student/courses', token).get_json()
+            client.call('GET /api/student/tests', 'GET', '/api/student/tests', token)
+            for course in courses[:2]:
+                client.call('GET /api/student/courses/<id>/grade', 'GET',
+                            f"/api/student/courses/{course['id']}/grade", token)
+        return job
+
+    run_flow(exam_app, recorder, 'ogrenci paneli',
+             ['GET /api/student/courses', 'GET /api/student/tests', 'GET /api/student/courses/<id>/grade'],
+             [dashboard_job(username) for username in sample], args.concurrency)
+
+    def exam_job(username):
+        def job(client):
+            token = tokens[username]
+            test_id = rng.choice(open_tests[username])
+            response = client.call('POST /api/student/tests/<id>/start', 'POST',
+                                   f'/api/student/tests/{test_id}/start', token)
+            if response.status_code != 200:
+                return
+            answers = {str(q['id']): rng.choice('ABCD') for q in response.get_json()['questions']}
+            client.call('POST /api/student/tests/<id>/submit', 'POST',
+                        f'/api/student/tests/{test_id}/submit', token, {'answers': answers})
+        return job
+
+    run_flow(exam_app, recorder, 'sinav patlamasi',
+             ['POST /api/student/tests/<id>/start', 'POST /api/student/tests/<id>/submit'],
+             [exam_job(username) for username in sample if open_tests.get(username)], args.concurrency)
+
+    for username in instructors:
+        tokens[username] = login(Client(exam_app, Recorder()), username)
+
+    def gradebook_job(username):
+        def job(client):
+            token = tokens[username]
+            for course in client.call('GET /api/instructor/courses', 'GET', '/api/instructor/courses', token).get_json():
+                client.call('GET /api/instructor/courses/<id>/grades', 'GET',
+                            f"/api/instructor/courses/{course['id']}/grades", token)
+            for test in client.call('GET /api/instructor/tests', 'GET', '/api/instructor/tests', token).get_json()[:3]:
+                client.call('GET /api/instructor/tests/<id>/results', 'GET',
+                            f"/api/instructor/tests/{test['id']}/results", token)
+        return job
+
+    run_flow(exam_app, recorder, 'egitmen not defteri',
+             ['GET /api/instructor/courses', 'GET /api/instructor/courses/<id>/grades',
+              'GET /api/instructor/tests', 'GET /api/instructor/tests/<id>/results'],
+             [gradebook_job(username) for username in instructors * args.repeat], args.concurrency)
+
+    head = f'{PREFIX}_department_head_0'
+    tokens[head] = login(Client(exam_app, Recorder()), head)
+    run_flow(exam_app, recorder, 'bolum baskani istatistikleri', ['GET /api/department-head/statistics'],
+             [lambda client: client.call('GET /api/department-head/statistics', 'GET',
+                                         '/api/department-head/statistics', tokens[head])] * (args.repeat * 5),
+             args.concurrency)
+
+    with exam_app.app.app_context():
+        dialect = db.engine.dialect.name
+    return {'dataset': seeded, 'dialect': dialect, 'endpoints': recorder.summary()}
+
+
+def compare(results, baseline, threshold):
+    # p95 eşiği aşan veya istek başına ifade sayısı artan endpoint'ler regresyon sayılır
+    regressions = []
+    print(f"\n{'endpoint':46} {'p95 onceki':>11} {'p95 simdi':>10} {'fark':>8} {'sql onceki':>11} {'sql simdi':>10}")
+    for endpoint, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if not previous:
+            print(f"{endpoint:46} {'-':>11} {current['p95_ms']:>10} {'yeni':>8}")
+            continue
+        change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0.0
+        print(f"{endpoint:46} {previous['p95_ms']:>11} {current['p95_ms']:>10} {change:>+7.1f}% "
+              f"{previous['statements_avg']:>11} {current['statements_avg']:>10}")
+        # Rastgele soru seçimi ifade sayısını biraz oynatır; %5 altı artış gürültü sayılır
+        if change > threshold or current['statements_avg'] > previous['statements_avg'] * 1.05:
+            regressions.append(endpoint)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Endpoint benchmark paketi')
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--instructors', type=int, default=10)
+    parser.add_argument('--courses', type=int, default=20)
+    parser.add_argument('--courses-per-student', type=int, default=4)
+    parser.add_argument('--tests-per-course', type=int, default=3)
+    parser.add_argument('--pool-size', type=int, default=30)
+    parser.add_argument('--questions-per-test', type=int, default=10)
+    parser.add_argument('--logins', type=int, default=200, help='Akislara katilan ogrenci sayisi')
+    parser.add_argument('--repeat', type=int, default=3, help='Egitmen/bolum baskani akis tekrari')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--login-workers', type=int, default=0, help='LOGIN_VERIFY_WORKERS (0 = inline)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Sonuclari JSON olarak kaydet (sonraki kosular icin baseline)')
+    parser.add_argument('--baseline', help='Karsilastirilacak onceki sonuc dosyasi')
+    parser.add_argument('--fail-threshold', type=float, default=None,
+                        help='p95 bu yuzdeden fazla kotulesirse veya SQL sayisi artarsa hata koduyla cik')
+    args = parser.parse_args()
+
+    results = run_suite(args)
+
+    print(f"\n{'endpoint':46} {'n':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql/istek':>10} {'hata':>5}")
+    for endpoint, stats in results['endpoints'].items():
+        print(f"{endpoint:46} {stats['count']:>5} {stats['throughput_rps']:>8} {stats['p50_ms']:>8} "
+              f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['statements_avg']:>10} {stats['errors']:>5}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.fail_threshold if args.fail_threshold is not None else 0)
+        if regressions:
+            print(f"\nRegresyon: {', '.join(regressions)}")
+            if args.fail_threshold is not None:
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
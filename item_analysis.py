@@ -0,0 +1,114 @@
+# Madde (soru) analizi: teslim edilmiş cevaplar sütunlar halinde NumPy dizilerine alınır ve bir testin
+# tüm soru istatistikleri vektörel hesaplanır (cevap başına Python döngüsü yok).
+#
+# app.py bu modülü opsiyonel olarak yükler; numpy kurulu değilse analiz endpoint'i 501 döner:
+#   pip install numpy
+#
+# Soru başına:
+#   difficulty      doğru cevaplama oranı (p; yüksek = kolay)
+#   discrimination  toplam puana göre üst ve alt %27'lik grupların doğru oranı farkı (D = p_üst - p_alt)
+#   point_biserial  soru doğruluğu (0/1) ile girişimin puan yüzdesi arasındaki korelasyon
+#   options         A-D işaretlenme ve boş bırakma sayıları (çeldirici frekansları)
+# Havuzdan rastgele soru seçildiği için her oran yalnızca o soruyu almış girişimler üzerinden hesaplanır.
+import numpy as np
+
+OPTIONS = ('A', 'B', 'C', 'D', 'blank')
+GROUP_FRACTION = 0.27
+
+
+def attempt_groups(scores, fraction=GROUP_FRACTION):
+    # 1 = üst grup, -1 = alt grup, 0 = orta. Eşit puanlar sınırda girişim sırasına göre bölünür
+    groups = np.zeros(len(scores), dtype=np.int8)
+    size = int(len(scores) * fraction)
+    if size:
+        order = np.argsort(scores, kind='stable')
+        groups[order[:size]] = -1
+        groups[order[-size:]] = 1
+    return groups
+
+
+def _value(value):
+    return round(float(value), 4) if np.isfinite(value) else None
+
+
+class ItemAnalysis:
+    # Soru havuzu ve teslim edilmiş girişimlerle (id, puan, en yüksek puan) kurulur; cevaplar add_chunk ile
+    # parça parça eklenir. Yalnızca soru başına sayaçlar tutulur, bellek cevap sayısından bağımsızdır.
+    def __init__(self, question_ids, attempt_ids, scores, max_scores, group_fraction=GROUP_FRACTION):
+        self.question_ids = np.sort(np.asarray(question_ids, dtype=np.int64))
+        attempt_ids = np.asarray(attempt_ids, dtype=np.int64)
+        order = np.argsort(attempt_ids)
+        self.attempt_ids = attempt_ids[order]
+        # Toplam puan yüzdesi (max_score olmayan girişim 0 sayılır)
+        scores = np.nan_to_num(np.asarray(scores, dtype=np.float64)[order])
+        max_scores = np.nan_to_num(np.asarray(max_scores, dtype=np.float64)[order])
+        scores = np.divide(scores * 100, max_scores, out=np.zeros_like(scores), where=max_scores > 0)
+        # Korelasyon kaymadan etkilenmez; ortalamadan farklar büyük toplamlarda hassasiyeti korur
+        self.scores = scores - scores.mean() if len(scores) else scores
+        self.groups = attempt_groups(scores, group_fraction)
+
+        size = len(self.question_ids)
+        self.responses = np.zeros(size, dtype=np.int64)
+        self.correct = np.zeros(size, dtype=np.int64)
+        self.upper_responses = np.zeros(size, dtype=np.int64)
+        self.upper_correct = np.zeros(size, dtype=np.int64)
+        self.lower_responses = np.zeros(size, dtype=np.int64)
+        self.lower_correct = np.zeros(size, dtype=np.int64)
+        self.score_sum = np.zeros(size)
+        self.score_sq_sum = np.zeros(size)
+        self.correct_score_sum = np.zeros(size)
+        self.option_counts = np.zeros((size, len(OPTIONS)), dtype=np.int64)
+
+    def add_chunk(self, rows):
+        # rows: (attempt_id, question_id, option_index, is_correct) satırları;
+        # option_index 0-3 = A-D, 4 = boş; is_correct 0/1
+        data = np.asarray(rows, dtype=np.int64).reshape(-1, 4)
+        size = len(self.question_ids)
+        if not len(data) or not size or not len(self.attempt_ids):
+            return
+
+        # Havuzda olmayan soruya ya da listede olmayan girişime ait cevaplar atlanır
+        attempt_index = np.minimum(np.searchsorted(self.attempt_ids, data[:, 0]), len(self.attempt_ids) - 1)
+        question_index = np.minimum(np.searchsorted(self.question_ids, data[:, 1]), size - 1)
+        valid = (self.attempt_ids[attempt_index] == data[:, 0]) & (self.question_ids[question_index] == data[:, 1])
+        attempt_index, question, data = attempt_index[valid], question_index[valid], data[valid]
+
+        hit = data[:, 3] == 1
+        score = self.scores[attempt_index]
+        upper = self.groups[attempt_index] == 1
+        lower = self.groups[attempt_index] == -1
+        options = np.clip(data[:, 2], 0, len(OPTIONS) - 1)
+
+        self.responses += np.bincount(question, minlength=size)
+        self.correct += np.bincount(question[hit], minlength=size)
+        self.upper_responses += np.bincount(question[upper], minlength=size)
+        self.upper_correct += np.bincount(question[upper & hit], minlength=size)
+        self.lower_responses += np.bincount(question[lower], minlength=size)
+        self.lower_correct += np.bincount(question[lower & hit], minlength=size)
+        self.score_sum += np.bincount(question, weights=score, minlength=size)
+        self.score_sq_sum += np.bincount(question, weights=score * score, minlength=size)
+        self.correct_score_sum += np.bincount(question[hit], weights=score[hit], minlength=size)
+        self.option_counts += np.bincount(
+            question * len(OPTIONS) + options, minlength=size * len(OPTIONS)).reshape(size, len(OPTIONS))
+
+    def results(self):
+        # Cevabı olmayan (ya da grup/varyansı boş) sorularda ilgili değer None döner
+        responses = self.responses.astype(np.float64)
+        correct = self.correct.astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            difficulty = correct / responses
+            discrimination = self.upper_correct / self.upper_responses - self.lower_correct / self.lower_responses
+            covariance = responses * self.correct_score_sum - correct * self.score_sum
+            variance = (responses * correct - correct * correct) * (responses * self.score_sq_sum - self.score_sum ** 2)
+            point_biserial = np.where(variance > 0, covariance / np.sqrt(variance), np.nan)
+
+        return [{
+            'question_id': question_id,
+            'responses': responses_count,
+            'correct': correct_count,
+            'difficulty': _value(difficulty[index]),
+            'discrimination': _value(discrimination[index]),
+            'point_biserial': _value(point_biserial[index]),
+            'options': dict(zip(OPTIONS, counts))
+        } for index, (question_id, responses_count, correct_count, counts) in enumerate(zip(
+            self.question_ids.tolist(), self.responses.tolist(), self.correct.tolist(), self.option_counts.tolist()))]
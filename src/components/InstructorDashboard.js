@@ -54,6 +54,67 @@ function InstructorDashboard() {
     }
   }, [selectedTest]);
 
+  // Sonuç penceresi açıkken canlı sınav olayları (SSE) tabloya ve ortalamaya işlenir
+  const liveTestId = resultsModal.show ? resultsModal.data?.test_id : null;
+  useEffect(() => {
+    if (!liveTestId) {
+      return undefined;
+    }
+    // URL'ye oturum token'ı değil, bu teste özel kısa ömürlü akış token'ı konur; her bağlantıda yenisi alınır
+    let source = null;
+    let closed = false;
+    let retry = null;
+
+    const connect = async () => {
+      let token;
+      try {
+        token = (await apiRequest(`/instructor/tests/${liveTestId}/live-token`, { method: 'POST' })).token;
+      } catch (error) {
+        return;
+      }
+      if (closed) return;
+      source = new EventSource(`/api/instructor/tests/${liveTestId}/live?jwt=${encodeURIComponent(token)}`);
+      source.addEventListener('submitted', onSubmitted);
+      source.addEventListener('average', onAverage);
+      // Tarayıcı aynı (süresi dolmuş olabilecek) token ile yeniden bağlanmasın
+      source.onerror = () => {
+        source.close();
+        if (!closed) retry = setTimeout(connect, 3000);
+      };
+    };
+
+    const onSubmitted = (event) => {
+      const row = JSON.parse(event.data);
+      setResultsModal((prev) => {
+        if (!prev.data) return prev;
+        const results = prev.data.results.filter((r) => r.student_id !== row.student_id);
+        results.push({
+          student_id: row.student_id,
+          student_name: row.student_name,
+          score: row.score,
+          max_score: row.max_score,
+          percentage: row.percentage,
+          submitted_at: row.submitted_at
+        });
+        return { ...prev, data: { ...prev.data, results } };
+      });
+    };
+
+    const onAverage = (event) => {
+      const summary = JSON.parse(event.data);
+      setResultsModal((prev) => prev.data
+        ? { ...prev, data: { ...prev.data, average_score: summary.average, submitted_count: summary.count } }
+        : prev);
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      if (source) source.close();
+    };
+  }, [liveTestId]);
+
   const loadCourses = async () => {
     try {
       const data = await apiRequest('/instructor/courses');
@@ -15,6 +15,8 @@ function StudentDashboard() {
   const answersRef = useRef({});
   const currentTestRef = useRef(null);
   const submittedRef = useRef(false);
+  const pendingSaveRef = useRef({});
+  const saveTimerRef = useRef(null);
 
   useEffect(() => {
     loadCourses();
@@ -53,6 +55,7 @@ function StudentDashboard() {
       const data = await apiRequest(`/student/tests/${testId}/start`, { method: 'POST' });
       setCurrentTest(data);
       setAnswers({});
+      pendingSaveRef.current = {};
       setTimeLeft(data.duration_minutes * 60);
       setResult(null);
     } catch (error) {
@@ -60,8 +63,31 @@ function StudentDashboard() {
     }
   };
 
+  // Otomatik kayit: degisen cevaplar 2 saniyede bir toplu gonderilir
+  const flushAutosave = useCallback(async () => {
+    saveTimerRef.current = null;
+    const test = currentTestRef.current;
+    const pending = pendingSaveRef.current;
+    if (!test || submittedRef.current || Object.keys(pending).length === 0) return;
+
+    pendingSaveRef.current = {};
+    try {
+      await apiRequest(`/student/tests/${test.test_id}/autosave`, {
+        method: 'POST',
+        body: JSON.stringify({ answers: pending })
+      });
+    } catch (error) {
+      // Gonderilemeyenler bir sonraki denemeye kalir; submit zaten tum cevaplari gonderir
+      pendingSaveRef.current = { ...pending, ...pendingSaveRef.current };
+    }
+  }, []);
+
   const handleAnswerChange = (questionId, answer) => {
     setAnswers({ ...answers, [questionId]: answer });
+    pendingSaveRef.current[questionId] = answer;
+    if (!saveTimerRef.current) {
+      saveTimerRef.current = setTimeout(flushAutosave, 2000);
+    }
   };
 
   const handleSubmit = useCallback(async () => {
@@ -71,6 +97,9 @@ function StudentDashboard() {
     if (!test || submittedRef.current) return;
     
     submittedRef.current = true;
+    clearTimeout(saveTimerRef.current);
+    saveTimerRef.current = null;
+    pendingSaveRef.current = {};
     setLoading(true);
     try {
       const data = await apiRequest(`/student/tests/${test.test_id}/submit`, {
@@ -0,0 +1,158 @@
+# Test ortamı: geçici SQLite veritabanı, arka plan işçileri kapalı (işler testte elle çalıştırılır).
+# app modülü ortam değişkenleri okunmadan önce ayarlanmalı
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP = tempfile.mkdtemp(prefix='exam-tests-')
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TMP, 'test.db')
+os.environ['JOB_FILES_DIR'] = os.path.join(TMP, 'jobs')
+for interval in ('EXAM_WARMUP_INTERVAL', 'AUTOSAVE_FLUSH_INTERVAL', 'JOB_POLL_INTERVAL'):
+    os.environ[interval] = '0'
+os.environ['LOGIN_VERIFY_WORKERS'] = '0'
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import app as exam_app  # noqa: E402
+
+PASSWORD = 'pw123456'
+
+
+@pytest.fixture
+def app_module():
+    # Her test boş veritabanı ve boş süreç içi önbelleklerle başlar
+    with exam_app.app.app_context():
+        exam_app.db.drop_all()
+        exam_app.init_db()
+    for cache in (exam_app.user_cache, exam_app.question_pool_cache, exam_app.exam_payload_cache,
+                  exam_app.item_analysis_cache):
+        cache.clear()
+    exam_app.autosave_buffer.clear()
+    exam_app.autosave_stats['pending'] = 0
+    exam_app.running_jobs.clear()
+    return exam_app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def auth(client, username, password=PASSWORD):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    assert response.status_code == 200, response.get_json()
+    return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+
+class School:
+    # Küçük bir okul: eğitmen, öğrenciler, dersler, her derste iki test ve test başına soru havuzu
+    def __init__(self, client, students=4, courses=1, question_count=3, pool_size=5):
+        self.client = client
+        self.admin = auth(client, 'admin', 'admin123')
+        self.instructor_id = self.create_user('ins', 'instructor')
+        self.instructor = auth(client, 'ins')
+        self.student_ids = [self.create_user(f's{i}', 'student') for i in range(students)]
+        self.students = {student_id: auth(client, f's{i}') for i, student_id in enumerate(self.student_ids)}
+        self.course_ids = []
+        self.test_ids = []
+        self.course_tests = {}
+        self.questions = {}
+        for index in range(courses):
+            self.add_course(f'C{index}', question_count, pool_size)
+
+    def add_course(self, code, question_count=3, pool_size=5, tests=(('Vize', 40), ('Final', 60))):
+        # Tüm öğrencilerin kayıtlı olduğu ders; testler şu an açıktır
+        response = self.client.post('/api/admin/courses', headers=self.admin, json={
+            'code': code, 'name': f'Course {code}', 'instructor_id': self.instructor_id})
+        course_id = response.get_json()['id']
+        self.course_ids.append(course_id)
+        for student_id in self.student_ids:
+            self.enroll(student_id, course_id)
+        self.course_tests[course_id] = []
+        now = datetime.now()
+        for name, weight in tests:
+            response = self.client.post('/api/instructor/tests', headers=self.instructor, json={
+                'course_id': course_id, 'name': name, 'weight': weight,
+                'start_time': (now - timedelta(hours=1)).isoformat(),
+                'end_time': (now + timedelta(hours=1)).isoformat(), 'question_count': question_count})
+            assert response.status_code == 201, response.get_json()
+            test_id = response.get_json()['id']
+            self.test_ids.append(test_id)
+            self.course_tests[course_id].append(test_id)
+            self.questions[test_id] = [self.add_question(test_id, 'ABCD'[q % 4]) for q in range(pool_size)]
+        return course_id
+
+    def create_user(self, username, role):
+        response = self.client.post('/api/admin/users', headers=self.admin, json={
+            'username': username, 'email': f'{username}@example.com', 'password': PASSWORD,
+            'role': role, 'full_name': username.upper()})
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['id']
+
+    def enroll(self, student_id, course_id):
+        response = self.client.post('/api/admin/enrollments', headers=self.admin,
+                                    json={'student_id': student_id, 'course_id': course_id})
+        assert response.status_code == 201, response.get_json()
+
+    def add_question(self, test_id, correct_answer, points=2):
+        response = self.client.post('/api/instructor/questions', headers=self.instructor, json={
+            'test_id': test_id, 'question_text': f'Soru {correct_answer}', 'option_a': 'a', 'option_b': 'b',
+            'option_c': 'c', 'option_d': 'd', 'correct_answer': correct_answer, 'points': points})
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['id']
+
+    def start(self, student_id, test_id, client=None):
+        response = (client or self.client).post(f'/api/student/tests/{test_id}/start', headers=self.students[student_id])
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+
+    def submit(self, student_id, test_id, answers, client=None):
+        response = (client or self.client).post(f'/api/student/tests/{test_id}/submit', headers=self.students[student_id],
+                                                json={'answers': {str(q): a for q, a in answers.items()}})
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+
+    def take(self, student_id, test_id, seed=0, client=None):
+        # Testi başlatır ve seed'e göre değişen cevaplarla gönderir
+        questions = self.start(student_id, test_id, client)['questions']
+        answers = {q['id']: 'ABCD'[(seed + index) % 4] for index, q in enumerate(questions)}
+        return self.submit(student_id, test_id, answers, client)
+
+
+@pytest.fixture
+def school(client):
+    return School(client)
+
+
+def snapshot_aggregates(exam_app):
+    # Materialize edilmiş tüm özet tablolarının karşılaştırılabilir görüntüsü
+    return {
+        'test_stats': sorted(
+            (row.test_id, row.attempt_count, round(row.score_sum, 6), round(row.score_sq_sum, 6), row.min_score, row.max_score)
+            for row in exam_app.TestStat.query.all()),
+        'score_buckets': sorted(
+            (row.test_id, row.bucket, row.attempt_count) for row in exam_app.TestScoreBucket.query.all() if row.attempt_count),
+        'course_grades': sorted(
+            (row.student_id, row.course_id, round(row.final_grade, 6)) for row in exam_app.CourseGrade.query.all()),
+        'course_stats': sorted(
+            (row.course_id, row.student_count, row.graded_count, round(row.grade_sum, 6)) for row in exam_app.CourseStat.query.all()),
+        'student_stats': sorted(
+            (row.student_id, row.graded_count, round(row.grade_sum, 6)) for row in exam_app.StudentStat.query.all()),
+    }
+
+
+def assert_aggregates_match_rebuild(exam_app):
+    # Artımlı güncellenen özetler ham veriden baştan hesaplananlarla aynı olmalı
+    with exam_app.app.app_context():
+        incremental = snapshot_aggregates(exam_app)
+        exam_app.rebuild_test_stats()
+        exam_app.rebuild_gradebook()
+        exam_app.db.session.commit()
+        rebuilt = snapshot_aggregates(exam_app)
+    assert incremental == rebuilt
+    return incremental
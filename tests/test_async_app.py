@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('quart')
+pytest.importorskip('aiosqlite')
+
+import async_app  # noqa: E402
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def with_client(test):
+    # before_serving/after_serving: async motor test veritabanının aiosqlite karşılığına açılır
+    async with async_app.async_app.test_app() as test_app:
+        return await test(test_app.test_client())
+
+
+def test_async_submit_merges_autosaves(app_module, school):
+    student_id, test_id = school.student_ids[0], school.test_ids[0]
+    q1, q2 = school.questions[test_id][:2]
+    school.start(student_id, test_id)
+    school.client.post(f'/api/student/tests/{test_id}/autosave', headers=school.students[student_id],
+                       json={'answers': {str(q1): 'B', str(q2): 'B'}})
+
+    async def submit(client):
+        response = await client.post(f'/api/student/tests/{test_id}/submit', headers=school.students[student_id],
+                                     json={'answers': {str(q2): 'C'}})
+        return response.status_code, await response.get_json()
+
+    status, result = run(with_client(submit))
+    assert status == 200
+    with app_module.app.app_context():
+        attempt = app_module.ExamAttempt.query.filter_by(student_id=student_id, test_id=test_id).first()
+        assert {answer.question_id: answer.selected_answer for answer in attempt.answers} == {q1: 'B', q2: 'C'}
+        assert result['score'] == attempt.score
+
+
+def test_async_submit_during_flush_does_not_block_event_loop(app_module, school, monkeypatch):
+    # Flush yazarken gelen submit kilidi thread'de bekler; aynı anda gelen test listesi isteği yanıtlanır
+    student_id, test_id = school.student_ids[0], school.test_ids[0]
+    q1, q2 = school.questions[test_id][:2]
+    school.start(student_id, test_id)
+    school.client.post(f'/api/student/tests/{test_id}/autosave', headers=school.students[student_id],
+                       json={'answers': {str(q1): 'A'}})
+
+    save_answer_batch = app_module.save_answer_batch
+    writing = threading.Event()
+    release = threading.Event()
+    released_by_test = []
+
+    def slow_save(entries):
+        writing.set()
+        released_by_test.append(release.wait(5))
+        return save_answer_batch(entries)
+    monkeypatch.setattr(app_module, 'save_answer_batch', slow_save)
+
+    def flush():
+        with app_module.app.app_context():
+            app_module.flush_autosaves()
+    flusher = threading.Thread(target=flush)
+    flusher.start()
+    assert writing.wait(5)
+    monkeypatch.setattr(app_module, 'save_answer_batch', save_answer_batch)
+
+    async def scenario(client):
+        submit = asyncio.create_task(client.post(
+            f'/api/student/tests/{test_id}/submit', headers=school.students[student_id],
+            json={'answers': {str(q2): 'B'}}))
+        await asyncio.sleep(0.3)
+        started = time.perf_counter()
+        listing = await client.get('/api/student/tests', headers=school.students[school.student_ids[1]])
+        elapsed = time.perf_counter() - started
+        submit_done = submit.done()
+        release.set()
+        submitted = await submit
+        return listing.status_code, elapsed, submit_done, submitted.status_code
+
+    listing_status, elapsed, submit_done, submit_status = run(with_client(scenario))
+    flusher.join(10)
+    assert (listing_status, submit_status) == (200, 200)
+    assert not submit_done
+    assert elapsed < 2
+    assert released_by_test == [True]
+
+    with app_module.app.app_context():
+        attempt = app_module.ExamAttempt.query.filter_by(student_id=student_id, test_id=test_id).first()
+        assert {answer.question_id: answer.selected_answer for answer in attempt.answers} == {q1: 'A', q2: 'B'}
@@ -0,0 +1,62 @@
+from flask_jwt_extended import create_access_token
+
+from conftest import auth
+
+
+def token(app_module, user_id, role):
+    with app_module.app.app_context():
+        return {'Authorization': 'Bearer ' + create_access_token(identity=str(user_id), additional_claims={'role': role})}
+
+
+def test_token_role_must_match_current_role(app_module, school):
+    student_id = school.student_ids[0]
+    assert school.client.get('/api/student/tests', headers=school.students[student_id]).status_code == 200
+
+    # Token'da başka rol yazıyorsa ne o rolün ne de gerçek rolün route'ları açılır
+    forged = token(app_module, student_id, 'instructor')
+    assert school.client.get('/api/instructor/courses', headers=forged).status_code == 403
+    assert school.client.get('/api/student/tests', headers=forged).status_code == 403
+    assert school.client.get('/api/student/tests', headers=token(app_module, student_id, 'student')).status_code == 200
+
+
+def test_role_change_invalidates_cached_role(app_module, school):
+    student_id = school.student_ids[0]
+    headers = school.students[student_id]
+    assert school.client.get('/api/student/tests', headers=headers).status_code == 200
+    assert app_module.user_cache.get(student_id) == 'student'
+
+    with app_module.app.app_context():
+        app_module.db.session.get(app_module.User, student_id).role = 'instructor'
+        app_module.db.session.commit()
+    assert app_module.user_cache.get(student_id) is app_module._MISSING
+
+    # Eski token'daki rol artık güncel rolle uyuşmuyor
+    assert school.client.get('/api/student/tests', headers=headers).status_code == 403
+    assert school.client.get('/api/instructor/courses', headers=headers).status_code == 403
+    assert school.client.get('/api/instructor/courses', headers=token(app_module, student_id, 'instructor')).status_code == 200
+
+
+def test_deleted_user_is_dropped_from_cache(app_module, school):
+    student_id = school.student_ids[0]
+    headers = school.students[student_id]
+    assert school.client.get('/api/student/tests', headers=headers).status_code == 200
+    assert app_module.user_cache.get(student_id) == 'student'
+
+    assert school.client.delete(f'/api/admin/users/{student_id}', headers=school.admin).status_code == 200
+    assert app_module.user_cache.get(student_id) is app_module._MISSING
+    assert school.client.get('/api/student/tests', headers=headers).status_code == 403
+    assert app_module.user_cache.get(student_id) is None
+
+
+def test_cache_refilled_before_commit_is_cleared_on_commit(app_module, school):
+    # Flush ile commit arasında başka bir istek eski rolü önbelleğe yazabilir; commit sonrası tekrar düşürülür
+    student_id = school.create_user('loner', 'student')
+    headers = auth(school.client, 'loner')
+    with app_module.app.app_context():
+        app_module.db.session.delete(app_module.db.session.get(app_module.User, student_id))
+        app_module.db.session.flush()
+        assert app_module.user_cache.get(student_id) is app_module._MISSING
+        app_module.user_cache.set(student_id, 'student')
+        app_module.db.session.commit()
+    assert app_module.user_cache.get(student_id) is app_module._MISSING
+    assert school.client.get('/api/student/tests', headers=headers).status_code == 403
@@ -0,0 +1,177 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+def autosave(school, student_id, test_id, answers):
+    response = school.client.post(f'/api/student/tests/{test_id}/autosave', headers=school.students[student_id],
+                                  json={'answers': {str(q): a for q, a in answers.items()}})
+    return response
+
+
+def stored_answers(app_module, student_id, test_id):
+    with app_module.app.app_context():
+        attempt = app_module.ExamAttempt.query.filter_by(student_id=student_id, test_id=test_id).first()
+        answers = {answer.question_id: answer.selected_answer for answer in attempt.answers}
+        return attempt, answers
+
+
+def flush(app_module):
+    with app_module.app.app_context():
+        return app_module.flush_autosaves()
+
+
+def expected_score(app_module, answers):
+    with app_module.app.app_context():
+        questions = app_module.Question.query.filter(app_module.Question.id.in_(answers)).all()
+        return sum(q.points for q in questions if q.correct_answer == answers[q.id]), sum(q.points for q in questions)
+
+
+def test_submit_merges_pending_autosaves(app_module, school):
+    student_id, test_id = school.student_ids[0], school.test_ids[0]
+    q1, q2, q3 = school.questions[test_id][:3]
+    school.start(student_id, test_id)
+    assert autosave(school, student_id, test_id, {q1: 'A', q2: 'B'}).status_code == 202
+    assert stored_answers(app_module, student_id, test_id)[1] == {}
+
+    # Gönderilen cevap bekleyen cevabı ezer, gönderilmeyen bekleyen cevap korunur
+    result = school.submit(student_id, test_id, {q2: 'C', q3: 'C'})
+    attempt, answers = stored_answers(app_module, student_id, test_id)
+    assert answers == {q1: 'A', q2: 'C', q3: 'C'}
+    assert (result['score'], result['max_score']) == (attempt.score, attempt.max_score) == expected_score(app_module, answers)
+    assert app_module.autosave_buffer == {}
+    assert app_module.autosave_stats['pending'] == 0
+
+
+def test_submit_merges_flushed_and_pending_autosaves(app_module, school):
+    student_id, test_id = school.student_ids[0], school.test_ids[0]
+    q1, q2, q3 = school.questions[test_id][:3]
+    school.start(student_id, test_id)
+    autosave(school, student_id, test_id, {q1: 'A', q2: 'A'})
+    assert flush(app_module) == 2
+    assert stored_answers(app_module, student_id, test_id)[1] == {q1: 'A', q2: 'A'}
+
+    autosave(school, student_id, test_id, {q2: 'B', q3: 'C'})
+    school.submit(student_id, test_id, {})
+    attempt, answers = stored_answers(app_module, student_id, test_id)
+    assert answers == {q1: 'A', q2: 'B', q3: 'C'}
+    assert (attempt.score, attempt.max_score) == expected_score(app_module, answers)
+
+
+def test_flush_skips_submitted_attempts(app_module, school):
+    student_id, test_id = school.student_ids[0], school.test_ids[0]
+    q1, q2 = school.questions[test_id][:2]
+    school.start(student_id, test_id)
+    school.submit(student_id, test_id, {q1: 'A'})
+    assert autosave(school, student_id, test_id, {q2: 'B'}).status_code == 400
+
+    # Başka bir worker'ın tamponunda kalmış geç cevap gönderilmiş girişime yazılmaz
+    attempt, _ = stored_answers(app_module, student_id, test_id)
+    skipped = app_module.autosave_stats['skipped_submitted']
+    app_module.stage_autosave(attempt.id, test_id, {q1: 'D', q2: 'B'})
+    assert flush(app_module) == 0
+    assert app_module.autosave_stats['skipped_submitted'] == skipped + 1
+    assert stored_answers(app_module, student_id, test_id)[1] == {q1: 'A'}
+
+
+def test_failed_flush_keeps_newer_answers(app_module, school, monkeypatch):
+    student_id, test_id = school.student_ids[0], school.test_ids[0]
+    q1, q2 = school.questions[test_id][:2]
+    school.start(student_id, test_id)
+    autosave(school, student_id, test_id, {q1: 'A', q2: 'A'})
+
+    save_answer_batch = app_module.save_answer_batch
+
+    def failing_save(entries):
+        # Yazma sırasında gelen daha yeni cevap geri konan eski cevapla ezilmemeli
+        app_module.stage_autosave(entries[0][0], test_id, {q2: 'D'})
+        raise RuntimeError('db down')
+    monkeypatch.setattr(app_module, 'save_answer_batch', failing_save)
+    try:
+        flush(app_module)
+    except RuntimeError:
+        pass
+    monkeypatch.setattr(app_module, 'save_answer_batch', save_answer_batch)
+
+    assert app_module.autosave_stats['pending'] == 2
+    school.submit(student_id, test_id, {})
+    assert stored_answers(app_module, student_id, test_id)[1] == {q1: 'A', q2: 'D'}
+
+
+class RecordingLock:
+    def __init__(self, events):
+        self.lock = threading.Lock()
+        self.events = events
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.events.append('flush_lock')
+        return self
+
+    def __exit__(self, *exc_info):
+        self.lock.release()
+
+
+def test_submit_and_flush_take_locks_in_the_same_order(app_module, school, monkeypatch):
+    # Önce autosave_flush_lock, sonra girişim satırı (FOR UPDATE); ters sıra MySQL'de kilitlenir
+    student_id, test_id = school.student_ids[0], school.test_ids[0]
+    q1, q2 = school.questions[test_id][:2]
+    school.start(student_id, test_id)
+    events = []
+    monkeypatch.setattr(app_module, 'autosave_flush_lock', RecordingLock(events))
+
+    def record_row_lock(state):
+        if state.is_select and getattr(state.statement, '_for_update_arg', None) is not None:
+            events.append('row_lock')
+    event.listen(Session, 'do_orm_execute', record_row_lock)
+    try:
+        autosave(school, student_id, test_id, {q1: 'B'})
+        flush(app_module)
+        flush_events = list(events)
+        events.clear()
+        autosave(school, student_id, test_id, {q2: 'C'})
+        school.submit(student_id, test_id, {})
+    finally:
+        event.remove(Session, 'do_orm_execute', record_row_lock)
+
+    assert flush_events == ['flush_lock', 'row_lock']
+    assert events[:2] == ['flush_lock', 'row_lock']
+    assert stored_answers(app_module, student_id, test_id)[1] == {q1: 'B', q2: 'C'}
+
+
+def test_submit_waits_for_running_flush(app_module, school, monkeypatch):
+    # Submit, yazılmakta olan cevapları kaçırmaz: flush bitince kalan cevaplarla birlikte puanlanır
+    student_id, test_id = school.student_ids[0], school.test_ids[0]
+    q1, q2 = school.questions[test_id][:2]
+    school.start(student_id, test_id)
+    autosave(school, student_id, test_id, {q1: 'A'})
+
+    save_answer_batch = app_module.save_answer_batch
+    writing = threading.Event()
+    release = threading.Event()
+
+    def slow_save(entries):
+        writing.set()
+        release.wait(5)
+        return save_answer_batch(entries)
+    monkeypatch.setattr(app_module, 'save_answer_batch', slow_save)
+    flusher = threading.Thread(target=flush, args=(app_module,))
+    flusher.start()
+    assert writing.wait(5)
+    monkeypatch.setattr(app_module, 'save_answer_batch', save_answer_batch)
+
+    autosave(school, student_id, test_id, {q2: 'B'})
+    results = []
+    submitter = threading.Thread(target=lambda: results.append(
+        school.submit(student_id, test_id, {}, client=app_module.app.test_client())))
+    submitter.start()
+    submitter.join(0.5)
+    assert submitter.is_alive()
+    release.set()
+    flusher.join(10)
+    submitter.join(10)
+
+    attempt, answers = stored_answers(app_module, student_id, test_id)
+    assert answers == {q1: 'A', q2: 'B'}
+    assert results[0]['score'] == attempt.score == expected_score(app_module, answers)[0]
@@ -0,0 +1,45 @@
+import time
+
+
+def test_dashboard_revalidates_with_etag(school):
+    student_id = school.student_ids[0]
+    headers = school.students[student_id]
+    first = school.client.get('/api/student/tests', headers=headers)
+    assert first.status_code == 200
+    tag = first.headers['ETag']
+
+    cached = school.client.get('/api/student/tests', headers=dict(headers, **{'If-None-Match': tag}))
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == tag
+    assert cached.data == b''
+
+    # Girişim öğrencinin sürümünü, yeni soru dersin sürümünü artırır
+    school.take(student_id, school.test_ids[0])
+    changed = school.client.get('/api/student/tests', headers=dict(headers, **{'If-None-Match': tag}))
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != tag
+    assert [test['status'] for test in changed.get_json()][0] == 'completed'
+
+    tag = changed.headers['ETag']
+    school.add_question(school.test_ids[1], 'C')
+    assert school.client.get('/api/student/tests', headers=dict(headers, **{'If-None-Match': tag})).status_code == 200
+
+
+def test_other_students_changes_keep_etag(school):
+    headers = school.students[school.student_ids[0]]
+    for url in ('/api/student/tests', '/api/student/courses'):
+        tag = school.client.get(url, headers=headers).headers['ETag']
+        school.take(school.student_ids[-1], school.test_ids[0] if url.endswith('tests') else school.test_ids[1])
+        assert school.client.get(url, headers=dict(headers, **{'If-None-Match': tag})).status_code == 304
+
+
+def test_expired_or_malformed_etags_do_not_match(school):
+    headers = school.students[school.student_ids[0]]
+    tag = school.client.get('/api/student/tests', headers=headers).headers['ETag']
+    version, _, valid_until = tag.strip('"').partition('.')
+    assert int(valid_until) > time.time()
+
+    for candidate in (f'{version}.{int(time.time()) - 1}', f'{version}.abc', f'{version}-abc', f'{version}.inf', f'{version}.'):
+        response = school.client.get('/api/student/tests', headers=dict(headers, **{'If-None-Match': f'"{candidate}"'}))
+        assert response.status_code == 200, candidate
+        assert response.headers['ETag'] == tag
@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import School
+
+
+@pytest.fixture
+def other_worker(app_module, monkeypatch):
+    # Değişiklik başka bir worker'da yapılmış gibi: bu process'in önbelleği elle temizlenmez
+    monkeypatch.setattr(app_module, 'invalidate_question_pool', lambda test_id: None)
+    return app_module
+
+
+def pool_ids(app_module, test_id):
+    with app_module.app.app_context():
+        return [question['id'] for question in app_module.get_question_pool(test_id)]
+
+
+def test_question_pool_follows_test_version(other_worker, school):
+    test_id = school.test_ids[0]
+    assert pool_ids(other_worker, test_id) == school.questions[test_id]
+
+    added = school.add_question(test_id, 'B')
+    assert pool_ids(other_worker, test_id) == school.questions[test_id] + [added]
+
+    response = school.client.delete(f'/api/instructor/questions/{added}', headers=school.instructor)
+    assert response.status_code == 200
+    assert pool_ids(other_worker, test_id) == school.questions[test_id]
+
+
+def test_question_pool_cache_hits_while_version_is_unchanged(app_module, school):
+    test_id = school.test_ids[0]
+    pool_ids(app_module, test_id)
+    hits = app_module.question_pool_cache.hits
+    pool_ids(app_module, test_id)
+    assert app_module.question_pool_cache.hits == hits + 1
+
+
+def test_exam_start_serves_new_pool_after_edit_in_other_worker(other_worker, client):
+    # Havuzda yeterli soru yokken hazırlanan yanıt önbellekte kalmamalı
+    school = School(client, students=2, question_count=3, pool_size=2)
+    test_id = school.test_ids[0]
+    student_id = school.student_ids[0]
+    response = client.post(f'/api/student/tests/{test_id}/start', headers=school.students[student_id])
+    assert response.status_code == 400
+    assert 'yeterli soru yok' in response.get_json()['error']
+
+    added = school.add_question(test_id, 'C')
+    started = school.start(student_id, test_id)
+    assert sorted(question['id'] for question in started['questions']) == sorted(school.questions[test_id] + [added])
+
+    # Silinen soru başka öğrencinin yeni girişimine gelmez
+    removed = school.questions[test_id][0]
+    school.add_question(test_id, 'D')
+    assert client.delete(f'/api/instructor/questions/{removed}', headers=school.instructor).status_code == 200
+    questions = school.start(school.student_ids[1], test_id)['questions']
+    assert removed not in {question['id'] for question in questions}
+
+
+def test_warm_up_rebuilds_stale_payloads(other_worker, school):
+    with other_worker.app.app_context():
+        assert other_worker.warm_upcoming_exams() == len(school.test_ids)
+        assert other_worker.warm_upcoming_exams() == 0
+    school.add_question(school.test_ids[0], 'A')
+    with other_worker.app.app_context():
+        assert other_worker.warm_upcoming_exams() == 1
+        payload = other_worker.get_exam_payload(school.test_ids[0])
+    assert len(payload['questions']) == len(school.questions[school.test_ids[0]]) + 1
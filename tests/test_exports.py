@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+import time
+
+import pytest
+
+from conftest import School, auth
+
+EXPORTS = ('/api/instructor/courses/{course_id}/grades/export', '/api/instructor/tests/{test_id}/results/export',
+           '/api/instructor/tests/{test_id}/answers/export')
+
+
+@pytest.fixture
+def graded_school(client):
+    # Son öğrenci finale girmedi
+    school = School(client, students=3)
+    vize, final = school.course_tests[school.course_ids[0]]
+    for index, student_id in enumerate(school.student_ids):
+        school.take(student_id, vize, seed=index)
+        if index < 2:
+            school.take(student_id, final, seed=index + 1)
+    return school
+
+
+def export(school, url, **kwargs):
+    course_id = school.course_ids[0]
+    url = url.format(course_id=course_id, test_id=school.course_tests[course_id][0])
+    return school.client.get(url, headers=kwargs.pop('headers', school.instructor), **kwargs)
+
+
+def csv_rows(response):
+    return list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+
+def ndjson_rows(response):
+    lines = response.get_data(as_text=True).splitlines()
+    assert all(lines)
+    return [json.loads(line) for line in lines]
+
+
+def test_course_grades_csv_has_per_test_columns(graded_school):
+    school = graded_school
+    response = export(school, EXPORTS[0])
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="C0-grades.csv"'
+
+    header, *rows = csv_rows(response)
+    assert header == ['student_id', 'student_name',
+                      'Vize score', 'Vize max_score', 'Vize percentage',
+                      'Final score', 'Final max_score', 'Final percentage',
+                      'total_weight', 'final_grade']
+    assert [int(row[0]) for row in rows] == school.student_ids
+    # Girilmeyen testin sütunları boş kalır
+    assert rows[2][5:8] == ['', '', '']
+    assert all(row[5:8] != ['', '', ''] for row in rows[:2])
+
+    grades = school.client.get(f'/api/instructor/courses/{school.course_ids[0]}/grades', headers=school.instructor).get_json()
+    assert [float(row[-1]) for row in rows] == [round(row['final_grade'], 2) for row in grades['student_grades']]
+
+
+def test_ndjson_exports_one_line_per_row(app_module, graded_school):
+    school = graded_school
+    vize = school.course_tests[school.course_ids[0]][0]
+
+    grades = ndjson_rows(export(school, EXPORTS[0], query_string={'format': 'ndjson'}))
+    assert [row['student_id'] for row in grades] == school.student_ids
+    assert set(grades[2]['grades']) == {'Vize'}
+
+    # format verilmezse Accept başlığına bakılır
+    response = export(school, EXPORTS[1], headers=dict(school.instructor, Accept='application/x-ndjson'))
+    assert response.mimetype == 'application/x-ndjson'
+    results = ndjson_rows(response)
+    assert [row['student_id'] for row in results] == school.student_ids
+    assert all(row['percentage'] == round(row['score'] / row['max_score'] * 100, 2) for row in results)
+
+    with app_module.app.app_context():
+        answer_count = app_module.Answer.query.join(app_module.ExamAttempt).filter(
+            app_module.ExamAttempt.test_id == vize).count()
+    answers = ndjson_rows(export(school, EXPORTS[2], query_string={'format': 'ndjson'}))
+    assert len(answers) == answer_count == len(school.student_ids) * 3
+    header, *rows = csv_rows(export(school, EXPORTS[2]))
+    assert header[:4] == ['attempt_id', 'student_id', 'student_name', 'question_id']
+    assert len(rows) == answer_count
+
+
+@pytest.mark.parametrize('url', EXPORTS)
+def test_export_rejects_bad_format_and_other_instructors(graded_school, url):
+    school = graded_school
+    response = export(school, url, query_string={'format': 'xlsx'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'format csv veya ndjson olmalidir'}
+
+    school.create_user('other', 'instructor')
+    assert export(school, url, headers=auth(school.client, 'other')).status_code == 404
+    assert school.client.get(url.format(course_id=999, test_id=999), headers=school.instructor).status_code == 404
+
+
+def test_background_export_matches_streamed_file(app_module, graded_school):
+    school = graded_school
+    streamed = export(school, EXPORTS[1]).get_data(as_text=True)
+    job_id = export(school, EXPORTS[1], query_string={'background': 1}).get_json()['job_id']
+    with app_module.app.app_context():
+        app_module.dispatch_jobs()
+    for _ in range(200):
+        job = school.client.get(f'/api/jobs/{job_id}', headers=school.instructor).get_json()
+        if job['status'] not in ('queued', 'running'):
+            break
+        time.sleep(0.05)
+    assert job['status'] == 'completed'
+    assert job['result']['rows'] == len(school.student_ids)
+
+    response = school.client.get(job['result']['download_url'], headers=school.instructor)
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == streamed
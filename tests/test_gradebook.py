@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import School, assert_aggregates_match_rebuild, auth
+
+
+def test_submits_keep_aggregates_equal_to_rebuild(app_module, school):
+    for index, student_id in enumerate(school.student_ids):
+        for test_id in school.test_ids:
+            school.take(student_id, test_id, seed=index + test_id)
+
+    aggregates = assert_aggregates_match_rebuild(app_module)
+    course_id = school.course_ids[0]
+    assert [row for row in aggregates['course_stats'] if row[0] == course_id][0][1:3] == (4, 4)
+
+
+def test_partial_grades_are_applied_as_deltas(app_module, school):
+    # Her öğrencinin notu iki ayrı teslimde değişir; ders özeti farkları biriktirir
+    vize, final = school.course_tests[school.course_ids[0]]
+    for index, student_id in enumerate(school.student_ids[:3]):
+        school.take(student_id, vize, seed=index)
+        assert_aggregates_match_rebuild(app_module)
+    for index, student_id in enumerate(school.student_ids[1:], 1):
+        school.take(student_id, final, seed=index * 3)
+    assert_aggregates_match_rebuild(app_module)
+
+
+def test_concurrent_submits_keep_aggregates_equal_to_rebuild(app_module, client):
+    school = School(client, students=8, courses=2)
+    for student_id in school.student_ids:
+        for test_id in school.test_ids:
+            school.start(student_id, test_id)
+
+    def submit(job):
+        student_id, test_id, seed = job
+        questions = school.questions[test_id]
+        answers = {question_id: 'ABCD'[(seed + index) % 4] for index, question_id in enumerate(questions)}
+        # SQLite yazma kilidi çakışmasında istek tamamen geri alınır; öğrenci tekrar gönderir
+        for _ in range(20):
+            response = app_module.app.test_client().post(
+                f'/api/student/tests/{test_id}/submit', headers=school.students[student_id],
+                json={'answers': {str(q): a for q, a in answers.items()}})
+            if response.status_code != 500:
+                return response.status_code
+        return response.status_code
+
+    jobs = [(student_id, test_id, student_id * 7 + test_id)
+            for student_id in school.student_ids for test_id in school.test_ids]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(submit, jobs))
+    assert statuses == [200] * len(jobs)
+
+    aggregates = assert_aggregates_match_rebuild(app_module)
+    assert sum(row[1] for row in aggregates['test_stats']) == len(jobs)
+
+
+def test_enrollment_updates_student_count(app_module, school):
+    student_id = school.create_user('late', 'student')
+    school.enroll(student_id, school.course_ids[0])
+    aggregates = assert_aggregates_match_rebuild(app_module)
+    assert aggregates['course_stats'][0][1] == len(school.student_ids) + 1
+
+
+def test_statistics_endpoint_reads_materialized_averages(app_module, school):
+    vize, final = school.course_tests[school.course_ids[0]]
+    for index, student_id in enumerate(school.student_ids):
+        school.take(student_id, vize, seed=index)
+        school.take(student_id, final, seed=index + 1)
+
+    school.create_user('dh', 'department_head')
+    response = school.client.get('/api/department-head/statistics', headers=auth(school.client, 'dh'))
+    assert response.status_code == 200
+
+    grades = school.client.get(f'/api/instructor/courses/{school.course_ids[0]}/grades', headers=school.instructor).get_json()
+    final_grades = [row['final_grade'] for row in grades['student_grades']]
+    course = response.get_json()['course_statistics'][0]
+    assert course['student_count'] == len(school.student_ids)
+    assert course['course_average'] == round(sum(final_grades) / len(final_grades), 2)
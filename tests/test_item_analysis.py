@@ -0,0 +1,88 @@
+import pytest
+
+item_analysis = pytest.importorskip('item_analysis')
+
+# Dört girişim (puan yüzdeleri 20/40/60/80): alt grup 10, üst grup 13 (%27 -> birer girişim).
+# Satırlar: (girişim, soru, seçenek 0-3 = A-D / 4 = boş, doğru mu)
+ATTEMPTS = ([13, 10, 12, 11], [8, 2, 6, 4], [10, 10, 10, 10])
+ROWS = [
+    (10, 1, 1, 0), (11, 1, 0, 1), (12, 1, 0, 1), (13, 1, 0, 1),
+    (10, 2, 0, 1), (11, 2, 0, 1), (12, 2, 0, 1), (13, 2, 0, 1),
+    (10, 3, 4, 0), (11, 3, 3, 0), (13, 3, 2, 1),
+    (11, 4, 0, 1), (12, 4, 1, 0),
+    # Listede olmayan girişim ya da havuzda olmayan soru atlanır
+    (5, 1, 0, 1), (99, 1, 0, 1), (10, 42, 0, 1), (13, 0, 0, 1),
+]
+
+
+def analyse(rows, chunk_size=len(ROWS), attempts=ATTEMPTS):
+    analysis = item_analysis.ItemAnalysis([5, 3, 1, 4, 2], *attempts)
+    for start in range(0, len(rows), chunk_size):
+        analysis.add_chunk(rows[start:start + chunk_size])
+    analysis.add_chunk([])
+    return {stats['question_id']: stats for stats in analysis.results()}
+
+
+def test_item_statistics_match_hand_computed_values():
+    stats = analyse(ROWS)
+    assert list(stats) == [1, 2, 3, 4, 5]
+
+    # 1. soru: alt grup yanlış, diğerleri doğru; r = 7.5 / (sqrt(0.1875) * sqrt(500)) = sqrt(0.6)
+    assert stats[1] == {'question_id': 1, 'responses': 4, 'correct': 3, 'difficulty': 0.75,
+                        'discrimination': 1.0, 'point_biserial': 0.7746,
+                        'options': {'A': 3, 'B': 1, 'C': 0, 'D': 0, 'blank': 0}}
+    # 2. soru herkes doğru: soru varyansı sıfır
+    assert (stats[2]['difficulty'], stats[2]['discrimination'], stats[2]['point_biserial']) == (1.0, 0.0, None)
+    # 3. soru üç girişime düştü, boş cevap yanlış sayılır; r = sqrt(25 / 28)
+    assert stats[3] == {'question_id': 3, 'responses': 3, 'correct': 1, 'difficulty': 0.3333,
+                        'discrimination': 1.0, 'point_biserial': 0.9449,
+                        'options': {'A': 0, 'B': 0, 'C': 1, 'D': 1, 'blank': 1}}
+    # 4. soru yalnızca orta gruba düştü: ayırt edicilik hesaplanamaz
+    assert (stats[4]['difficulty'], stats[4]['discrimination'], stats[4]['point_biserial']) == (0.5, None, -1.0)
+    # 5. soruya hiç cevap yok
+    assert stats[5] == {'question_id': 5, 'responses': 0, 'correct': 0, 'difficulty': None,
+                        'discrimination': None, 'point_biserial': None,
+                        'options': {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'blank': 0}}
+
+
+def test_chunking_does_not_change_results():
+    assert analyse(ROWS, chunk_size=3) == analyse(list(reversed(ROWS)), chunk_size=5) == analyse(ROWS)
+
+
+def test_equal_scores_have_no_point_biserial():
+    # Tüm puanlar eşit (en yüksek puanı 0 olan girişim 0 sayılır): puan varyansı sıfır
+    stats = analyse(ROWS, attempts=([10, 11, 12, 13], [0, 0, 0, 0], [10, 10, 10, 0]))
+    assert [stats[question_id]['point_biserial'] for question_id in (1, 2, 3, 4)] == [None] * 4
+    assert stats[1]['difficulty'] == 0.75
+
+
+def test_empty_analysis():
+    analysis = item_analysis.ItemAnalysis([1], [], [], [])
+    analysis.add_chunk([(10, 1, 0, 1)])
+    assert analysis.results()[0]['responses'] == 0
+    assert item_analysis.ItemAnalysis([], [10], [5], [10]).results() == []
+
+
+def test_cached_analysis_follows_test_version(app_module, school):
+    test_id = school.test_ids[0]
+    for index, student_id in enumerate(school.student_ids):
+        school.take(student_id, test_id, seed=index)
+
+    def analysis():
+        response = school.client.get('/api/instructor/questions/analysis', headers=school.instructor,
+                                     query_string={'test_id': test_id})
+        assert response.status_code == 200
+        return response.get_json()
+
+    stats = app_module.item_analysis_stats
+    first = analysis()
+    runs, hits = stats['runs'], stats['cache_hits']
+    assert analysis() == first
+    assert (stats['runs'], stats['cache_hits']) == (runs, hits + 1)
+
+    # Başka bir worker'da soru eklenmiş gibi: yerel önbellek temizlenmez, yalnızca sürüm artar
+    with app_module.app.app_context():
+        app_module.bump_versions('test', [test_id])
+        app_module.db.session.commit()
+    analysis()
+    assert (stats['runs'], stats['cache_hits']) == (runs + 1, hits + 1)
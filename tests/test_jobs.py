@@ -0,0 +1,196 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from conftest import School, assert_aggregates_match_rebuild
+
+
+def dispatch(app_module):
+    # Testlerde JOB_POLL_INTERVAL=0: dispatcher turu elle çalıştırılır
+    with app_module.app.app_context():
+        return app_module.dispatch_jobs()
+
+
+def wait_for(school, job_id, *statuses):
+    for _ in range(200):
+        job = school.client.get(f'/api/jobs/{job_id}', headers=school.admin).get_json()
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} is still {job["status"]}')
+
+
+def count_rows(app_module, model, **filters):
+    with app_module.app.app_context():
+        return model.query.filter_by(**filters).count()
+
+
+@pytest.fixture
+def graded_school(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'PURGE_CHUNK_SIZE', 2)
+    school = School(client, students=5, courses=2)
+    for index, student_id in enumerate(school.student_ids):
+        for test_id in school.test_ids:
+            school.take(student_id, test_id, seed=index * 5 + test_id)
+    return school
+
+
+def test_background_job_runs_to_completion(app_module, school):
+    response = school.client.post('/api/admin/jobs', headers=school.admin, json={'kind': 'rebuild_test_stats'})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert school.client.get(f'/api/jobs/{job_id}', headers=school.admin).get_json()['status'] == 'queued'
+
+    assert dispatch(app_module) == 1
+    job = wait_for(school, job_id, 'completed')
+    assert job['attempts'] == 1
+    assert job['result'] == {'tests': len(school.test_ids)}
+
+
+def test_cancel_queued_job(app_module, school):
+    job_id = school.client.post('/api/admin/jobs', headers=school.admin, json={'kind': 'rebuild_gradebook'}).get_json()['job_id']
+    response = school.client.post(f'/api/jobs/{job_id}/cancel', headers=school.admin)
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'cancelled'
+    assert dispatch(app_module) == 0
+
+    response = school.client.post(f'/api/jobs/{job_id}/cancel', headers=school.admin)
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize('kind,url,owner', [
+    ('purge_test', '/api/instructor/tests/{test_id}', 'instructor'),
+    ('purge_course', '/api/admin/courses/{course_id}', 'admin'),
+])
+def test_cancel_running_purge_then_retry(app_module, graded_school, monkeypatch, kind, url, owner):
+    # İş ilk parçanın commit'inden sonra durdurulur; iptal isteği bu arada gelir
+    school = graded_school
+    original = app_module.JOB_KINDS[kind]
+    paused = threading.Event()
+    resume = threading.Event()
+
+    def pausing_purge(job, progress):
+        calls = []
+
+        def paused_progress(done, total=None):
+            calls.append(done)
+            if len(calls) == 2:
+                paused.set()
+                resume.wait(10)
+            progress(done, total)
+        return original[0](job, paused_progress)
+    monkeypatch.setitem(app_module.JOB_KINDS, kind, (pausing_purge, original[1]))
+
+    course_id = school.course_ids[1]
+    test_id = school.course_tests[course_id][0]
+    response = school.client.delete(url.format(test_id=test_id, course_id=course_id) + '?background=1',
+                                    headers=getattr(school, owner))
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert dispatch(app_module) == 1
+    assert paused.wait(10)
+
+    response = school.client.post(f'/api/jobs/{job_id}/cancel', headers=school.admin)
+    assert response.status_code == 202
+    assert response.get_json()['cancel_requested'] is True
+    dispatch(app_module)
+    resume.set()
+    job = wait_for(school, job_id, 'cancelled', 'completed', 'failed')
+    assert job['status'] == 'cancelled'
+    assert job['progress']['done'] == 2
+
+    # İlk parça silinmiş, kalanlar duruyor; özetler yine baştan hesaplananla aynı
+    target = (app_module.Test, test_id) if kind == 'purge_test' else (app_module.Course, course_id)
+    assert count_rows(app_module, target[0], id=target[1]) == 1
+    assert count_rows(app_module, app_module.ExamAttempt, test_id=test_id) < len(school.student_ids)
+    assert_aggregates_match_rebuild(app_module)
+
+    monkeypatch.setitem(app_module.JOB_KINDS, kind, original)
+    response = school.client.post(f'/api/jobs/{job_id}/retry', headers=school.admin)
+    assert response.status_code == 202
+    assert dispatch(app_module) == 1
+    job = wait_for(school, job_id, 'completed', 'failed')
+    assert job['status'] == 'completed'
+    assert count_rows(app_module, target[0], id=target[1]) == 0
+    aggregates = assert_aggregates_match_rebuild(app_module)
+    removed = [test_id] if kind == 'purge_test' else school.course_tests[course_id]
+    assert {row[0] for row in aggregates['test_stats']} == set(school.test_ids) - set(removed)
+
+
+def test_failed_job_is_retried_after_delay_then_manually(app_module, school, monkeypatch):
+    failures = []
+
+    def failing(job, progress):
+        failures.append(job['id'])
+        raise RuntimeError('disk full')
+    monkeypatch.setitem(app_module.JOB_KINDS, 'rebuild_gradebook', (failing, 2))
+    job_id = school.client.post('/api/admin/jobs', headers=school.admin, json={'kind': 'rebuild_gradebook'}).get_json()['job_id']
+
+    # İlk hata: iş JOB_RETRY_DELAY sonrası için tekrar kuyruğa alınır, hemen çalıştırılmaz
+    dispatch(app_module)
+    job = wait_for(school, job_id, 'queued')
+    assert (job['attempts'], job['error']) == (1, 'disk full')
+    assert dispatch(app_module) == 0
+    response = school.client.post(f'/api/jobs/{job_id}/retry', headers=school.admin)
+    assert response.status_code == 409
+
+    with app_module.app.app_context():
+        app_module.db.session.execute(app_module.db.update(app_module.Job).where(
+            app_module.Job.id == job_id).values(run_after=datetime.utcnow()))
+        app_module.db.session.commit()
+    dispatch(app_module)
+    job = wait_for(school, job_id, 'failed')
+    assert job['attempts'] == 2
+    assert len(failures) == 2
+
+    monkeypatch.setitem(app_module.JOB_KINDS, 'rebuild_gradebook', (lambda job, progress: {'courses': 0}, 2))
+    response = school.client.post(f'/api/jobs/{job_id}/retry', headers=school.admin)
+    assert response.status_code == 202
+    dispatch(app_module)
+    job = wait_for(school, job_id, 'completed')
+    assert (job['attempts'], job['error'], job['result']) == (1, None, {'courses': 0})
+
+
+def insert_running_job(app_module, attempts, heartbeat_age):
+    with app_module.app.app_context():
+        job = app_module.Job(id=f'stale{attempts}', kind='rebuild_test_stats', params='{}', status='running',
+                             attempts=attempts, max_attempts=3,
+                             heartbeat_at=datetime.utcnow() - timedelta(seconds=heartbeat_age))
+        app_module.db.session.add(job)
+        app_module.db.session.commit()
+        return job.id
+
+
+def test_stale_running_jobs_are_requeued_or_failed(app_module, school):
+    stale = app_module.app.config['JOB_STALE_SECONDS']
+    retried = insert_running_job(app_module, 1, stale + 5)
+    exhausted = insert_running_job(app_module, 3, stale + 5)
+    alive = insert_running_job(app_module, 2, 1)
+
+    assert dispatch(app_module) == 1
+    assert wait_for(school, retried, 'completed')['attempts'] == 2
+    job = wait_for(school, exhausted, 'failed')
+    assert job['error'] == 'Is yarida kaldi (worker yanit vermiyor)'
+    assert school.client.get(f'/api/jobs/{alive}', headers=school.admin).get_json()['status'] == 'running'
+
+
+def test_idle_dispatch_does_not_write(app_module, school):
+    # Boş kuyrukta ve yarıda kalmış iş yokken dispatcher turu yalnızca okur
+    insert_running_job(app_module, 1, 1)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0].upper())
+    with app_module.app.app_context():
+        engine = app_module.db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        for _ in range(3):
+            assert dispatch(app_module) == 0
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert statements
+    assert set(statements) == {'SELECT'}
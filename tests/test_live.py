@@ -0,0 +1,140 @@
+import json
+import logging
+from datetime import timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from conftest import auth
+
+
+def parse(message):
+    # "event: x\ndata: {...}\n\n" -> (x, {...}); retry satırı atlanır
+    fields = dict(line.split(': ', 1) for line in message.decode().strip().split('\n') if not line.startswith('retry'))
+    return fields['event'], json.loads(fields['data'])
+
+
+def bus_state(started=0, submitted=0):
+    return {'roster': {7: 'Ada', 8: 'Can'}, 'started': started, 'submitted': submitted,
+            'summary': {'average': 0, 'count': submitted}}
+
+
+def test_bus_sends_snapshot_then_events(app_module):
+    bus = app_module.ExamEventBus()
+    loads = []
+    subscriber, snapshot = bus.subscribe(1, lambda: loads.append(1) or bus_state(started=2, submitted=1))
+    assert parse(snapshot) == ('snapshot', {'started': 2, 'submitted': 1, 'average': 0, 'count': 1})
+
+    # İkinci abone durumu veritabanından tekrar yüklemez
+    other, snapshot = bus.subscribe(1, lambda: loads.append(2) or bus_state())
+    assert loads == [1]
+    assert parse(snapshot)[1]['started'] == 2
+
+    bus.publish(1, 'started', {'student_id': 7})
+    bus.publish(1, 'submitted', {'student_id': 8, 'score': 4})
+    bus.publish(1, 'average', {'average': 3.0, 'count': 2})
+    bus.publish(2, 'started', {'student_id': 7})  # izlenmeyen test
+    for reader in (subscriber, other):
+        assert [parse(reader.next(0)) for _ in range(3)] == [
+            ('started', {'student_id': 7, 'student_name': 'Ada', 'started': 3, 'submitted': 1}),
+            ('submitted', {'student_id': 8, 'score': 4, 'student_name': 'Can', 'started': 3, 'submitted': 2}),
+            ('average', {'average': 3.0, 'count': 2, 'started': 3, 'submitted': 2}),
+        ]
+        assert reader.next(0) is None
+    assert bus.snapshot() == {'published': 3, 'delivered': 6, 'dropped_subscribers': 0,
+                              'watched_tests': 1, 'subscribers': 2}
+
+    # Son abone ayrılınca test durumu bırakılır
+    bus.unsubscribe(1, subscriber)
+    bus.unsubscribe(1, other)
+    assert (bus.subscribers, bus.states) == ({}, {})
+
+
+def test_bus_drops_slow_subscriber(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'EXAM_STREAM_QUEUE_SIZE', 2)
+    bus = app_module.ExamEventBus()
+    slow, _ = bus.subscribe(1, bus_state)
+    fast, _ = bus.subscribe(1, bus_state)
+    for student_id in (7, 8):
+        bus.publish(1, 'started', {'student_id': student_id})
+    assert parse(fast.next(0))[0] == parse(fast.next(0))[0] == 'started'
+
+    # Kuyruğu dolu abone taşma işaretiyle düşürülür, diğeri etkilenmez
+    bus.publish(1, 'submitted', {'student_id': 7})
+    assert slow.next(0) is app_module.ExamStreamSubscriber.OVERFLOW
+    assert parse(fast.next(0))[0] == 'submitted'
+    assert bus.subscribers[1] == {fast}
+    assert bus.stats['dropped_subscribers'] == 1
+    bus.publish(1, 'average', {'average': 0, 'count': 1})
+    assert slow.next(0) is app_module.ExamStreamSubscriber.OVERFLOW
+
+
+def live_token(school, test_id):
+    response = school.client.post(f'/api/instructor/tests/{test_id}/live-token', headers=school.instructor)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['token']
+
+
+def test_live_stream_with_scoped_token(app_module, school, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'EXAM_STREAM_HEARTBEAT', 0.05)
+    test_id = school.test_ids[0]
+    student_id = school.student_ids[0]
+    school.take(school.student_ids[1], test_id)
+
+    response = school.client.get(f'/api/instructor/tests/{test_id}/live', query_string={'jwt': live_token(school, test_id)})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    try:
+        event, snapshot = parse(next(chunks))
+        assert (event, snapshot['started'], snapshot['submitted'], snapshot['count']) == ('snapshot', 1, 1, 1)
+
+        result = school.take(student_id, test_id)
+        events = []
+        while len(events) < 3:
+            chunk = next(chunks)
+            if chunk != b': ping\n\n':
+                events.append(parse(chunk))
+        assert [event for event, _ in events] == ['started', 'submitted', 'average']
+        assert events[0][1]['student_name'] == 'S0'
+        assert (events[1][1]['score'], events[1][1]['started'], events[1][1]['submitted']) == (result['score'], 2, 2)
+        assert events[2][1]['count'] == 2
+        assert next(chunks) == b': ping\n\n'
+    finally:
+        response.close()
+    assert app_module.exam_events.snapshot()['subscribers'] == 0
+
+
+def test_live_stream_token_rules(app_module, school):
+    vize, final = school.test_ids[:2]
+    url = f'/api/instructor/tests/{vize}/live'
+    token = live_token(school, vize)
+
+    # Normal erişim token'ı URL'de kabul edilmez, başlıkta edilir
+    assert school.client.get(url, query_string={'jwt': school.instructor['Authorization'][7:]}).status_code == 403
+    response = school.client.get(url, headers=school.instructor)
+    assert response.status_code == 200
+    response.close()
+
+    # Akış token'ı başka bir teste ve başka route'lara geçmez
+    assert school.client.get(f'/api/instructor/tests/{final}/live', query_string={'jwt': token}).status_code == 403
+    assert school.client.get('/api/instructor/courses', headers={'Authorization': 'Bearer ' + token}).status_code == 403
+
+    with app_module.app.app_context():
+        expired = create_access_token(identity=str(school.instructor_id), expires_delta=timedelta(seconds=-1),
+                                      additional_claims={'role': 'instructor', 'scope': 'live', 'test_id': vize})
+    assert school.client.get(url, query_string={'jwt': expired}).status_code == 401
+
+    school.create_user('other', 'instructor')
+    assert school.client.post(f'/api/instructor/tests/{vize}/live-token', headers=auth(school.client, 'other')).status_code == 404
+    student = school.students[school.student_ids[0]]
+    assert school.client.post(f'/api/instructor/tests/{vize}/live-token', headers=student).status_code == 403
+
+
+@pytest.mark.parametrize('query', ['jwt=abc.def-ghi', 'x=1&jwt=abc.def-ghi&y=2'])
+def test_access_log_redacts_stream_token(app_module, caplog, query):
+    # werkzeug istek satırını argüman olarak verir: '"%s" %s %s'
+    with caplog.at_level(logging.INFO, logger='werkzeug'):
+        logging.getLogger('werkzeug').info('127.0.0.1 - - [x] "%s" %s %s', f'GET /api/instructor/tests/1/live?{query} HTTP/1.1', '200', '-')
+    assert 'abc.def' not in caplog.text
+    assert 'jwt=[gizli]' in caplog.text
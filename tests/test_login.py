@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def login_pool(app_module, monkeypatch):
+    # Tek işçili havuz ve tek slotluk kuyruk; hash release olayı gelene kadar sürer
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def slow_check(password_hash, password):
+        release.wait(5)
+        return password == 'secret'
+
+    monkeypatch.setitem(app_module.app.config, 'LOGIN_VERIFY_WORKERS', 1)
+    monkeypatch.setitem(app_module.app.config, 'LOGIN_VERIFY_TIMEOUT', 0.05)
+    monkeypatch.setattr(app_module, 'login_slots', threading.BoundedSemaphore(1))
+    monkeypatch.setattr(app_module, 'login_stats', {'verified': 0, 'rejected': 0, 'timed_out': 0})
+    monkeypatch.setattr(app_module, 'check_password_hash', slow_check)
+    monkeypatch.setattr(app_module, 'get_process_pool', lambda name, workers, initializer=None: executor)
+    yield release
+    release.set()
+    executor.shutdown(wait=True)
+
+
+def test_timed_out_hash_keeps_its_queue_slot(app_module, login_pool):
+    with pytest.raises(app_module.LoginQueueFull):
+        app_module.verify_password('hash', 'secret')
+    assert app_module.login_stats['timed_out'] == 1
+
+    # İlk hash hâlâ çalışıyor: slot boşalmadığı için yeni doğrulama kuyruğa alınmaz
+    with pytest.raises(app_module.LoginQueueFull):
+        app_module.verify_password('hash', 'secret')
+    assert app_module.login_stats == {'verified': 0, 'rejected': 1, 'timed_out': 1}
+
+    login_pool.set()
+    assert app_module.login_slots.acquire(timeout=5)
+    app_module.login_slots.release()
+    assert app_module.verify_password('hash', 'secret') is True
+    assert app_module.verify_password('hash', 'wrong') is False
+    assert app_module.login_stats['verified'] == 2
+
+
+def test_login_endpoint_reports_full_queue(app_module, client, login_pool):
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 503
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 503
+    assert app_module.login_stats['rejected'] == 1
@@ -0,0 +1,68 @@
+def walk(client, url, headers, limit, cursor=None):
+    # Tüm sayfaları X-Next-Cursor ile dolaşır
+    pages = []
+    while True:
+        separator = '&' if '?' in url else '?'
+        page_url = f'{url}{separator}limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(page_url, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        pages.append(response)
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return pages
+
+
+def test_cursor_pages_cover_the_full_list_once(school):
+    everyone = school.client.get('/api/admin/users', headers=school.admin)
+    assert 'X-Total-Count' not in everyone.headers
+
+    pages = walk(school.client, '/api/admin/users', school.admin, limit=2)
+    ids = [user['id'] for page in pages for user in page.get_json()]
+    assert ids == [user['id'] for user in everyone.get_json()]
+    assert ids == sorted(ids)
+    assert len(pages) == (len(ids) + 1) // 2
+    assert {page.headers['X-Total-Count'] for page in pages} == {str(len(ids))}
+
+
+def test_cursor_is_stable_when_rows_change_between_pages(school):
+    first = school.client.get('/api/admin/users?role=student&limit=2', headers=school.admin)
+    seen = [user['id'] for user in first.get_json()]
+
+    # Önceki sayfadaki bir satır silinir, sona yeni satır eklenir: tekrar ya da atlama olmaz
+    response = school.client.delete(f'/api/admin/users/{seen[0]}', headers=school.admin)
+    assert response.status_code == 200
+    added = school.create_user('new', 'student')
+
+    cursor = first.headers['X-Next-Cursor']
+    rest = walk(school.client, '/api/admin/users?role=student', school.admin, limit=2, cursor=cursor)
+    remaining = [user['id'] for page in rest for user in page.get_json()]
+    assert remaining == [student_id for student_id in school.student_ids if student_id not in seen] + [added]
+
+
+def test_filters_apply_before_paging(school):
+    pages = walk(school.client, f'/api/admin/users?course_id={school.course_ids[0]}&q=s', school.admin, limit=3)
+    ids = [user['id'] for page in pages for user in page.get_json()]
+    assert ids == school.student_ids
+    assert pages[0].headers['X-Total-Count'] == str(len(school.student_ids))
+
+
+def test_result_pages_filter_by_state(school):
+    test_id = school.test_ids[0]
+    for index, student_id in enumerate(school.student_ids):
+        if index % 2:
+            school.start(student_id, test_id)
+        else:
+            school.take(student_id, test_id, seed=index)
+
+    url = f'/api/instructor/tests/{test_id}/results'
+    submitted = walk(school.client, f'{url}?state=submitted', school.instructor, limit=1)
+    in_progress = walk(school.client, f'{url}?state=in_progress', school.instructor, limit=1)
+    assert submitted[0].headers['X-Total-Count'] == in_progress[0].headers['X-Total-Count'] == '2'
+    assert len(submitted) == len(in_progress) == 2
+
+
+def test_invalid_cursor_is_rejected(school):
+    for cursor in ('not-a-cursor', 'W10', 'eyJhZnRlciI6ICJ4In0'):
+        response = school.client.get(f'/api/admin/users?cursor={cursor}', headers=school.admin)
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Gecersiz cursor'}
@@ -0,0 +1,92 @@
+import pytest
+
+from conftest import School, assert_aggregates_match_rebuild
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def graded_school(app_module, client, monkeypatch):
+    # İki ders, her öğrenci her testi tamamlamış; silmeler ikişer girişimlik parçalarla yapılır
+    monkeypatch.setitem(app_module.app.config, 'PURGE_CHUNK_SIZE', 2)
+    school = School(client, students=5, courses=2)
+    for index, student_id in enumerate(school.student_ids):
+        for test_id in school.test_ids:
+            school.take(student_id, test_id, seed=index * 5 + test_id)
+    return school
+
+
+def interrupt_after(chunks):
+    # İlk ilerleme bildirimi (0) silmeden önce gelir; sonraki her bildirim bir parçanın commit'idir
+    calls = []
+
+    def progress(done, total=None):
+        calls.append(done)
+        if len(calls) > chunks:
+            raise Interrupted()
+    return progress
+
+
+def run_purge(app_module, purge_func, target_id, progress=None):
+    with app_module.app.app_context():
+        try:
+            return purge_func(target_id, progress)
+        except Interrupted:
+            app_module.db.session.rollback()
+            return None
+
+
+def count_rows(app_module, model, **filters):
+    with app_module.app.app_context():
+        return model.query.filter_by(**filters).count()
+
+
+def test_purge_user_keeps_aggregates_equal_to_rebuild(app_module, graded_school):
+    student_id = graded_school.student_ids[0]
+    assert run_purge(app_module, app_module.purge_user, student_id) == len(graded_school.test_ids)
+    aggregates = assert_aggregates_match_rebuild(app_module)
+    assert all(row[1] == len(graded_school.student_ids) - 1 for row in aggregates['test_stats'])
+    assert all(row[0] != student_id for row in aggregates['course_grades'])
+
+
+@pytest.mark.parametrize('chunks', [0, 1])
+def test_interrupted_purge_user_leaves_consistent_aggregates(app_module, graded_school, chunks):
+    student_id = graded_school.student_ids[1]
+    run_purge(app_module, app_module.purge_user, student_id, interrupt_after(chunks))
+    assert count_rows(app_module, app_module.ExamAttempt, student_id=student_id) == len(graded_school.test_ids) - 2 * chunks
+    assert_aggregates_match_rebuild(app_module)
+
+    # Yeniden deneme kalan girişimleri siler; önceki parçaların testleri de doğru kalır
+    run_purge(app_module, app_module.purge_user, student_id)
+    assert count_rows(app_module, app_module.User, id=student_id) == 0
+    assert_aggregates_match_rebuild(app_module)
+
+
+@pytest.mark.parametrize('chunks', [1, 2])
+def test_interrupted_purge_test_leaves_consistent_aggregates(app_module, graded_school, chunks):
+    test_id = graded_school.test_ids[0]
+    run_purge(app_module, app_module.purge_test, test_id, interrupt_after(chunks))
+    assert count_rows(app_module, app_module.Test, id=test_id) == 1
+    assert count_rows(app_module, app_module.ExamAttempt, test_id=test_id) == len(graded_school.student_ids) - 2 * chunks
+    aggregates = assert_aggregates_match_rebuild(app_module)
+    assert [row[1] for row in aggregates['test_stats'] if row[0] == test_id] == [len(graded_school.student_ids) - 2 * chunks]
+
+    run_purge(app_module, app_module.purge_test, test_id)
+    assert count_rows(app_module, app_module.Test, id=test_id) == 0
+    aggregates = assert_aggregates_match_rebuild(app_module)
+    assert all(row[0] != test_id for row in aggregates['test_stats'] + aggregates['score_buckets'])
+
+
+def test_interrupted_purge_course_leaves_consistent_aggregates(app_module, graded_school):
+    course_id = graded_school.course_ids[1]
+    run_purge(app_module, app_module.purge_course, course_id, interrupt_after(3))
+    assert count_rows(app_module, app_module.Course, id=course_id) == 1
+    assert_aggregates_match_rebuild(app_module)
+
+    run_purge(app_module, app_module.purge_course, course_id)
+    assert count_rows(app_module, app_module.Course, id=course_id) == 0
+    aggregates = assert_aggregates_match_rebuild(app_module)
+    assert all(row[0] != course_id for row in aggregates['course_stats'])
+    assert all(row[1] == 1 for row in aggregates['student_stats'])
@@ -0,0 +1,100 @@
+import os
+import time
+
+import pytest
+from flask import g
+from sqlalchemy import create_engine, text
+
+from conftest import TMP, School
+
+
+@pytest.fixture
+def replica(app_module, monkeypatch):
+    # README'deki yerel kurulum: ikinci SQLite dosyası 'replica' bind'i olarak eklenir
+    path = os.path.join(TMP, f'replica-{time.time_ns()}.db')
+    with app_module.app.app_context():
+        engines = app_module.db.engines
+    monkeypatch.setitem(app_module.app.config, 'SQLALCHEMY_BINDS', {'replica': 'sqlite:///' + path})
+    monkeypatch.setitem(engines, 'replica', create_engine('sqlite:///' + path))
+    for key, value in (('routed', 0), ('fallbacks', 0), ('down_until', 0.0)):
+        monkeypatch.setitem(app_module.replica_state, key, value)
+    yield engines
+    engines['replica'].dispose()
+
+
+def sync_replica(app_module):
+    result = app_module.app.test_cli_runner().invoke(args=['sync-replica'])
+    assert result.exit_code == 0, result.output
+
+
+def attempt_count(engine):
+    with engine.connect() as connection:
+        return connection.execute(text('SELECT COUNT(*) FROM exam_attempts')).scalar()
+
+
+def results(school, test_id):
+    response = school.client.get(f'/api/instructor/tests/{test_id}/results', headers=school.instructor)
+    assert response.status_code == 200
+    return response.get_json()['results']
+
+
+def test_reporting_routes_read_from_replica(app_module, client, replica):
+    school = School(client, students=3)
+    test_id = school.test_ids[0]
+    school.take(school.student_ids[0], test_id)
+    sync_replica(app_module)
+
+    # Replikaya henüz kopyalanmamış teslim raporda görünmez, öğrencinin kendi sonucunda görünür
+    school.take(school.student_ids[1], test_id, seed=1)
+    assert (attempt_count(replica[None]), attempt_count(replica['replica'])) == (2, 1)
+    routed = app_module.replica_state['routed']
+    assert [row['student_id'] for row in results(school, test_id)] == school.student_ids[:1]
+    assert app_module.replica_state['routed'] == routed + 1
+    response = client.get(f'/api/student/tests/{test_id}/result', headers=school.students[school.student_ids[1]])
+    assert response.status_code == 200
+
+    sync_replica(app_module)
+    assert [row['student_id'] for row in results(school, test_id)] == school.student_ids[:2]
+
+
+def test_writes_stay_on_primary_while_reading_from_replica(app_module, client, replica):
+    school = School(client, students=1)
+    sync_replica(app_module)
+    course_id = school.course_ids[0]
+
+    with app_module.app.test_request_context():
+        g.use_replica = True
+        session = app_module.db.session
+        assert session.get_bind(clause=app_module.db.select(app_module.Course)) is replica['replica']
+        assert session.get_bind(clause=app_module.db.update(app_module.Course)) is replica[None]
+
+        # ORM flush ve toplu DML primary'ye yazılır; okuma replikadan gelir
+        session.add(app_module.Job(id='replica-job', kind='rebuild_test_stats', params='{}'))
+        session.execute(app_module.db.update(app_module.Course).where(app_module.Course.id == course_id).values(name='Renamed'))
+        session.commit()
+        assert session.query(app_module.Job).count() == 0
+        assert session.query(app_module.Course.name).filter_by(id=course_id).scalar() == 'Course C0'
+        session.remove()
+
+    with replica[None].connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM jobs WHERE id = 'replica-job'")).scalar() == 1
+        assert connection.execute(text('SELECT name FROM courses WHERE id = :id'), {'id': course_id}).scalar() == 'Renamed'
+
+
+def test_replica_error_falls_back_to_primary(app_module, client, replica, monkeypatch):
+    school = School(client, students=2)
+    test_id = school.test_ids[0]
+    school.take(school.student_ids[0], test_id)
+
+    # Açılamayan replika dosyası: OperationalError -> istek primary'de tekrarlanır
+    replica['replica'].dispose()
+    monkeypatch.setitem(replica, 'replica', create_engine('sqlite:///' + os.path.join(TMP, 'missing', 'replica.db')))
+    before = time.time()
+    assert [row['student_id'] for row in results(school, test_id)] == school.student_ids[:1]
+    assert app_module.replica_state['fallbacks'] == 1
+    assert app_module.replica_state['down_until'] >= before + app_module.app.config['REPLICA_RETRY_SECONDS']
+
+    # Devre dışı kaldığı sürece replikaya hiç gidilmez
+    routed = app_module.replica_state['routed']
+    assert len(results(school, test_id)) == 1
+    assert (app_module.replica_state['routed'], app_module.replica_state['fallbacks']) == (routed, 1)
@@ -0,0 +1,39 @@
+from conftest import School
+
+RESULT_ROUTE = 'GET /api/student/tests/<int:test_id>/result'
+
+
+def result_with_metrics(app_module, school, student_id, test_id):
+    app_module.sql_metrics.clear()
+    response = school.client.get(f'/api/student/tests/{test_id}/result', headers=school.students[student_id])
+    assert response.status_code == 200
+    return response.get_json(), app_module.sql_metrics[RESULT_ROUTE]
+
+
+def test_result_answers_are_loaded_without_per_answer_queries(app_module, client):
+    school = School(client, students=1, question_count=3, pool_size=3)
+    student_id = school.student_ids[0]
+    small = school.course_tests[school.course_ids[0]][0]
+    large = school.course_tests[school.add_course('BIG', 15, 15, tests=(('Vize', 40),))][0]
+
+    submitted = {}
+    for test_id in (small, large):
+        questions = school.start(student_id, test_id)['questions']
+        # Son soru boş bırakılır
+        submitted[test_id] = {q['id']: 'ABCD'[index % 4] for index, q in enumerate(questions[:-1])}
+        school.submit(student_id, test_id, submitted[test_id])
+
+    counts = []
+    for test_id in (small, large):
+        result, metrics = result_with_metrics(app_module, school, student_id, test_id)
+        answers = {answer['question_id']: answer for answer in result['answers']}
+        assert {question_id: answer['selected_answer'] for question_id, answer in answers.items()} == submitted[test_id]
+        for question_id, answer in answers.items():
+            correct = 'ABCD'[school.questions[test_id].index(question_id) % 4]
+            assert answer['correct_answer'] == correct
+            assert answer['is_correct'] == (answer['selected_answer'] == correct)
+            assert answer['points_earned'] == (2 if answer['is_correct'] else 0)
+        assert sum(answer['points_earned'] for answer in result['answers']) == result['score']
+        assert metrics['n_plus_one_requests'] == 0
+        counts.append(metrics['max_queries'])
+    assert counts[0] == counts[1]
@@ -0,0 +1,88 @@
+import pytest
+
+from conftest import assert_aggregates_match_rebuild
+
+
+@pytest.mark.parametrize('score, max_score, bucket', [
+    (2, 3, 67),            # 66.67: tam kısmı 66
+    (1, 3, 33),
+    (5.6999999, 10, 57),   # kayan nokta hatası
+    (62.5, 100, 62),       # .5 çift sayıya
+    (63.5, 100, 64),
+    (99.6, 100, 100),
+    (10, 10, 100),
+    (12, 10, 100),
+    (-1, 10, 0),
+    (None, 10, 0),
+    (5, 0, 0),
+])
+def test_score_bucket_rounds_to_nearest(app_module, score, max_score, bucket):
+    assert app_module.score_bucket(score, max_score) == bucket
+
+
+def test_empty_distribution(app_module):
+    distribution = app_module.ScoreDistribution([])
+    assert distribution.percentile_rank(5, 10) is None
+    assert distribution.quantile(0.5) is None
+
+
+def test_single_attempt(app_module):
+    distribution = app_module.ScoreDistribution([(70, 1)])
+    assert distribution.percentile_rank(7, 10) == 50.0
+    assert [distribution.quantile(q) for q in (0, 0.25, 0.5, 0.75, 1)] == [70] * 5
+
+
+def test_ties_share_percentile_rank(app_module):
+    # Sıralı yüzdeler: 40, 60, 60, 60, 100
+    distribution = app_module.ScoreDistribution([(40, 1), (60, 3), (100, 1)])
+    assert distribution.percentile_rank(4, 10) == 10.0
+    assert distribution.percentile_rank(6, 10) == 50.0    # 1 düşük + 3 eşitin yarısı
+    assert distribution.percentile_rank(10, 10) == 90.0
+    assert distribution.percentile_rank(5, 10) == 20.0    # dağılımda olmayan puan
+
+
+def test_quantile_interpolates_between_ranks(app_module):
+    distribution = app_module.ScoreDistribution([(40, 1), (60, 3), (100, 1)])
+    # Konum q * (n - 1): 0.1 -> 0.4 (40..60), 0.9 -> 3.6 (60..100)
+    assert [distribution.quantile(q) for q in (0, 0.1, 0.25, 0.5, 0.75, 0.9, 1)] == [40, 48.0, 60, 60, 60, 84.0, 100]
+    assert app_module.ScoreDistribution([(40, 1), (50, 1)]).quantile(0.5) == 45.0
+
+    numpy = pytest.importorskip('numpy')
+    values = [40, 60, 60, 60, 100]
+    for q in (0.1, 0.25, 0.33, 0.5, 0.75, 0.9):
+        assert distribution.quantile(q) == round(float(numpy.percentile(values, q * 100)), 2)
+
+
+def test_full_score(app_module):
+    distribution = app_module.ScoreDistribution([(90, 1), (100, 2)])
+    assert distribution.percentile_rank(10, 10) == round((1 + 1) / 3 * 100, 2)
+    assert distribution.quantile(0.5) == distribution.quantile(1) == 100
+    # 100 son aralığa dahildir
+    assert distribution.histogram(10)[-1] == {'from': 90, 'to': 100, 'count': 3}
+
+
+def test_result_distribution_uses_rounded_percentages(app_module, school):
+    test_id = school.test_ids[0]
+    pool = school.questions[test_id]
+
+    def answer(student_id, correct_count):
+        # İlk correct_count soru doğru, kalanlar yanlış
+        questions = school.start(student_id, test_id)['questions']
+        answers = {}
+        for index, question in enumerate(questions):
+            correct = 'ABCD'[pool.index(question['id']) % 4]
+            answers[question['id']] = correct if index < correct_count else 'ABCD'['ABCD'.index(correct) - 1]
+        return school.submit(student_id, test_id, answers)
+
+    # 2/3 (66.67) üç öğrenci, 1/3 (33.33) bir öğrenci
+    for student_id, correct_count in zip(school.student_ids, (2, 2, 2, 1)):
+        answer(student_id, correct_count)
+    result = school.client.get(f'/api/student/tests/{test_id}/result', headers=school.students[school.student_ids[0]]).get_json()
+    assert result['percentile_rank'] == 62.5
+    assert (result['distribution']['q1'], result['distribution']['median']) == (58.5, 67)
+
+    with app_module.app.app_context():
+        buckets = app_module.db.session.query(app_module.TestScoreBucket.bucket, app_module.TestScoreBucket.attempt_count).filter_by(
+            test_id=test_id).order_by(app_module.TestScoreBucket.bucket).all()
+    assert [tuple(row) for row in buckets] == [(33, 1), (67, 3)]
+    assert_aggregates_match_rebuild(app_module)
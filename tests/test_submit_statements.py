@@ -0,0 +1,25 @@
+from conftest import School
+
+
+def submit_statement_counts(school, test_id):
+    # Her öğrenci tam puan alır: iki testte de özet satırları (puan dilimleri dahil) aynı sırayla oluşur
+    correct = {question_id: 'ABCD'[index % 4] for index, question_id in enumerate(school.questions[test_id])}
+    counts = []
+    for student_id in school.student_ids:
+        questions = school.start(student_id, test_id)['questions']
+        response = school.client.post(f'/api/student/tests/{test_id}/submit', headers=school.students[student_id], json={
+            'answers': {str(q['id']): correct[q['id']] for q in questions}})
+        assert response.status_code == 200
+        counts.append(int(response.headers['X-Statement-Count']))
+    return counts
+
+
+def test_submit_statement_count_does_not_depend_on_question_count(client):
+    school = School(client, students=3, question_count=3, pool_size=3)
+    small = school.course_tests[school.course_ids[0]][0]
+    large = school.course_tests[school.add_course('BIG', 15, 15, tests=(('Vize', 40),))][0]
+
+    # Her iki test de dersinin ilk testi
+    small_counts = submit_statement_counts(school, small)
+    assert small_counts == submit_statement_counts(school, large)
+    assert max(small_counts) == small_counts[0]